@@ -18,6 +18,10 @@ class LoginUserUseCase:
         service = UserDomainService(self.user_repo)
         return service.authenticate_user(account, password, system_code)
 
+    async def aexecute(self, account, password, system_code):
+        service = UserDomainService(self.user_repo)
+        return await service.aauthenticate_user(account, password, system_code)
+
 
 class GetMyUserInfoUseCase:
     """用例：获取当前登录用户信息"""
@@ -31,13 +35,19 @@ class GetMyUserInfoUseCase:
             raise ValueError("用户不存在")
         return user
 
+    async def aexecute(self, user_id: str):
+        user = await self.user_repo.aget_by_id(user_id)
+        if not user:
+            raise ValueError("用户不存在")
+        return user
+
 
 class ListUsersUseCase:
     def __init__(self):
         self.user_repo = DjangoUserRepository()
 
-    def execute(self, filters: dict):
-        return UserDomainService(self.user_repo).list_users(filters)
+    def execute(self, filters: dict, include=()):
+        return UserDomainService(self.user_repo).list_users(filters, include)
 
 
 class GetCurrentUserUseCase:
@@ -51,3 +61,23 @@ class GetCurrentUserUseCase:
         if not user_entity:
             raise ValueError("用户不存在")
         return user_entity
+
+
+class BatchGetUsersUseCase:
+    """用例：按 uuid / unified_uuid 批量获取用户信息（下游服务渲染列表时使用）"""
+
+    def __init__(self):
+        self.user_repo = DjangoUserRepository()
+
+    def execute(self, uuids, unified_uuids):
+        return self.user_repo.get_many_by_ids(uuids, unified_uuids)
+
+
+class ExportUsersUseCase:
+    """用例：按列表筛选条件流式导出用户"""
+
+    def __init__(self):
+        self.user_repo = DjangoUserRepository()
+
+    def execute(self, filters: dict, fields, chunk_size=2000):
+        return self.user_repo.stream_users(fields, chunk_size=chunk_size, **filters)
@@ -0,0 +1,31 @@
+# domain/identifiers.py
+import re
+
+EMAIL = 'email'
+PHONE = 'phone'
+USERNAME = 'username'
+
+# ✅ 预编译，避免登录时重复解析正则
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+PHONE_PATTERN = re.compile(r"^1\d{10}$")
+
+
+def normalize(identifier_type, value):
+    value = (value or '').strip()
+    return value.lower() if identifier_type == EMAIL else value
+
+
+def classify_account(account):
+    """判断登录账号类型，返回 (类型, 归一化值)"""
+    account = (account or '').strip()
+    if EMAIL_PATTERN.match(account):
+        return EMAIL, normalize(EMAIL, account)
+    if PHONE_PATTERN.match(account):
+        return PHONE, normalize(PHONE, account)
+    return USERNAME, normalize(USERNAME, account)
+
+
+def identifiers_for(username, email, phone):
+    """用户可用于登录的全部标识 {(类型, 归一化值)}"""
+    pairs = ((EMAIL, email), (PHONE, phone), (USERNAME, username))
+    return {(identifier_type, normalize(identifier_type, value)) for identifier_type, value in pairs if value}
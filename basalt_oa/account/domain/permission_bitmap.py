@@ -0,0 +1,25 @@
+# domain/permission_bitmap.py
+import base64
+import hashlib
+
+
+def dictionary_version(codenames):
+    """字典版本号：codename 有序列表的短摘要，列表变化即版本变化"""
+    return hashlib.sha1(",".join(codenames).encode()).hexdigest()[:8]
+
+
+def encode_bitmap(permissions, codenames):
+    """按字典下标把权限集合编码为位图，输出 base64url（无填充）"""
+    positions = {codename: index for index, codename in enumerate(codenames)}
+    bits = 0
+    for codename in permissions:
+        if codename in positions:
+            bits |= 1 << positions[codename]
+    raw = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_bitmap(value, codenames):
+    raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+    bits = int.from_bytes(raw, 'little')
+    return [codename for index, codename in enumerate(codenames) if bits >> index & 1]
@@ -5,6 +5,12 @@ class IUserRepository(ABC):
     @abstractmethod
     def get_by_account(self, account: str, system_code: str): pass
 
+    @abstractmethod
+    def check_password(self, user, password: str) -> bool: pass
+
+    @abstractmethod
+    def record_login(self, user): pass
+
     @abstractmethod
     def exists_by_email_or_phone(self, email: str, phone: str) -> bool: pass
 
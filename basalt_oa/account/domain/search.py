@@ -0,0 +1,8 @@
+# domain/search.py
+SEARCH_FIELDS = ('username', 'email', 'phone')
+GRAM_SIZE = 3
+
+
+def trigrams(value):
+    value = (value or '').lower()
+    return {value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}
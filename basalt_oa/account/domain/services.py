@@ -17,6 +17,7 @@ class UserDomainService:
 
         return UserEntity(
             uuid=user.uuid,
+            unified_uuid=user.unified_uuid,
             username=user.username,
             email=user.email,
             phone=user.phone,
@@ -29,12 +30,21 @@ class UserDomainService:
 
     def authenticate_user(self, account, password, system_code):
         user = self.user_repo.get_by_account(account, system_code)
-        if not user or not user.check_password(password):
+        if not user or not self.user_repo.check_password(user, password):
             raise ValueError("账号或密码错误")
         if not user.is_active:
             raise ValueError("账户被禁用")
+        self.user_repo.record_login(user)
         return user
 
+    async def aauthenticate_user(self, account, password, system_code):
+        user = await self.user_repo.aget_by_account(account, system_code)
+        if not user or not await self.user_repo.acheck_password(user, password):
+            raise ValueError("账号或密码错误")
+        if not user.is_active:
+            raise ValueError("账户被禁用")
+        await self.user_repo.arecord_login(user)
+        return user
 
-    def list_users(self, filters: dict):
-        return self.user_repo.filter_user(**filters)
\ No newline at end of file
+    def list_users(self, filters: dict, include=()):
+        return self.user_repo.filter_user(**filters, include=include)
\ No newline at end of file
@@ -0,0 +1,184 @@
+# infrastructure/hashing.py
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from middlewares.metrics.registry import metrics
+
+password_hash_duration = metrics.histogram(
+    'password_hash_duration_seconds', '密码哈希耗时（含进程池排队）')
+password_hash_busy = metrics.counter(
+    'password_hash_busy_total', '哈希进程池排队已满被拒绝的次数')
+
+
+class PasswordHashBusy(RuntimeError):
+    """哈希进程池排队已满"""
+
+
+def _init_worker(settings_module):
+    # spawn 启动的子进程需要自行初始化 Django；fork 出来的已继承配置
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _check_password(raw_password, encoded):
+    from django.contrib.auth.hashers import check_password
+    must_update = []
+    is_correct = check_password(raw_password, encoded, setter=lambda _: must_update.append(True))
+    return is_correct, bool(must_update)
+
+
+def _make_password(raw_password):
+    from django.contrib.auth.hashers import make_password
+    return make_password(raw_password)
+
+
+def make_passwords(raw_passwords):
+    # 批量导入时按块提交到 new_hash_pool()，减少进程间往返
+    from django.contrib.auth.hashers import make_password
+    return [make_password(raw_password) for raw_password in raw_passwords]
+
+
+def new_hash_pool(max_workers):
+    """独立的哈希进程池（批量导入等离线任务使用，不占用请求路径的排队槽位）"""
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', ''),),
+    )
+
+
+class PasswordHashExecutor:
+    """
+    把 PBKDF2 等 CPU 密集的哈希放到有界进程池中执行，避免占满请求线程。
+    MAX_WORKERS 限制并发哈希数，MAX_PENDING 限制排队深度，超过后抛 PasswordHashBusy。
+    MAX_WORKERS = 0 时在当前线程内直接计算（测试环境）。
+    """
+
+    def __init__(self, max_workers=2, max_pending=32, acquire_timeout=2.0):
+        self.max_workers = max_workers
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        # 进程 fork 之后（如 gunicorn preload）需要重建进程池
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = new_hash_pool(self.max_workers)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _discard_pool(self, pool):
+        # 子进程被杀（如 OOM）后进程池已损坏，之后每次 submit 都会失败，丢弃后由 _get_pool 重建
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        pool = self._get_pool()
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            return self._get_pool().submit(fn, *args)
+
+    def submit(self, fn, *args):
+        """提交任务并返回 concurrent.futures.Future"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            password_hash_busy.inc()
+            raise PasswordHashBusy("服务繁忙，请稍后重试")
+        try:
+            future = self._submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        with password_hash_duration.time(op=fn.__name__.lstrip('_')):
+            if not self.max_workers:
+                return fn(*args)
+            try:
+                return self.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # 执行中的子进程被杀：哈希无副作用，在重建的进程池上重试一次
+                return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        with password_hash_duration.time(op=fn.__name__.lstrip('_')):
+            if not self.max_workers:
+                return fn(*args)
+            # acquire 可能阻塞，放到线程里等待槽位
+            future = await asyncio.to_thread(self.submit, fn, *args)
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                future = await asyncio.to_thread(self.submit, fn, *args)
+                return await asyncio.wrap_future(future)
+
+    def check_password(self, raw_password, encoded):
+        """返回 (是否正确, 是否需要按新参数重新哈希)"""
+        return self.run(_check_password, raw_password, encoded)
+
+    def make_password(self, raw_password):
+        return self.run(_make_password, raw_password)
+
+    async def acheck_password(self, raw_password, encoded):
+        return await self.arun(_check_password, raw_password, encoded)
+
+    async def amake_password(self, raw_password):
+        return await self.arun(_make_password, raw_password)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_hash_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                config = getattr(settings, 'PASSWORD_HASH_POOL', {})
+                _executor = PasswordHashExecutor(
+                    max_workers=config.get('MAX_WORKERS', 2),
+                    max_pending=config.get('MAX_PENDING', 32),
+                    acquire_timeout=config.get('ACQUIRE_TIMEOUT', 2.0),
+                )
+    return _executor
+
+
+def verify_password(user, raw_password):
+    """校验密码；哈希参数变更（迭代次数/算法）时透明地重新哈希并保存"""
+    if raw_password is None or not user.has_usable_password():
+        return False
+    executor = get_hash_executor()
+    is_correct, must_update = executor.check_password(raw_password, user.password)
+    if is_correct and must_update:
+        user.password = executor.make_password(raw_password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+async def averify_password(user, raw_password):
+    if raw_password is None or not user.has_usable_password():
+        return False
+    executor = get_hash_executor()
+    is_correct, must_update = await executor.acheck_password(raw_password, user.password)
+    if is_correct and must_update:
+        user.password = await executor.amake_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return is_correct
@@ -0,0 +1,38 @@
+# infrastructure/identifiers.py
+import hashlib
+
+from django.core.cache import cache
+
+from account.domain.identifiers import identifiers_for
+from account.infrastructure.orm_models import UserIdentifier
+
+LOGIN_MISS_CACHE_KEY = 'login_miss:{}'  # 未知账号的负缓存
+LOGIN_MISS_CACHE_TIMEOUT = 60
+
+
+def login_miss_key(system_code, identifier_type, value):
+    digest = hashlib.md5(f'{system_code}:{identifier_type}:{value}'.encode()).hexdigest()
+    return LOGIN_MISS_CACHE_KEY.format(digest)
+
+
+def sync_user_identifiers(user):
+    """让 account_user_identifier 与 User 的 email/phone/username 保持一致"""
+    wanted = identifiers_for(user.username, user.email, user.phone)
+    existing = {
+        (row.identifier_type, row.normalized_value): row
+        for row in UserIdentifier.objects.filter(user_id=user.pk)
+    }
+    stale = [row.pk for key, row in existing.items() if key not in wanted or row.system_id != user.system_id]
+    if stale:
+        UserIdentifier.objects.filter(pk__in=stale).delete()
+
+    missing = [key for key in wanted if key not in existing or existing[key].pk in stale]
+    # 用户名在系统内可能重复：已被占用时保留先注册的用户
+    UserIdentifier.objects.bulk_create([
+        UserIdentifier(system_id=user.system_id, identifier_type=identifier_type, normalized_value=value, user_id=user.pk)
+        for identifier_type, value in missing
+    ], ignore_conflicts=True)
+
+    if missing and user.system_id:
+        system_code = user.system.code
+        cache.delete_many([login_miss_key(system_code, identifier_type, value) for identifier_type, value in missing])
@@ -0,0 +1,113 @@
+# infrastructure/jwks.py
+import json
+import time
+from datetime import datetime
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from jwt.algorithms import RSAAlgorithm
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+JWT_ALGORITHM = 'RS256'
+
+
+def public_pem(private_pem):
+    private_key = serialization.load_pem_private_key(private_pem.encode(), password=None)
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    RS256 密钥环：用当前密钥签名并在头部写入 kid；验签时按 kid 选择公钥，
+    轮换期间旧密钥签发的 token 仍可验证。
+    legacy_backend：从 HS256 切换过来的过渡期内，验证切换前（iat <= legacy_issued_before）签发的无 kid token，
+    legacy_until 之后（切换时间 + refresh token 有效期，旧 token 已全部过期）不再接受。
+    """
+
+    def __init__(self, keys, active_kid, legacy_backend=None, legacy_issued_before=None, legacy_until=None,
+                 **kwargs):
+        super().__init__(JWT_ALGORITHM, signing_key=keys[active_kid], verifying_key=public_pem(keys[active_kid]),
+                         **kwargs)
+        self.active_kid = active_kid
+        self.legacy_backend = legacy_backend
+        self.legacy_issued_before = legacy_issued_before
+        self.legacy_until = legacy_until
+        self.public_keys = {kid: public_pem(private_pem) for kid, private_pem in keys.items()}
+        self._verifiers = {
+            kid: TokenBackend(JWT_ALGORITHM, verifying_key=pem, **kwargs) for kid, pem in self.public_keys.items()
+        }
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+        return jwt.encode(jwt_payload, self.prepared_signing_key, algorithm=self.algorithm,
+                          headers={"kid": self.active_kid}, json_encoder=self.json_encoder)
+
+    def decode(self, token, verify=True):
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError("Token is invalid") from e
+        if kid is None and self.legacy_backend is not None and time.time() < self.legacy_until:
+            return self._decode_legacy(token, verify)
+        verifier = self._verifiers.get(kid)
+        if verifier is None:
+            raise TokenBackendError("Token is invalid")
+        return verifier.decode(token, verify=verify)
+
+    def _decode_legacy(self, token, verify):
+        payload = self.legacy_backend.decode(token, verify=verify)
+        # 切换之后仍用 HS256 密钥签出的 token 不接受
+        if verify and payload.get('iat', float('inf')) > self.legacy_issued_before:
+            raise TokenBackendError("Token is invalid")
+        return payload
+
+    def jwks(self):
+        keys = []
+        for kid, pem in self.public_keys.items():
+            jwk = json.loads(RSAAlgorithm.to_jwk(serialization.load_pem_public_key(pem.encode())))
+            jwk.update({"kid": kid, "alg": JWT_ALGORITHM, "use": "sig"})
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+_token_backend = None
+
+
+def legacy_options():
+    """JWT_RS256_SINCE 为启用 RS256 的时间，之前签发的 HS256 token 在 refresh token 有效期内继续有效；未配置时不接受"""
+    since = getattr(settings, 'JWT_RS256_SINCE', None)
+    if not since:
+        return {}
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.state import token_backend
+
+    issued_before = datetime.fromisoformat(since).timestamp()
+    return {
+        'legacy_backend': token_backend,
+        'legacy_issued_before': issued_before,
+        'legacy_until': issued_before + api_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
+    }
+
+
+def get_token_backend():
+    """配置了 JWT_SIGNING_KEYS 时使用 RS256 密钥环，否则回退到 SIMPLE_JWT 默认（HS256）"""
+    global _token_backend
+    if _token_backend is None:
+        keys = getattr(settings, 'JWT_SIGNING_KEYS', {})
+        active_kid = getattr(settings, 'JWT_ACTIVE_KID', None)
+        if active_kid in keys:
+            simple_jwt = getattr(settings, 'SIMPLE_JWT', {})
+            _token_backend = KeyRingTokenBackend(keys, active_kid, leeway=simple_jwt.get('LEEWAY', 0),
+                                                 **legacy_options())
+        else:
+            from rest_framework_simplejwt.state import token_backend
+            _token_backend = token_backend
+    return _token_backend
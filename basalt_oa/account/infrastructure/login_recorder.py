@@ -0,0 +1,218 @@
+# infrastructure/login_recorder.py
+import atexit
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Value, When
+from django_redis import get_redis_connection
+
+logger = logging.getLogger('account')
+
+LOGIN_PENDING_KEY = 'login_pending'  # hash：用户 ID -> 最近登录时间戳，等待批量写回 last_login
+LOGIN_PROCESSING_KEY = 'login_pending:processing:{}'  # 某次 flush 取走、尚未提交的批次
+LOGIN_PROCESSING_INDEX = 'login_pending:processing'  # zset：批次 key -> 取走时间（Redis TIME，秒）
+
+# 把待写回的登录时间原子地改名为本次 flush 的批次 key，多个进程同时 flush 时每条记录只被一个进程取走；
+# 批次在 UPDATE 提交后才删除，进程在两者之间被杀掉时由 RECOVER_PROCESSING_LUA 放回
+CLAIM_PENDING_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {}
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('ZADD', KEYS[3], redis.call('TIME')[1], KEYS[2])
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# 超过租期仍未删除的批次（取走它的进程已退出）合并回待写回 hash，保留较新的登录时间
+RECOVER_PROCESSING_LUA = """
+local cutoff = tonumber(redis.call('TIME')[1]) - tonumber(ARGV[1])
+local stale = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', cutoff)
+for _, key in ipairs(stale) do
+    local entries = redis.call('HGETALL', key)
+    for i = 1, #entries, 2 do
+        local current = redis.call('HGET', KEYS[1], entries[i])
+        if not current or tonumber(current) < tonumber(entries[i + 1]) then
+            redis.call('HSET', KEYS[1], entries[i], entries[i + 1])
+        end
+    end
+    redis.call('DEL', key)
+    redis.call('ZREM', KEYS[2], key)
+end
+return #stale
+"""
+
+# 写回失败时放回，已有更新的登录时间则保留较新的值
+RESTORE_PENDING_LUA = """
+for i = 1, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if not current or tonumber(current) < tonumber(ARGV[i + 1]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+return 1
+"""
+
+
+class LoginRecorder:
+    """
+    last_login 写后合并（write-behind）：登录时只记录时间戳，后台每 max_staleness 秒批量写回一次，
+    每批一条 UPDATE ... CASE，避免登录高峰时逐行更新 account_user。
+    backend: 'redis'（多进程共享，进程崩溃不丢数据）/ 'memory'（进程内，退出时写回）/ 'sync'（逐次直接更新）
+    redis 后端每次 flush 把待写回数据改名为独立的批次 key，UPDATE 提交后才删除；
+    取走批次的进程崩溃时，批次超过 processing_timeout 秒后由任一进程的下次 flush 放回。
+    """
+    redis_alias = 'default'
+    redis_client = None  # 可注入本地 Redis 替身（如 fakeredis）
+
+    def __init__(self, backend='redis', max_staleness=30, batch_size=500, processing_timeout=300):
+        self.backend = backend
+        self.max_staleness = max_staleness
+        self.batch_size = batch_size
+        self.processing_timeout = processing_timeout  # 远大于一次批量写回的耗时
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stopped = threading.Event()
+
+    def get_redis(self):
+        return self.redis_client or get_redis_connection(self.redis_alias)
+
+    def record(self, user_id, timestamp=None):
+        timestamp = timestamp or time.time()
+        if self.backend == 'sync':
+            self.write({str(user_id): timestamp})
+            return
+        if self.backend == 'redis':
+            try:
+                self.get_redis().hset(LOGIN_PENDING_KEY, str(user_id), timestamp)
+            except Exception as e:
+                # Redis 不可用时退化为进程内缓冲，登录不受影响
+                logger.warning(f"[LoginRecorder] Redis unavailable, buffer in memory: {e}")
+                self._buffer(user_id, timestamp)
+        else:
+            self._buffer(user_id, timestamp)
+        self._ensure_worker()
+
+    def _buffer(self, user_id, timestamp):
+        with self._lock:
+            self._pending[str(user_id)] = max(timestamp, self._pending.get(str(user_id), 0))
+
+    def flush(self):
+        """写回所有待处理的登录时间，返回写回条数"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        processing_key = None
+        if self.backend == 'redis':
+            try:
+                processing_key, entries = self._claim()
+            except Exception as e:
+                logger.warning(f"[LoginRecorder] Redis unavailable, skip shared buffer: {e}")
+                entries = []
+            for key, value in zip(entries[::2], entries[1::2]):
+                key = key.decode() if isinstance(key, bytes) else key
+                pending[key] = max(float(value), pending.get(key, 0))
+        if not pending:
+            return 0
+
+        try:
+            self.write(pending)
+        except Exception:
+            self._restore(pending)
+            self._release(processing_key)
+            raise
+        self._release(processing_key)
+        return len(pending)
+
+    def _claim(self):
+        """放回过期批次后取走当前待写回数据，返回 (批次 key, [用户 ID, 时间戳, ...])"""
+        client = self.get_redis()
+        client.register_script(RECOVER_PROCESSING_LUA)(
+            keys=[LOGIN_PENDING_KEY, LOGIN_PROCESSING_INDEX], args=[self.processing_timeout]
+        )
+        processing_key = LOGIN_PROCESSING_KEY.format(uuid.uuid4().hex)
+        entries = client.register_script(CLAIM_PENDING_LUA)(
+            keys=[LOGIN_PENDING_KEY, processing_key, LOGIN_PROCESSING_INDEX]
+        )
+        return (processing_key if entries else None), entries
+
+    def _release(self, processing_key):
+        """批次已写回数据库（或已放回待写回 hash）后删除；删除失败时由租期到期后的恢复兜底（重复写回同一时间无副作用）"""
+        if processing_key is None:
+            return
+        try:
+            pipe = self.get_redis().pipeline()
+            pipe.delete(processing_key)
+            pipe.zrem(LOGIN_PROCESSING_INDEX, processing_key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[LoginRecorder] release processing batch failed: {e}")
+
+    def write(self, pending):
+        from account.infrastructure.orm_models import User
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            whens = [When(pk=user_id, then=Value(datetime.fromtimestamp(ts, tz=timezone.utc))) for user_id, ts in batch]
+            User.objects.filter(pk__in=[user_id for user_id, _ in batch]).update(
+                last_login=Case(*whens, output_field=DateTimeField())
+            )
+
+    def _restore(self, pending):
+        if self.backend == 'redis':
+            try:
+                args = [item for pair in pending.items() for item in pair]
+                self.get_redis().register_script(RESTORE_PENDING_LUA)(keys=[LOGIN_PENDING_KEY], args=args)
+                return
+            except Exception as e:
+                logger.warning(f"[LoginRecorder] restore to Redis failed: {e}")
+        for user_id, timestamp in pending.items():
+            self._buffer(user_id, timestamp)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='login-recorder', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.max_staleness):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"[LoginRecorder] flush failed: {e}")
+
+    def shutdown(self):
+        """进程退出时写回剩余数据"""
+        self._stopped.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"[LoginRecorder] flush on shutdown failed: {e}")
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_login_recorder():
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                config = getattr(settings, 'LOGIN_WRITE_BEHIND', {})
+                _recorder = LoginRecorder(
+                    backend=config.get('BACKEND', 'redis'),
+                    max_staleness=config.get('MAX_STALENESS', 30),
+                    batch_size=config.get('BATCH_SIZE', 500),
+                    processing_timeout=config.get('PROCESSING_TIMEOUT', 300),
+                )
+                atexit.register(_recorder.shutdown)
+    return _recorder
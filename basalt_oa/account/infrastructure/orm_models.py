@@ -1,10 +1,13 @@
 # infrastructure/orm_models.py
 import logging
-import re
 from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager, Permission
-from utensil.models import Base
+from account.domain.identifiers import classify_account
+from account.infrastructure.hashing import get_hash_executor
+from account.infrastructure.permission_cache import get_user_permissions
+from middlewares.metrics.registry import record_cache
+from utensil.models import Base, SoftDeleteManager
 
 logger = logging.getLogger('account')
 
@@ -12,12 +15,14 @@ logger = logging.getLogger('account')
 # =====================
 # 用户管理器
 # =====================
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager, SoftDeleteManager):
     def create_user(self, phone=None, email=None, password=None, **extra_fields):
         if not phone and not email:
             raise ValueError('必须提供手机号或邮箱')
         user = self.model(phone=phone, email=email, **extra_fields)
-        user.set_password(password)
+        # ✅ 哈希放到进程池执行，不占用请求线程
+        user.password = get_hash_executor().make_password(password)
+        user._password = password
         user.save()
         return user
 
@@ -27,41 +32,92 @@ class UserManager(BaseUserManager):
         return self.create_user(phone, email, password, **extra_fields)
 
     def get_by_account(self, account: str, system_code: str):
-        cache_key = f'system:{system_code}'
-        system = cache.get(cache_key)
-        if system is None:
-            try:
-                system = System.objects.get(code=system_code)
-                cache.set(cache_key, system.uuid, timeout=3600)
-            except System.DoesNotExist:
-                logger.warning(f"[Login] System not found: {system_code}")
-                raise ValueError(f"[Login] 未获取到系统: {system_code}")
-            except Exception as e:
-                logger.warning(f"[Login] Exception: {e}")
-                raise ValueError(f"[Login] 报错信息: {str(e)}")
-
-        query = models.Q(system_id=system)
-        if self._is_valid_email(account):
-            query &= models.Q(email__iexact=account)
-        elif self._is_valid_phone(account):
-            query &= models.Q(phone=account)
-        else:
-            query &= models.Q(username=account)
+        # ✅ 经 account_user_identifier 唯一索引一次查询拿到用户与系统
+        from account.infrastructure.identifiers import login_miss_key, LOGIN_MISS_CACHE_TIMEOUT
 
-        try:
-            return self.get(query)
-        except self.model.DoesNotExist:
-            logger.info(f"[Login] User not found for {account} in system {system_code}")
+        identifier_type, value = classify_account(account)
+        miss_key = login_miss_key(system_code, identifier_type, value)
+        if cache.get(miss_key):
+            logger.info(f"[Login] User not found (cached) for {account} in system {system_code}")
+            return None
+
+        identifier = (UserIdentifier.objects
+                      .select_related('user', 'system')
+                      .filter(system__code=system_code, identifier_type=identifier_type, normalized_value=value)
+                      .first())
+        if identifier is not None:
+            user = identifier.user
+            if user.is_deleted:
+                # 已软删除的用户不写未命中缓存，恢复后可立即登录
+                return None
+            user.system = identifier.system
+            return user
+
+        self._ensure_system(system_code)
+        logger.info(f"[Login] User not found for {account} in system {system_code}")
+        cache.set(miss_key, 1, timeout=LOGIN_MISS_CACHE_TIMEOUT)
+        return None
+
+    async def aget_by_account(self, account: str, system_code: str):
+        """get_by_account 的异步版本"""
+        from account.infrastructure.identifiers import login_miss_key, LOGIN_MISS_CACHE_TIMEOUT
+
+        identifier_type, value = classify_account(account)
+        miss_key = login_miss_key(system_code, identifier_type, value)
+        if await cache.aget(miss_key):
+            logger.info(f"[Login] User not found (cached) for {account} in system {system_code}")
             return None
-        except self.model.MultipleObjectsReturned:
-            logger.warning(f"[Login] Multiple users found for account={account}, system={system_code}")
-            return self.filter(query).order_by('id').first()
 
-    def _is_valid_email(self, account: str) -> bool:
-        return bool(re.match(r"[^@]+@[^@]+\.[^@]+", account))
+        identifier = await (UserIdentifier.objects
+                            .select_related('user', 'system')
+                            .filter(system__code=system_code, identifier_type=identifier_type, normalized_value=value)
+                            .afirst())
+        if identifier is not None:
+            user = identifier.user
+            if user.is_deleted:
+                # 已软删除的用户不写未命中缓存，恢复后可立即登录
+                return None
+            user.system = identifier.system
+            return user
+
+        await self._aensure_system(system_code)
+        logger.info(f"[Login] User not found for {account} in system {system_code}")
+        await cache.aset(miss_key, 1, timeout=LOGIN_MISS_CACHE_TIMEOUT)
+        return None
 
-    def _is_valid_phone(self, account: str) -> bool:
-        return bool(re.match(r"^1\d{10}$", account))
+    @staticmethod
+    async def _aensure_system(system_code: str):
+        cache_key = f'system:{system_code}'
+        cached = await cache.aget(cache_key) is not None
+        record_cache('system', cached)
+        if cached:
+            return
+        try:
+            system = await System.objects.aget(code=system_code)
+            await cache.aset(cache_key, system.uuid, timeout=3600)
+        except System.DoesNotExist:
+            logger.warning(f"[Login] System not found: {system_code}")
+            raise ValueError(f"[Login] 未获取到系统: {system_code}")
+        except Exception as e:
+            logger.warning(f"[Login] Exception: {e}")
+            raise ValueError(f"[Login] 报错信息: {str(e)}")
+
+    @staticmethod
+    def _ensure_system(system_code: str):
+        cache_key = f'system:{system_code}'
+        cached = cache.get(cache_key) is not None
+        record_cache('system', cached)
+        if cached:
+            return
+        try:
+            system = System.objects.get(code=system_code)
+            cache.set(cache_key, system.uuid, timeout=3600)
+        except System.DoesNotExist:
+            logger.warning(f"[Login] System not found: {system_code}")
+            raise ValueError(f"[Login] 未获取到系统: {system_code}")
+        except Exception as e:
+            logger.warning(f"[Login] Exception: {e}")
+            raise ValueError(f"[Login] 报错信息: {str(e)}")
 
 
 # =====================
@@ -79,21 +135,34 @@ class User(AbstractBaseUser, PermissionsMixin, Base):
     USERNAME_FIELD = 'phone'
     REQUIRED_FIELDS = ['email']
 
-    objects = UserManager()
+    objects = UserManager(alive_only=True)
+    all_objects = UserManager()
 
-    class Meta:
+    class Meta(Base.Meta):
         db_table = 'account_user'
         verbose_name = '用户'
         verbose_name_plural = '用户'
+        indexes = [
+            # 列表 / 游标分页：is_deleted=False [AND system_id=?] ORDER BY created_at DESC, uuid DESC
+            models.Index(fields=['is_deleted', '-created_at', '-uuid'], name='account_user_alive_created_idx'),
+            models.Index(fields=['is_deleted', 'system', '-created_at', '-uuid'], name='account_user_alive_system_idx'),
+        ]
 
     def __str__(self):
         return self.username or self.email or self.phone or str(self.pk)
 
     @property
     def all_permissions(self):
-        perms = set(self.user_permissions.values_list('codename', flat=True))
+        # ✅ 有效权限走 Redis 缓存，由 account.infrastructure.signals 负责失效
+        return get_user_permissions(self.pk)
+
+    @property
+    def prefetched_permissions(self):
+        # ✅ 基于已 prefetch 的 user_permissions / roles__permissions 在内存中聚合，不再产生查询
+        # roles 需以 Role.objects 预取，已软删除的角色不计入
+        perms = {perm.codename for perm in self.user_permissions.all()}
         for role in self.roles.all():
-            perms.update(role.permissions.values_list('codename', flat=True))
+            perms.update(perm.codename for perm in role.permissions.all())
         return list(perms)
 
     def has_perm(self, perm, obj=None):
@@ -103,6 +172,49 @@ class User(AbstractBaseUser, PermissionsMixin, Base):
         return self.is_superuser or any(perm.startswith(app_label + ".") for perm in self.all_permissions)
 
 
+# =====================
+# 用户检索 Token（trigram）
+# =====================
+class UserSearchToken(models.Model):
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='search_tokens')
+    system = models.ForeignKey('System', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    field = models.CharField(max_length=10, help_text="字段名: username/email/phone")
+    token = models.CharField(max_length=3, help_text="小写 trigram")
+
+    class Meta:
+        db_table = 'account_user_search_token'
+        verbose_name = '用户检索Token'
+        verbose_name_plural = '用户检索Token'
+        unique_together = [('user', 'field', 'token')]
+        indexes = [
+            models.Index(fields=['field', 'token', 'system', 'user'], name='account_search_token_idx'),
+        ]
+
+
+# =====================
+# 登录标识（email/phone/username 统一索引）
+# =====================
+class UserIdentifier(models.Model):
+    TYPE_EMAIL = 'email'
+    TYPE_PHONE = 'phone'
+    TYPE_USERNAME = 'username'
+    TYPE_CHOICES = ((TYPE_EMAIL, '邮箱'), (TYPE_PHONE, '手机号'), (TYPE_USERNAME, '用户名'))
+
+    system = models.ForeignKey('System', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    identifier_type = models.CharField(max_length=10, choices=TYPE_CHOICES, help_text="标识类型")
+    normalized_value = models.CharField(max_length=254, help_text="归一化后的标识值")
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='identifiers')
+
+    class Meta:
+        db_table = 'account_user_identifier'
+        verbose_name = '登录标识'
+        verbose_name_plural = '登录标识'
+        constraints = [
+            models.UniqueConstraint(fields=['system', 'identifier_type', 'normalized_value'],
+                                    name='account_identifier_unique'),
+        ]
+
+
 # =====================
 # 系统模型
 # =====================
@@ -118,7 +230,7 @@ class System(Base):
         help_text="创建人"
     )
 
-    class Meta:
+    class Meta(Base.Meta):
         db_table = 'account_system'
         verbose_name = '系统'
         verbose_name_plural = '系统'
@@ -143,7 +255,7 @@ class Role(Base):
         help_text="创建人"
     )
 
-    class Meta:
+    class Meta(Base.Meta):
         db_table = 'account_role'
         verbose_name = '角色'
         verbose_name_plural = '角色'
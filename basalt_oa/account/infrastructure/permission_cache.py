@@ -0,0 +1,84 @@
+# infrastructure/permission_cache.py
+import time
+
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import transaction
+
+from account.infrastructure.user_events import publisher
+from middlewares.metrics.registry import record_cache
+
+PERMS_CACHE_KEY = 'user_perms:{}'  # 用户有效权限集合 {"v": 版本号, "perms": [...]}
+PERMS_VERSION_KEY = 'user_perms_ver:{}'  # 用户权限版本号，失效时写入新版本
+PERMS_CACHE_TIMEOUT = 3600
+# 远长于权限缓存、access token 有效期与下游记录变更版本号的时长（1 天），过期后版本号回到 0 不会误判；已删除用户的 key 随之过期
+PERMS_VERSION_TIMEOUT = 30 * 86400
+
+
+def get_user_permissions(user_id):
+    """读取用户有效权限：命中时只有一次 MGET，未命中时一条联表查询"""
+    perms_key, version_key = PERMS_CACHE_KEY.format(user_id), PERMS_VERSION_KEY.format(user_id)
+    cached = cache.get_many([perms_key, version_key])
+    version = cached.get(version_key) or 0
+    entry = cached.get(perms_key)
+    hit = bool(entry) and entry.get('v') == version
+    record_cache('user_perms', hit)
+    if hit:
+        return list(entry['perms'])
+
+    perms = load_user_permissions(user_id)
+    cache.set(perms_key, {'v': version, 'perms': perms}, timeout=PERMS_CACHE_TIMEOUT)
+    return perms
+
+
+async def aget_user_permissions(user_id):
+    """get_user_permissions 的异步版本（ASGI 视图使用）"""
+    perms_key, version_key = PERMS_CACHE_KEY.format(user_id), PERMS_VERSION_KEY.format(user_id)
+    cached = await cache.aget_many([perms_key, version_key])
+    version = cached.get(version_key) or 0
+    entry = cached.get(perms_key)
+    hit = bool(entry) and entry.get('v') == version
+    record_cache('user_perms', hit)
+    if hit:
+        return list(entry['perms'])
+
+    perms = [codename async for codename in _user_permissions_queryset(user_id)]
+    await cache.aset(perms_key, {'v': version, 'perms': perms}, timeout=PERMS_CACHE_TIMEOUT)
+    return perms
+
+
+def get_user_permission_version(user_id):
+    """用户当前权限版本号（从未变更过为 0），与推送给下游的事件版本号可直接比较"""
+    return cache.get(PERMS_VERSION_KEY.format(user_id)) or 0
+
+
+async def aget_user_permission_version(user_id):
+    return await cache.aget(PERMS_VERSION_KEY.format(user_id)) or 0
+
+
+def load_user_permissions(user_id):
+    """直接从数据库计算：用户直授权限 ∪ 所属角色权限"""
+    return list(_user_permissions_queryset(user_id))
+
+
+def _user_permissions_queryset(user_id):
+    # ✅ 直授与角色两路各自从用户 ID 的中间表索引出发再 UNION 去重；OR 联表会退化为扫描 auth_permission 全表
+    direct = Permission.objects.filter(user__uuid=user_id)
+    via_roles = Permission.objects.filter(custom_roles__users__uuid=user_id, custom_roles__is_deleted=False)
+    return (direct.order_by().values_list('codename', flat=True)
+            .union(via_roles.order_by().values_list('codename', flat=True)))
+
+
+def invalidate_user_permissions(user_ids):
+    """写入新的版本号，使旧缓存失效并通知下游服务；在事务提交后执行，避免并发读回填旧数据"""
+    user_ids = {str(user_id) for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+
+    def _bump():
+        version = time.time_ns()
+        cache.set_many({PERMS_VERSION_KEY.format(user_id): version for user_id in user_ids},
+                       timeout=PERMS_VERSION_TIMEOUT)
+        publisher.publish_permissions_changed(user_ids, version)
+
+    transaction.on_commit(_bump)
@@ -0,0 +1,40 @@
+# infrastructure/permission_dictionary.py
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+from account.domain.permission_bitmap import dictionary_version
+
+PERMISSION_DICTIONARY_KEY = 'perm_dict'
+PERMISSION_DICTIONARY_VERSION_KEY = 'perm_dict_ver:{}'  # 按版本保留的 codenames，已签发 token 的 pv 在有效期内仍可解码
+PERMISSION_DICTIONARY_TIMEOUT = 3600
+
+
+def _version_timeout():
+    # 当前版本每次重建时续期；版本被替换后至少再保留一个 access token 有效期
+    return int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + PERMISSION_DICTIONARY_TIMEOUT
+
+
+def get_permission_dictionary(version=None):
+    """
+    已发布的权限 codename 字典 {"version": ..., "codenames": [...]}，下标即位图中的位。
+    指定 version 时返回该版本（含仍在保留期内的历史版本），不存在返回 None。
+    """
+    dictionary = cache.get(PERMISSION_DICTIONARY_KEY)
+    if dictionary is None:
+        # 按主键排序：新增权限追加在末尾，已有位置保持不变
+        codenames = list(dict.fromkeys(Permission.objects.order_by('pk').values_list('codename', flat=True)))
+        dictionary = {"version": dictionary_version(codenames), "codenames": codenames}
+        cache.set(PERMISSION_DICTIONARY_VERSION_KEY.format(dictionary['version']), codenames,
+                  timeout=_version_timeout())
+        cache.set(PERMISSION_DICTIONARY_KEY, dictionary, timeout=PERMISSION_DICTIONARY_TIMEOUT)
+    if version is None or version == dictionary['version']:
+        return dictionary
+
+    codenames = cache.get(PERMISSION_DICTIONARY_VERSION_KEY.format(version))
+    return {"version": version, "codenames": codenames} if codenames is not None else None
+
+
+def invalidate_permission_dictionary():
+    """权限增删后调用；bulk_create / 原生 SQL 等不触发模型信号的写入需显式调用"""
+    cache.delete(PERMISSION_DICTIONARY_KEY)
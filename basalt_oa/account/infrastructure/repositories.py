@@ -1,16 +1,37 @@
 # infrastructure/repositories.py
+from dataclasses import asdict
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission
+from django.db.models import Prefetch, Q
+from django.utils import timezone
 
 from account.domain.entities import UserInfoEntity, UserEntity
 from account.domain.repositories import IUserRepository
-from account.infrastructure.orm_models import User, System
+from account.infrastructure.hashing import verify_password, averify_password
+from account.infrastructure.login_recorder import get_login_recorder
+from account.infrastructure.orm_models import User, System, Role
+from account.infrastructure.permission_cache import aget_user_permissions
+from account.infrastructure.search import filter_contains
+from account.infrastructure.user_cache import get_cached_user_infos, set_cached_user_infos
+from utensil.streaming import stream_queryset
 
 
 class DjangoUserRepository(IUserRepository):
     def get_by_account(self, account, system_code):
         return User.objects.get_by_account(account, system_code)
 
+    def check_password(self, user, password):  # noqa
+        return verify_password(user, password)
+
+    def record_login(self, user):  # noqa
+        # ✅ last_login 由 LoginRecorder 批量写回，登录请求内不更新 account_user
+        user.last_login = timezone.now()
+        get_login_recorder().record(user.pk, user.last_login.timestamp())
+
     def exists_by_email_or_phone(self, email, phone):  # noqa
-        return User.objects.filter(email=email).exists() or User.objects.filter(phone=phone).exists()
+        # email / phone 的唯一约束包含已软删除的用户
+        return User.all_objects.filter(email=email).exists() or User.all_objects.filter(phone=phone).exists()
 
     def get_by_id(self, user_id):  # noqa
         try:
@@ -22,12 +43,41 @@ class DjangoUserRepository(IUserRepository):
                 email=user.email,
                 phone=user.phone,
                 system_code=user.system.code if user.system else None,
-                roles=[r.name for r in user.roles.all()],
+                roles=[r.name for r in user.roles.alive()],
                 permissions=user.all_permissions
             )
         except User.DoesNotExist:
             return None
 
+    def get_many_by_ids(self, uuids=(), unified_uuids=()):
+        """批量获取用户信息：先查单用户缓存，未命中的用户固定 4 条查询（用户+系统、角色、角色权限、直授权限）"""
+        hits, missing, unknown_unified = get_cached_user_infos(uuids, unified_uuids)
+        if missing or unknown_unified:
+            users = (User.objects
+                     .filter(Q(uuid__in=list(missing)) | Q(unified_uuid__in=unknown_unified))
+                     .select_related('system'))
+            users = self._with_includes(users, ('roles', 'permissions'))
+            loaded = [asdict(self._to_info_entity(user)) for user in users]
+            for info in loaded:
+                info.pop('django_user')
+            set_cached_user_infos(loaded, missing)
+            hits.update((info['uuid'], info) for info in loaded)
+        return [UserInfoEntity(**info) for info in hits.values()]
+
+    @staticmethod
+    def _to_info_entity(user):
+        # user 需已 prefetch roles（Role.objects，不含已软删除的角色）/ roles__permissions / user_permissions
+        return UserInfoEntity(
+            uuid=user.uuid,
+            unified_uuid=user.unified_uuid,
+            username=user.username,
+            email=user.email,
+            phone=user.phone,
+            system_code=user.system.code if user.system else None,
+            roles=[r.name for r in user.roles.all()],
+            permissions=user.prefetched_permissions
+        )
+
     def get_by_system_id(self, user_id):
         user = User.objects.get(pk=user_id)
         return UserEntity(
@@ -37,26 +87,28 @@ class DjangoUserRepository(IUserRepository):
             email=user.email,
             phone=user.phone,
             system_code=user.system.code if user.system else None,
-            roles=[r.name for r in user.roles.all()],
+            roles=[r.name for r in user.roles.alive()],
             permissions=user.all_permissions,
             is_active=user.is_active,
         )
 
     def create(self, username, email, phone, password, system_code):  # noqa
-        system, _ = System.objects.get_or_create(code=system_code, defaults={"name": "Basalt"})
+        system, _ = System.all_objects.get_or_create(code=system_code, defaults={"name": "Basalt"})
         return User.objects.create_user(username=username, email=email, phone=phone, password=password, system=system)
 
     def filter_user(self, system=None, username=None, email=None, phone=None,  # noqa
-                    is_staff=None, is_active=None, is_superuser=None, role_id=None):
-        queryset = User.objects.filter(is_deleted=False).order_by('-created_at')
+                    is_staff=None, is_active=None, is_superuser=None, role_id=None, include=()):
+        # 默认管理器已限定 is_deleted=False，命中 account_user_alive_* 联合索引
+        queryset = User.objects.order_by('-created_at')
         if system:
             queryset = queryset.filter(system__uuid=system)
+        # ✅ 子串检索走 trigram 索引表，并限定在当前系统内
         if username:
-            queryset = queryset.filter(username__contains=username)
+            queryset = filter_contains(queryset, 'username', username, system)
         if email:
-            queryset = queryset.filter(email__contains=email)
+            queryset = filter_contains(queryset, 'email', email, system)
         if phone:
-            queryset = queryset.filter(phone__contains=phone)
+            queryset = filter_contains(queryset, 'phone', phone, system)
         if is_staff:
             queryset = queryset.filter(is_staff=is_staff)
         if is_active:
@@ -64,5 +116,49 @@ class DjangoUserRepository(IUserRepository):
         if is_superuser:
             queryset = queryset.filter(is_superuser=is_superuser)
         if role_id:
-            queryset = queryset.filter(roles__id=role_id)
-        return queryset
+            queryset = queryset.filter(roles=role_id)
+        return self._with_includes(queryset, include)
+
+    def stream_users(self, fields, chunk_size=2000, **filters):
+        """按 filter_user 的条件逐行产出 fields 对应的元组：单条查询、服务端游标、内存恒定"""
+        queryset = self.filter_user(**filters).values_list(*fields)
+        return stream_queryset(queryset, chunk_size=chunk_size)
+
+    @staticmethod
+    def _with_includes(queryset, include):
+        """按 include 预取关联数据，每页查询数固定，与分页大小无关"""
+        lookups = []
+        if 'roles' in include or 'permissions' in include:
+            lookups.append(Prefetch('roles', queryset=Role.objects.only('uuid', 'name')))
+        if 'permissions' in include:
+            perm_queryset = Permission.objects.only('id', 'codename')
+            lookups.append(Prefetch('roles__permissions', queryset=perm_queryset))
+            lookups.append(Prefetch('user_permissions', queryset=perm_queryset))
+        return queryset.prefetch_related(*lookups) if lookups else queryset
+
+    # ---------------- 异步版本（ASGI 视图使用 Django async ORM / async cache） ----------------
+    async def aget_by_account(self, account, system_code):
+        return await User.objects.aget_by_account(account, system_code)
+
+    async def acheck_password(self, user, password):  # noqa
+        return await averify_password(user, password)
+
+    async def arecord_login(self, user):
+        await sync_to_async(self.record_login)(user)
+
+    async def aget_by_id(self, user_id):  # noqa
+        try:
+            user = await (User.objects.select_related('system')
+                          .prefetch_related(Prefetch('roles', queryset=Role.objects)).aget(pk=user_id))
+        except User.DoesNotExist:
+            return None
+        return UserInfoEntity(
+            uuid=user.uuid,
+            unified_uuid=user.unified_uuid,
+            username=user.username,
+            email=user.email,
+            phone=user.phone,
+            system_code=user.system.code if user.system else None,
+            roles=[r.name for r in user.roles.all()],
+            permissions=await aget_user_permissions(user.pk)
+        )
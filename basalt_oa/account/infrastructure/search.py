@@ -0,0 +1,35 @@
+# infrastructure/search.py
+from django.db.models import Count
+
+from account.domain.search import SEARCH_FIELDS, trigrams
+from account.infrastructure.orm_models import UserSearchToken
+
+
+def index_user(user):
+    """重建单个用户的检索 Token（用户保存时调用）"""
+    UserSearchToken.objects.filter(user_id=user.pk).delete()
+    UserSearchToken.objects.bulk_create(build_tokens(user))
+
+
+def build_tokens(user):
+    return [
+        UserSearchToken(user_id=user.pk, system_id=user.system_id, field=field, token=token)
+        for field in SEARCH_FIELDS
+        for token in trigrams(getattr(user, field))
+    ]
+
+
+def filter_contains(queryset, field, term, system=None):
+    """
+    子串检索：先用 trigram 索引圈定候选用户，再用 contains 精确校验。
+    长度不足 3 的关键字无法切分 trigram，退化为 contains 扫描。
+    """
+    grams = trigrams(term)
+    if not grams:
+        return queryset.filter(**{f'{field}__contains': term})
+
+    tokens = UserSearchToken.objects.filter(field=field, token__in=grams)
+    if system:
+        tokens = tokens.filter(system_id=system)
+    candidates = tokens.values('user_id').annotate(hits=Count('token')).filter(hits=len(grams)).values('user_id')
+    return queryset.filter(uuid__in=candidates, **{f'{field}__contains': term})
@@ -0,0 +1,131 @@
+# infrastructure/signals.py
+from django.contrib.auth.models import Permission
+from django.db.models.signals import m2m_changed, pre_delete, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from account.infrastructure.orm_models import User, Role
+from account.domain.identifiers import EMAIL, PHONE, USERNAME
+from account.infrastructure.identifiers import sync_user_identifiers
+from account.infrastructure.permission_cache import invalidate_user_permissions
+from account.infrastructure.permission_dictionary import invalidate_permission_dictionary
+from account.infrastructure.search import SEARCH_FIELDS, index_user
+from account.infrastructure.user_cache import invalidate_user_infos
+from utensil.models import soft_delete_changed
+
+_AFFECTED_ATTR = '_perm_cache_affected_users'
+
+
+def _users_of_roles(role_ids):
+    return User.objects.filter(roles__in=role_ids).values_list('uuid', flat=True).distinct()
+
+
+def _affected_users(sender, instance, reverse, pk_set):
+    """根据 m2m 变更的方向，找出有效权限受影响的用户"""
+    if sender is User.roles.through:
+        # 正向: user.roles.xxx(...)  反向: role.users.xxx(...)
+        if not reverse:
+            return [instance.pk]
+        return pk_set if pk_set is not None else instance.users.values_list('uuid', flat=True)
+
+    if sender is User.user_permissions.through:
+        # 正向: user.user_permissions.xxx(...)  反向: permission.user_set.xxx(...)
+        if not reverse:
+            return [instance.pk]
+        return pk_set if pk_set is not None else instance.user_set.values_list('uuid', flat=True)
+
+    # Role.permissions 正向: role.permissions.xxx(...)  反向: permission.custom_roles.xxx(...)
+    if not reverse:
+        return instance.users.values_list('uuid', flat=True)
+    role_ids = pk_set if pk_set is not None else instance.custom_roles.values_list('pk', flat=True)
+    return _users_of_roles(list(role_ids))
+
+
+def _invalidate(user_ids):
+    user_ids = list(user_ids)
+    invalidate_user_permissions(user_ids)
+    invalidate_user_infos(user_ids)
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Role.permissions.through)
+def permission_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # clear 之后关系已不存在，需提前记录受影响用户
+        setattr(instance, _AFFECTED_ATTR, list(_affected_users(sender, instance, reverse, None)))
+    elif action == 'post_clear':
+        _invalidate(getattr(instance, _AFFECTED_ATTR, []))
+    elif action in ('post_add', 'post_remove'):
+        _invalidate(_affected_users(sender, instance, reverse, pk_set))
+
+
+@receiver(pre_delete, sender=Role)
+def role_deleted(sender, instance, **kwargs):
+    # 级联删除中间表不会触发 m2m_changed
+    _invalidate(instance.users.values_list('uuid', flat=True))
+
+
+@receiver(post_save, sender=Role)
+def role_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if created or raw:
+        return
+    if update_fields is None or 'is_deleted' in update_fields:
+        # 软删除 / 恢复角色会改变有效权限
+        _invalidate(instance.users.values_list('uuid', flat=True))
+    else:
+        # 角色改名会影响批量用户信息中的 roles
+        invalidate_user_infos(instance.users.values_list('uuid', flat=True))
+
+
+@receiver(soft_delete_changed, sender=Role)
+def roles_soft_deleted(sender, pks, **kwargs):
+    _invalidate(_users_of_roles(pks))
+
+
+@receiver(soft_delete_changed, sender=User)
+def users_soft_deleted(sender, pks, **kwargs):
+    # 批量软删除 / 恢复不触发 post_save，按启用状态变更处理
+    _invalidate(pks)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # 物理删除：旧的批量用户信息与权限缓存不得继续命中
+    _invalidate([instance.pk])
+
+
+@receiver(pre_delete, sender=Permission)
+def permission_deleted(sender, instance, **kwargs):
+    user_ids = set(instance.user_set.values_list('uuid', flat=True))
+    user_ids.update(_users_of_roles(list(instance.custom_roles.values_list('pk', flat=True))))
+    _invalidate(user_ids)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def permission_dictionary_changed(sender, **kwargs):
+    # 权限增删会改变位图字典
+    invalidate_permission_dictionary()
+
+
+@receiver(post_migrate)
+def permissions_migrated(sender, **kwargs):
+    # migrate 时 create_permissions 用 bulk_create 新增权限，不触发 post_save
+    invalidate_permission_dictionary()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # 仅在检索/登录字段可能变化时重建 trigram 与登录标识（如 last_login 更新直接跳过）
+    if raw:
+        return
+    changed = set(update_fields) if update_fields is not None else None
+    if not created and (changed is None or changed & {'is_active', 'is_deleted'}):
+        # 启用/禁用、软删除/恢复需要下游立即生效，按权限变更处理（同时清理用户信息缓存）
+        _invalidate([instance.pk])
+    else:
+        invalidate_user_infos([instance.pk])
+    if changed is None or changed & {*SEARCH_FIELDS, 'system'}:
+        index_user(instance)
+    if changed is None or changed & {EMAIL, PHONE, USERNAME, 'system'}:
+        sync_user_identifiers(instance)
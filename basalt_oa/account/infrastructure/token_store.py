@@ -0,0 +1,146 @@
+# infrastructure/token_store.py
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger('account')
+
+OUTSTANDING_KEY = 'jwt_outstanding:{}'  # jti -> 用户 ID，TTL 与 token 过期时间一致
+BLACKLIST_KEY = 'jwt_blacklist:{}'  # jti -> 1，TTL 与 token 过期时间一致
+BLACKLIST_LOG_KEY = 'jwt_blacklist_log'  # zset：jti -> 吊销时间（毫秒），供各进程增量同步 Bloom 过滤器
+BLOOM_SYNC_OVERLAP_MS = 1000  # 增量同步向前多取 1 秒，容忍各进程时钟偏差
+
+
+class BloomFilter:
+    """进程内 Bloom 过滤器：判定“不在集合中”时一定正确，判定“在集合中”时可能误判"""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RedisTokenStore:
+    """
+    refresh token 的 outstanding / blacklist 记录保存在 Redis，过期后自动清除，登录与刷新不再写 MySQL。
+    启用 Bloom 过滤器时，未命中过滤器的 jti 直接判定为未吊销，命中后再回 Redis 确认；
+    过滤器每 bloom_sync_interval 秒从 Redis 增量同步一次，其他进程吊销的 token 最多延迟这么久生效；
+    每 bloom_rebuild_interval 秒全量重建一次，剔除已过期的 jti。
+    """
+    redis_alias = 'default'
+    redis_client = None  # 可注入本地 Redis 替身（如 fakeredis）
+
+    def __init__(self, bloom_capacity=0, bloom_error_rate=0.001, bloom_sync_interval=5, bloom_rebuild_interval=3600,
+                 log_retention=86400 * 7):
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self.bloom_sync_interval = bloom_sync_interval
+        self.bloom_rebuild_interval = bloom_rebuild_interval
+        self.log_retention = log_retention  # 不短于 refresh token 有效期
+        self._bloom = None
+        self._bloom_synced_at = float('-inf')  # monotonic；进程刚启动时 monotonic 可能小于同步间隔
+        self._bloom_built_at = float('-inf')  # monotonic
+        self._bloom_cursor_ms = 0  # 已同步到的吊销时间
+        self._bloom_lock = threading.Lock()
+
+    def get_redis(self):
+        return self.redis_client or get_redis_connection(self.redis_alias)
+
+    @staticmethod
+    def _ttl(exp):
+        return max(1, int(exp - time.time()))
+
+    def outstand(self, jti, user_id, exp):
+        """记录已签发的 token；仅作记账用途，Redis 不可用时不影响登录"""
+        try:
+            self.get_redis().set(OUTSTANDING_KEY.format(jti), user_id or '', ex=self._ttl(exp))
+        except Exception as e:
+            logger.warning(f"[TokenStore] outstand failed: {e}")
+
+    def is_outstanding(self, jti):
+        return bool(self.get_redis().exists(OUTSTANDING_KEY.format(jti)))
+
+    def blacklist(self, jti, exp):
+        """
+        吊销 token：SET NX 原子占位，已被吊销（并发刷新 / 重放）时返回 False。
+        Redis 失败时抛出异常，由调用方拒绝本次刷新。
+        """
+        client = self.get_redis()
+        if not client.set(BLACKLIST_KEY.format(jti), 1, ex=self._ttl(exp), nx=True):
+            return False
+        pipe = client.pipeline()
+        pipe.delete(OUTSTANDING_KEY.format(jti))
+        if self.bloom_capacity:
+            now_ms = int(time.time() * 1000)
+            pipe.zadd(BLACKLIST_LOG_KEY, {jti: now_ms})
+            pipe.zremrangebyscore(BLACKLIST_LOG_KEY, 0, now_ms - self.log_retention * 1000)
+        pipe.execute()
+        if self._bloom is not None:
+            self._bloom.add(jti)
+        return True
+
+    def is_blacklisted(self, jti):
+        if self.bloom_capacity:
+            self._sync_bloom()
+            if self._bloom is not None and jti not in self._bloom:
+                return False
+        return bool(self.get_redis().exists(BLACKLIST_KEY.format(jti)))
+
+    def _sync_bloom(self):
+        if time.monotonic() - self._bloom_synced_at < self.bloom_sync_interval:
+            return
+        with self._bloom_lock:
+            now = time.monotonic()
+            if now - self._bloom_synced_at < self.bloom_sync_interval:
+                return
+            rebuild = self._bloom is None or now - self._bloom_built_at >= self.bloom_rebuild_interval
+            since = 0 if rebuild else self._bloom_cursor_ms - BLOOM_SYNC_OVERLAP_MS
+            now_ms = int(time.time() * 1000)
+            entries = self.get_redis().zrangebyscore(BLACKLIST_LOG_KEY, since, '+inf')
+
+            bloom = BloomFilter(self.bloom_capacity, self.bloom_error_rate) if rebuild else self._bloom
+            for jti in entries:
+                bloom.add(jti.decode() if isinstance(jti, bytes) else jti)
+            self._bloom, self._bloom_cursor_ms, self._bloom_synced_at = bloom, now_ms, now
+            if rebuild:
+                self._bloom_built_at = now
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_token_store():
+    """TOKEN_STORE['BACKEND'] 为 'database' 时返回 None，沿用 simplejwt token_blacklist 的数据库表"""
+    global _store
+    config = getattr(settings, 'TOKEN_STORE', {})
+    if config.get('BACKEND', 'redis') != 'redis':
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RedisTokenStore(
+                    bloom_capacity=config.get('BLOOM_CAPACITY', 0),
+                    bloom_error_rate=config.get('BLOOM_ERROR_RATE', 0.001),
+                    bloom_sync_interval=config.get('BLOOM_SYNC_INTERVAL', 5),
+                    bloom_rebuild_interval=config.get('BLOOM_REBUILD_INTERVAL', 3600),
+                    log_retention=int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds()),
+                )
+    return _store
@@ -0,0 +1,120 @@
+# infrastructure/tokens.py
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from account.domain.permission_bitmap import encode_bitmap
+from account.infrastructure.jwks import get_token_backend
+from account.infrastructure.permission_cache import get_user_permission_version
+from account.infrastructure.permission_dictionary import get_permission_dictionary
+from account.infrastructure.token_store import get_token_store
+
+
+class AccessToken(tokens.AccessToken):
+    """使用 RS256 密钥环签名/验签（SIMPLE_JWT['AUTH_TOKEN_CLASSES'] 指向此类）"""
+
+    @property
+    def token_backend(self):
+        return get_token_backend()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    outstanding / blacklist 记录默认写入 Redis（TOKEN_STORE），TTL 与 token 过期时间一致，
+    TOKEN_STORE['BACKEND'] = 'database' 时回退到 simplejwt 的 token_blacklist 数据表。
+    """
+    access_token_class = AccessToken
+
+    @property
+    def token_backend(self):
+        return get_token_backend()
+
+    @classmethod
+    def for_user(cls, user):
+        store = get_token_store()
+        if store is None:
+            return super().for_user(user)
+        token = super(tokens.BlacklistMixin, cls).for_user(user)  # 跳过 OutstandingToken 入库
+        store.outstand(token[api_settings.JTI_CLAIM], getattr(user, api_settings.USER_ID_FIELD), token['exp'])
+        return token
+
+    def outstand(self):
+        store = get_token_store()
+        if store is None:
+            return super().outstand()
+        store.outstand(self.payload[api_settings.JTI_CLAIM], self.payload.get(api_settings.USER_ID_CLAIM),
+                       self.payload['exp'])
+
+    def blacklist(self):
+        """
+        吊销当前 token。吊销与“是否已吊销”的判断在一次原子写入中完成：
+        同一 refresh token 的并发刷新都通过了 check_blacklist，只有先写入的一方成功，其余抛出 TokenError。
+        """
+        store = get_token_store()
+        if store is None:
+            # BlacklistedToken.token 为一对一字段（唯一约束），并发写入时只有一方 created
+            blacklisted, created = super().blacklist()
+            if not created:
+                raise TokenError("Token is blacklisted")
+            return blacklisted
+        try:
+            created = store.blacklist(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        except Exception as e:
+            # ✅ 吊销失败时拒绝刷新，避免旧 refresh token 被重复使用
+            raise TokenError(f"token 吊销失败: {e}")
+        if not created:
+            raise TokenError("Token is blacklisted")
+
+    def check_blacklist(self):
+        store = get_token_store()
+        if store is None:
+            return super().check_blacklist()
+        try:
+            blacklisted = store.is_blacklisted(self.payload[api_settings.JTI_CLAIM])
+        except Exception as e:
+            raise TokenError(f"无法校验 token 状态: {e}")
+        if blacklisted:
+            raise TokenError("Token is blacklisted")
+
+
+def issue_tokens(user):
+    """
+    签发 refresh / access token。
+    access token 额外携带权限位图 perms、字典版本 pv、权限版本号 perms_ver 与角色 roles，下游服务可本地鉴权。
+    权限只放在 access token 上（有效期短），refresh 轮换出的新 access 按当前权限重新计算。
+    """
+    refresh = RefreshToken.for_user(user)
+    return refresh, _access_token_for(refresh, user)
+
+
+def rotate_tokens(raw_refresh):
+    """用 refresh token 换取新的 access（开启 ROTATE_REFRESH_TOKENS 时同时轮换 refresh），失败抛出 TokenError"""
+    refresh = RefreshToken(raw_refresh)  # 校验签名、过期与吊销状态
+    user_model = get_user_model()
+    try:
+        user = user_model.objects.get(**{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)})
+    except user_model.DoesNotExist:
+        raise TokenError("用户不存在")
+    if not api_settings.USER_AUTHENTICATION_RULE(user):
+        raise TokenError("账户被禁用")
+
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        if api_settings.BLACKLIST_AFTER_ROTATION:
+            refresh.blacklist()
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        refresh.outstand()
+    return refresh, _access_token_for(refresh, user)
+
+
+def _access_token_for(refresh, user):
+    access = refresh.access_token
+    dictionary = get_permission_dictionary()
+    access['pv'] = dictionary['version']
+    # 先取版本号再计算权限：期间发生的变更会使下游按更新的版本号判定该 token 过期
+    access['perms_ver'] = get_user_permission_version(user.pk)
+    access['perms'] = encode_bitmap(user.all_permissions, dictionary['codenames'])
+    access['roles'] = list(user.roles.alive().values_list('uuid', flat=True))
+    return access
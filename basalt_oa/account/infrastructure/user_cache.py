@@ -0,0 +1,56 @@
+# infrastructure/user_cache.py
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+USER_INFO_CACHE_KEY = 'user_info:{}'  # 批量获取用户信息的单用户缓存 {"v": 版本号, "info": {...}}
+USER_INFO_CACHE_TIMEOUT = 300
+USER_INFO_VERSION_KEY = 'user_info_ver:{}'  # 用户信息版本号，失效时写入新版本
+USER_INFO_VERSION_TIMEOUT = 86400  # 远长于缓存条目，失效前读到旧行的请求回填的旧版本条目不会再次命中
+USER_UNIFIED_CACHE_KEY = 'user_unified:{}'  # unified_uuid -> uuid，映射不会变化
+USER_UNIFIED_CACHE_TIMEOUT = 86400
+
+
+def get_cached_user_infos(uuids, unified_uuids):
+    """
+    返回 (已命中的 {uuid: info}, 未命中的 {uuid: 版本号}, 未能映射的 unified_uuid 列表)，共两次 MGET。
+    未命中用户的版本号在查库之前读取，回填时原样交给 set_cached_user_infos。
+    """
+    mapped = cache.get_many([USER_UNIFIED_CACHE_KEY.format(unified_uuid) for unified_uuid in unified_uuids])
+    unknown_unified = [u for u in unified_uuids if USER_UNIFIED_CACHE_KEY.format(u) not in mapped]
+    wanted = list(dict.fromkeys([*uuids, *mapped.values()]))
+
+    cached = cache.get_many([key for uuid in wanted
+                             for key in (USER_INFO_CACHE_KEY.format(uuid), USER_INFO_VERSION_KEY.format(uuid))])
+    hits, missing = {}, {}
+    for uuid in wanted:
+        version = cached.get(USER_INFO_VERSION_KEY.format(uuid)) or 0
+        entry = cached.get(USER_INFO_CACHE_KEY.format(uuid))
+        if entry and entry.get('v') == version:
+            hits[uuid] = entry['info']
+        else:
+            missing[uuid] = version
+    return hits, missing, unknown_unified
+
+
+def set_cached_user_infos(infos, versions):
+    """versions：查库前读取的版本号；不在其中的用户（经 unified_uuid 首次映射）本次只缓存映射"""
+    cache.set_many({USER_INFO_CACHE_KEY.format(info['uuid']): {'v': versions[info['uuid']], 'info': info}
+                    for info in infos if info['uuid'] in versions}, timeout=USER_INFO_CACHE_TIMEOUT)
+    cache.set_many({USER_UNIFIED_CACHE_KEY.format(info['unified_uuid']): info['uuid'] for info in infos},
+                   timeout=USER_UNIFIED_CACHE_TIMEOUT)
+
+
+def invalidate_user_infos(user_ids):
+    """写入新的版本号使旧缓存失效；在事务提交后执行，并发读按旧版本号回填的条目不会命中"""
+    user_ids = {str(user_id) for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+
+    def _bump():
+        version = time.time_ns()
+        cache.set_many({USER_INFO_VERSION_KEY.format(user_id): version for user_id in user_ids},
+                       timeout=USER_INFO_VERSION_TIMEOUT)
+
+    transaction.on_commit(_bump)
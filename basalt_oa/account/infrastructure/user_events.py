@@ -0,0 +1,46 @@
+# infrastructure/user_events.py
+import json
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger('account')
+
+USER_EVENTS_CHANNEL = 'account:user_events'
+
+
+class UserEventPublisher:
+    """
+    用户权限 / 启用状态变更后通过 Redis pub/sub 通知下游服务，下游按用户精确清理 token 缓存。
+    消息格式：{"v": 权限版本号, "u": [[uuid, unified_uuid], ...]}；版本号与 permission_cache 写入的一致。
+    """
+    redis_alias = 'default'
+    redis_client = None  # 可注入本地 Redis 替身（如 fakeredis）
+
+    def get_redis(self):
+        return self.redis_client or get_redis_connection(self.redis_alias)
+
+    @staticmethod
+    def get_config():
+        return getattr(settings, 'ACCOUNT_EVENTS', {})
+
+    def publish_permissions_changed(self, user_ids, version):
+        from account.infrastructure.orm_models import User
+
+        config = self.get_config()
+        if not config.get('ENABLED', True):
+            return
+        users = [[uuid, unified_uuid] for uuid, unified_uuid in
+                 User.all_objects.filter(pk__in=list(user_ids)).values_list('uuid', 'unified_uuid')]
+        if not users:
+            return
+        message = json.dumps({"v": version, "u": users}, separators=(',', ':'))
+        try:
+            self.get_redis().publish(config.get('CHANNEL', USER_EVENTS_CHANNEL), message)
+        except Exception as e:
+            # 通知失败时下游缓存仍按 TTL 过期
+            logger.warning(f"[UserEvents] publish failed: {e}")
+
+
+publisher = UserEventPublisher()
@@ -0,0 +1,181 @@
+# account/interfaces/admin_api/async_views.py
+"""
+登录、me、myinfo、用户列表的原生异步视图（ASGI 部署时通过 ACCOUNT_ASYNC_VIEWS 启用）。
+请求路径全程使用 Django async ORM / async cache，密码校验在哈希进程池中等待，不占用事件循环。
+请求参数、响应结构与同步视图保持一致。
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, Throttled
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from account.application.use_cases import (
+    LoginUserUseCase, GetMyUserInfoUseCase, ListUsersUseCase
+)
+from account.infrastructure.hashing import PasswordHashBusy
+from account.infrastructure.orm_models import User
+from account.infrastructure.permission_cache import aget_user_permissions
+from account.infrastructure.tokens import AccessToken, issue_tokens
+from account.interfaces.admin_api.read_serializers import UserReadSerializer, MeReadSerializer
+from account.interfaces.admin_api.serializers import LoginSerializer
+from account.interfaces.admin_api.throttles import LoginThrottle
+from account.interfaces.admin_api.views import user_list_filters
+from middlewares.fast_json.parsers import ORJSONParser
+from middlewares.fast_json.renderers import ORJSONRenderer, dumps
+from utensil.views import CustomPagination, KeysetPagination
+
+
+def json_response(data, status=status.HTTP_200_OK):  # noqa
+    # ✅ 与同步视图使用同一 orjson 渲染
+    return HttpResponse(dumps(data), status=status, content_type=ORJSONRenderer.media_type)
+
+
+def drf_request(request):
+    # 复用 DRF 的 data / query_params 解析（ASGI 下请求体已完整读入，不会阻塞）
+    return Request(request, parsers=[ORJSONParser(), FormParser(), MultiPartParser()])
+
+
+async def authenticate(request):
+    """异步 JWT 认证：本地验签后按 unified_uuid 读取用户，失败返回 None"""
+    header = request.headers.get("Authorization", "")
+    parts = header.split()
+    if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        token = AccessToken(parts[1])
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+    try:
+        user = await User.objects.select_related('system').aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        return None
+    return user if user.is_active else None
+
+
+class AsyncAPIView(View):
+    """异步视图基类：与 DRF APIView 一致，使用 token 认证，不做 CSRF 校验"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+
+class AsyncAuthenticatedView(AsyncAPIView):
+    """需要登录的异步视图基类，对应同步视图的 JWTAuthentication + IsAuthenticated"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            response = json_response({"detail": "身份认证信息未提供或无效。"}, status=status.HTTP_401_UNAUTHORIZED)
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncLoginView(AsyncAPIView):
+    http_method_names = ['post', 'options']
+
+    async def post(self, request, *args, **kwargs):
+        request = drf_request(request)
+        try:
+            # 先解析请求体：格式错误时与同步视图一样返回 400 / 415，而不是在限流规则读取 account 时抛出
+            request.data  # noqa
+        except APIException as e:
+            return json_response({"detail": e.detail}, status=e.status_code)
+        # ✅ 限流在查用户、校验密码之前执行
+        throttle = LoginThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, self):
+            wait = throttle.wait()
+            response = json_response({"detail": Throttled(wait).detail}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            if wait is not None:
+                response["Retry-After"] = str(math.ceil(wait))  # 与 DRF 同步视图一致
+            return response
+
+        serializer = LoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        system_code = request.headers.get("X-System-Code", "Basalt")
+        try:
+            user = await LoginUserUseCase().aexecute(data['account'], data['password'], system_code)
+        except ValueError as e:
+            return json_response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        except PasswordHashBusy as e:
+            return json_response({"detail": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        refresh, access = await sync_to_async(issue_tokens)(user)
+        return json_response({
+            "refresh": str(refresh),
+            "access": str(access),
+            "user": {
+                "uuid": user.uuid,
+                "username": user.username,
+                "email": user.email,
+                "phone": user.phone,
+                "system": user.system.code if user.system else None,
+                "permissions": await aget_user_permissions(user.pk)
+            }
+        })
+
+
+# 获取用户信息
+class AsyncMyUserInfoView(AsyncAuthenticatedView):
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user_entity = await GetMyUserInfoUseCase().aexecute(request.user.uuid)
+        except ValueError as e:
+            return json_response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return json_response({
+            "uuid": user_entity.uuid,
+            "username": user_entity.username,
+            "email": user_entity.email,
+            "phone": user_entity.phone,
+            "system_code": user_entity.system_code,
+            "roles": user_entity.roles,
+            "permissions": user_entity.permissions
+        })
+
+
+# 用户列表
+class AsyncUserListView(AsyncAuthenticatedView):
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        request = drf_request(request)
+        params = request.query_params
+        filters = user_list_filters(params)
+        include = tuple(item for item in params.get("include", "").split(",")
+                        if item in UserReadSerializer.INCLUDE_FIELDS)
+        serializer = UserReadSerializer(include=include)
+        queryset = serializer.project(ListUsersUseCase().execute(filters))  # 仅构造 QuerySet，不访问数据库
+
+        # ✅ 携带 cursor 参数时切换为游标分页，否则保持页码分页
+        paginator = KeysetPagination() if KeysetPagination.cursor_query_param in params else CustomPagination()
+        try:
+            page = await paginator.apaginate_queryset(queryset, request)
+        except NotFound as e:
+            return json_response({"detail": e.detail}, status=status.HTTP_404_NOT_FOUND)
+        results = await serializer.aserialize(page)
+        return json_response(paginator.get_paginated_response(results).data)
+
+
+# 其他系统获取 用户详情(获取权限等)
+class AsyncMeInfoView(AsyncAuthenticatedView):
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        serializer = MeReadSerializer()
+        data, = await serializer.aserialize([serializer.row_from_instance(request.user)])
+        return json_response(data)
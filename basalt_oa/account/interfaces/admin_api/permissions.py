@@ -0,0 +1,10 @@
+# account/interfaces/permissions.py
+from rest_framework.permissions import BasePermission
+
+
+class CanReadUsers(BasePermission):
+    """跨系统批量读取用户信息：仅后台管理员（is_staff / 超级管理员）或持有 view_user 权限的服务账号"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.has_perm('view_user')))
@@ -0,0 +1,143 @@
+# account/interfaces/admin_api/read_serializers.py
+"""
+热点只读接口（用户列表、me）的轻量序列化。
+按声明的字段对 QuerySet 做 .values() 投影，逐行直接产出 dict：不实例化模型、不为每行构造 DRF 字段对象。
+roles / permissions 按整页用户主键批量查询中间表，每页查询数固定，与分页大小无关。
+"""
+from collections import defaultdict
+
+from account.infrastructure.orm_models import User
+from account.infrastructure.permission_cache import (
+    aget_user_permission_version, aget_user_permissions, get_user_permission_version, get_user_permissions
+)
+
+
+class ProjectionSerializer:
+    """
+    fields: 输出字段 -> ORM 查找路径（可跨关联，如 system__code）
+    hidden_fields: 需要查询但不输出的列（如游标分页使用的 created_at）
+    INCLUDE_FIELDS: 按需输出的关联字段，各自对应 load_<name>(keys) -> {主键: 值}
+    """
+    fields = {}
+    hidden_fields = ()
+    INCLUDE_FIELDS = ()
+    key = 'uuid'
+
+    def __init__(self, include=()):
+        self.include = tuple(name for name in self.INCLUDE_FIELDS if name in include)
+
+    def lookups(self):
+        return list(dict.fromkeys([self.key, *self.fields.values(), *self.hidden_fields]))
+
+    def project(self, queryset):
+        """只查询声明的列，迭代得到 dict"""
+        return queryset.values(*self.lookups())
+
+    def row_from_instance(self, obj):
+        """已加载的模型实例（如 request.user）转为投影行，只用于不跨关联的字段"""
+        return {lookup: getattr(obj, lookup) for lookup in self.lookups()}
+
+    def serialize(self, rows):
+        rows = list(rows)
+        keys = [row[self.key] for row in rows]
+        loaded = {name: getattr(self, f'load_{name}')(keys) for name in self.include} if keys else {}
+        return self.build(rows, loaded)
+
+    async def aserialize(self, rows):
+        """serialize 的异步版本：关联字段由 aload_<name>(keys) 通过 async ORM / async cache 加载"""
+        rows = list(rows)
+        keys = [row[self.key] for row in rows]
+        loaded = {name: await getattr(self, f'aload_{name}')(keys) for name in self.include} if keys else {}
+        return self.build(rows, loaded)
+
+    def build(self, rows, loaded):
+        results = []
+        for row in rows:
+            data = {name: row[lookup] for name, lookup in self.fields.items()}
+            for name in self.include:
+                data[name] = loaded[name].get(row[self.key], [])
+            results.append(data)
+        return results
+
+
+class UserReadSerializer(ProjectionSerializer):
+    fields = {
+        'uuid': 'uuid', 'unified_uuid': 'unified_uuid', 'username': 'username', 'email': 'email', 'phone': 'phone',
+        'is_active': 'is_active', 'is_staff': 'is_staff', 'is_superuser': 'is_superuser',
+    }
+    hidden_fields = ('created_at',)  # KeysetPagination 生成游标
+    INCLUDE_FIELDS = ('roles', 'permissions')
+
+    @staticmethod
+    def roles_queryset(keys):
+        # ✅ 中间表按 user_id 索引查找，联表取角色名；排除已软删除的角色
+        return (User.roles.through.objects
+                .filter(user_id__in=keys, role__is_deleted=False)
+                .values_list('user_id', 'role__name'))
+
+    @staticmethod
+    def permissions_querysets(keys):
+        # ✅ 角色权限、直授权限各一条查询，按用户合并去重
+        via_roles = (User.roles.through.objects
+                     .filter(user_id__in=keys, role__is_deleted=False, role__permissions__isnull=False)
+                     .values_list('user_id', 'role__permissions__codename'))
+        direct = (User.user_permissions.through.objects
+                  .filter(user_id__in=keys)
+                  .values_list('user_id', 'permission__codename'))
+        return via_roles, direct
+
+    @staticmethod
+    def group_roles(rows):
+        roles = defaultdict(list)
+        for user_id, name in rows:
+            roles[user_id].append(name)
+        return roles
+
+    @staticmethod
+    def group_permissions(rows):
+        permissions = defaultdict(set)
+        for user_id, codename in rows:
+            permissions[user_id].add(codename)
+        return {user_id: sorted(codenames) for user_id, codenames in permissions.items()}
+
+    def load_roles(self, keys):
+        return self.group_roles(self.roles_queryset(keys))
+
+    async def aload_roles(self, keys):
+        return self.group_roles([row async for row in self.roles_queryset(keys)])
+
+    def load_permissions(self, keys):
+        via_roles, direct = self.permissions_querysets(keys)
+        return self.group_permissions([*via_roles, *direct])
+
+    async def aload_permissions(self, keys):
+        via_roles, direct = self.permissions_querysets(keys)
+        return self.group_permissions([row async for row in via_roles] + [row async for row in direct])
+
+
+class MeReadSerializer(UserReadSerializer):
+    """
+    me 接口：输出字段与此前保持一致；权限走缓存（失效由信号负责）。
+    perms_ver 为权限版本号，先于 permissions 读取，下游据此与权限变更事件的版本号比较。
+    """
+    fields = {
+        'uuid': 'uuid', 'unified_uuid': 'unified_uuid', 'username': 'username', 'email': 'email', 'phone': 'phone',
+        'is_active': 'is_active',
+    }
+    hidden_fields = ()
+    INCLUDE_FIELDS = ('perms_ver', *UserReadSerializer.INCLUDE_FIELDS)
+
+    def __init__(self, include=INCLUDE_FIELDS):
+        super().__init__(include)
+
+    def load_perms_ver(self, keys):  # noqa
+        return {key: get_user_permission_version(key) for key in keys}
+
+    async def aload_perms_ver(self, keys):  # noqa
+        return {key: await aget_user_permission_version(key) for key in keys}
+
+    def load_permissions(self, keys):  # noqa
+        return {key: get_user_permissions(key) for key in keys}
+
+    async def aload_permissions(self, keys):  # noqa
+        return {key: await aget_user_permissions(key) for key in keys}
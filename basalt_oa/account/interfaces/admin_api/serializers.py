@@ -1,6 +1,5 @@
 # account/interfaces/serializers.py
 from rest_framework import serializers
-from account.infrastructure.orm_models import User
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -15,7 +14,20 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
 
-class UserListSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = User
-        fields = ['uuid', 'unified_uuid', 'username', 'email', 'phone', 'is_active', 'is_staff', 'is_superuser']
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+
+class UserBatchSerializer(serializers.Serializer):
+    BATCH_LIMIT = 100  # 与列表接口的 max_page_size 一致：调用方按页收集用户 ID 后批量查询
+
+    uuids = serializers.ListField(child=serializers.CharField(max_length=25), required=False, default=list,
+                                  max_length=BATCH_LIMIT)
+    unified_uuids = serializers.ListField(child=serializers.CharField(max_length=25), required=False, default=list,
+                                          max_length=BATCH_LIMIT)
+
+    def validate(self, attrs):
+        if len(attrs['uuids']) + len(attrs['unified_uuids']) > self.BATCH_LIMIT:
+            raise serializers.ValidationError(f"单次最多查询 {self.BATCH_LIMIT} 个用户")
+        return attrs
+
@@ -0,0 +1,20 @@
+# account/interfaces/throttles.py
+import hashlib
+
+from account.domain.identifiers import classify_account
+from utensil.throttling import SlidingWindowThrottle
+
+
+class LoginThrottle(SlidingWindowThrottle):
+    """登录限流：同一系统下按账号、按客户端 IP 分别计数，超限时在查用户和校验密码之前拒绝"""
+
+    def get_rules(self, request, view):
+        system_code = request.headers.get("X-System-Code", "Basalt")
+        rules = [(f"throttle:login:ip:{system_code}:{self.get_ident(request)}", 'login_ip')]
+
+        account = request.data.get('account') if hasattr(request.data, 'get') else None
+        if account:
+            _, value = classify_account(str(account))
+            digest = hashlib.md5(value.encode()).hexdigest()
+            rules.append((f"throttle:login:account:{system_code}:{digest}", 'login_account'))
+        return rules
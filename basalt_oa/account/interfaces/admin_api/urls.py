@@ -1,16 +1,29 @@
+from django.conf import settings
 from django.contrib.auth.views import LogoutView
 from django.urls import re_path
 
 from account.interfaces.admin_api.views import (
     RegisterView, LoginView, InitSuperAdminView, MyUserInfoView,
-    UserListView, MeInfoView
+    UserListView, MeInfoView, PermissionDictionaryView, JWKSView, UserBatchView, TokenRefreshView, UserExportView
 )
 
+if getattr(settings, 'ACCOUNT_ASYNC_VIEWS', False):
+    # ✅ ASGI 部署：高频接口使用原生异步视图
+    from account.interfaces.admin_api.async_views import (
+        AsyncLoginView as LoginView, AsyncMyUserInfoView as MyUserInfoView,
+        AsyncUserListView as UserListView, AsyncMeInfoView as MeInfoView
+    )
+
 urlpatterns = [
     re_path(r'^register/$', RegisterView.as_view(), name='register'),
     re_path(r'^login/$', LoginView.as_view(), name='login'),
+    re_path(r'^token/refresh/$', TokenRefreshView.as_view(), name='token-refresh'),
     re_path(r'^myinfo/$', MyUserInfoView.as_view(), name='myinfo'),
     re_path(r'^list/$', UserListView.as_view(), name='user-list'),
     re_path(r'^me/$', MeInfoView.as_view(), name='a_system_me_api'),
+    re_path(r'^users/batch/$', UserBatchView.as_view(), name='user-batch'),
+    re_path(r'^users/export/$', UserExportView.as_view(), name='user-export'),
+    re_path(r'^permissions/dictionary/$', PermissionDictionaryView.as_view(), name='permission-dictionary'),
+    re_path(r'^jwks/$', JWKSView.as_view(), name='jwks'),
 
 ]
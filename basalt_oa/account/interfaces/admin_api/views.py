@@ -1,20 +1,35 @@
+import csv
+import io
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from account.application.use_cases import (
-    RegisterUserUseCase, LoginUserUseCase, GetMyUserInfoUseCase, ListUsersUseCase, GetCurrentUserUseCase
+    RegisterUserUseCase, LoginUserUseCase, GetMyUserInfoUseCase, ListUsersUseCase,
+    BatchGetUsersUseCase, ExportUsersUseCase
 )
 from account.interfaces.admin_api.serializers import (
-    RegisterSerializer, LoginSerializer, UserListSerializer
+    RegisterSerializer, LoginSerializer, UserBatchSerializer, TokenRefreshSerializer
 )
+from account.interfaces.admin_api.read_serializers import UserReadSerializer, MeReadSerializer
+from account.interfaces.admin_api.permissions import CanReadUsers
+from account.interfaces.admin_api.throttles import LoginThrottle
 from rest_framework import permissions
 from utensil import generics
+from account.infrastructure.hashing import PasswordHashBusy
 from account.infrastructure.orm_models import User, System
+from account.infrastructure.jwks import get_token_backend, KeyRingTokenBackend
+from account.infrastructure.permission_dictionary import get_permission_dictionary
+from account.infrastructure.tokens import issue_tokens, rotate_tokens
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
 
-from utensil.views import CustomPagination
+from middlewares.fast_json.renderers import dumps
+from utensil.renderers import CSVRenderer, NDJSONRenderer
+from utensil.views import CustomPagination, KeysetPagination
 
 
 class RegisterView(generics.GenericAPIView):
@@ -38,12 +53,12 @@ class RegisterView(generics.GenericAPIView):
             )
 
             # 生成 JWT token
-            refresh = RefreshToken.for_user(user_entity.django_user)
+            refresh, access = issue_tokens(user_entity.django_user)
 
             return Response({
                 "msg": "注册成功",
                 "refresh": str(refresh),
-                "access": str(refresh.access_token),
+                "access": str(access),
                 "user": {
                     "uuid": user_entity.uuid,
                     "username": user_entity.username,
@@ -56,10 +71,13 @@ class RegisterView(generics.GenericAPIView):
 
         except ValueError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PasswordHashBusy as e:
+            return Response({"detail": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
 class LoginView(generics.GenericAPIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginThrottle]  # ✅ 限流在查用户、校验密码之前执行
 
     serializer_class = LoginSerializer
 
@@ -72,11 +90,13 @@ class LoginView(generics.GenericAPIView):
             user = LoginUserUseCase().execute(data['account'], data['password'], system_code)
         except ValueError as e:
             return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        except PasswordHashBusy as e:
+            return Response({"detail": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        refresh = RefreshToken.for_user(user)
+        refresh, access = issue_tokens(user)
         return Response({
             "refresh": str(refresh),
-            "access": str(refresh.access_token),
+            "access": str(access),
             "user": {
                 "uuid": user.uuid,
                 "username": user.username,
@@ -88,6 +108,22 @@ class LoginView(generics.GenericAPIView):
         })
 
 
+# 刷新 token（轮换后旧 refresh 写入 Redis 黑名单）
+class TokenRefreshView(generics.GenericAPIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    serializer_class = TokenRefreshSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            refresh, access = rotate_tokens(serializer.validated_data['refresh'])
+        except TokenError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response({"refresh": str(refresh), "access": str(access)})
+
+
 class InitSuperAdminView(generics.GenericAPIView):
     permission_classes = [permissions.AllowAny]
     serializer_class = None
@@ -95,10 +131,18 @@ class InitSuperAdminView(generics.GenericAPIView):
     def post(self, request, *args, **kwargs):  # noqa
         email = request.data.get("email")
         phone = request.data.get("phone")
-        if User.objects.filter(is_superuser=True).exists():
+        # 已软删除的超级管理员 / 系统仍占用唯一约束，检查需包含全部数据
+        if User.all_objects.filter(is_superuser=True).exists():
             return Response({"detail": "超级管理员已存在"}, status=status.HTTP_400_BAD_REQUEST)
+        taken = User.all_objects.none()
+        if email:
+            taken |= User.all_objects.filter(email=email)
+        if phone:
+            taken |= User.all_objects.filter(phone=phone)
+        if taken.exists():
+            return Response({"detail": "邮箱或手机号已注册"}, status=status.HTTP_400_BAD_REQUEST)
 
-        system, _ = System.objects.get_or_create(code="default", defaults={"name": "默认系统"})
+        system, _ = System.all_objects.get_or_create(code="default", defaults={"name": "默认系统"})
         user = User.objects.create_user(
             username="admin", email=email, phone=phone,
             password="admin123456", system=system,
@@ -132,51 +176,165 @@ class MyUserInfoView(generics.RetrieveAPIView):
             return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
 
 
+def user_list_filters(params):
+    """用户列表 / 导出共用的筛选参数"""
+    return {
+        "system": params.get("system_code"),
+        "username": params.get("username"),
+        "email": params.get("email"),
+        "phone": params.get("phone"),
+        "is_staff": params.get("is_staff"),
+        "is_active": params.get("is_active"),
+        "is_superuser": params.get("is_superuser"),
+        "role_id": params.get("role_id"),
+    }
+
+
 # 用户列表
 class UserListView(generics.ListAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = UserListSerializer
     pagination_class = CustomPagination
 
+    @property
+    def paginator(self):
+        # ✅ 携带 cursor 参数（首页可为空）时切换为游标分页，否则保持页码分页
+        if not hasattr(self, '_paginator'):
+            use_cursor = KeysetPagination.cursor_query_param in self.request.GET
+            self._paginator = KeysetPagination() if use_cursor else self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
-        filters = {
-            "system": self.request.GET.get("system_code"),
-            "username": self.request.GET.get("username"),
-            "email": self.request.GET.get("email"),
-            "phone": self.request.GET.get("phone"),
-            "is_staff": self.request.GET.get("is_staff"),
-            "is_active": self.request.GET.get("is_active"),
-            "is_superuser": self.request.GET.get("is_superuser"),
-            "role_id": self.request.GET.get("role_id"),
-        }
-        return ListUsersUseCase().execute(filters)
+        # roles / permissions 由 UserReadSerializer 按页批量加载，不再 prefetch
+        return ListUsersUseCase().execute(user_list_filters(self.request.GET))
+
+    def get_include(self):
+        # ?include=roles,permissions
+        include = self.request.GET.get("include", "")
+        return tuple(item for item in include.split(",") if item in UserReadSerializer.INCLUDE_FIELDS)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+        # ✅ .values() 投影直接产出 dict，不实例化 User
+        serializer = UserReadSerializer(include=self.get_include())
+        queryset = serializer.project(self.get_queryset())
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)  # ✅ 使用分页响应
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            return self.get_paginated_response(serializer.serialize(page))  # ✅ 使用分页响应
+        return Response(serializer.serialize(queryset))
+
+
+# 用户导出（?format=csv|ndjson，筛选参数与用户列表一致）
+class UserExportView(generics.GenericAPIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    EXPORT_FIELDS = (
+        ("uuid", "uuid"), ("unified_uuid", "unified_uuid"), ("username", "username"), ("email", "email"),
+        ("phone", "phone"), ("system_code", "system__code"), ("is_active", "is_active"), ("is_staff", "is_staff"),
+        ("is_superuser", "is_superuser"), ("created_at", "created_at"),
+    )
+    rows_per_chunk = 500  # 每次写出的行数，减少小块写入
+
+    def get(self, request, *args, **kwargs):
+        columns = [column for column, _ in self.EXPORT_FIELDS]
+        rows = ExportUsersUseCase().execute(user_list_filters(request.GET), [field for _, field in self.EXPORT_FIELDS])
+        fmt = request.accepted_renderer.format
+        encode = self.ndjson_lines if fmt == "ndjson" else self.csv_lines
+        response = StreamingHttpResponse(encode(columns, rows), content_type=request.accepted_renderer.media_type)
+        response["Content-Disposition"] = f'attachment; filename="users.{fmt}"'
+        response["X-Accel-Buffering"] = "no"  # 关闭 nginx 缓冲，边查边发
+        return response
+
+    def csv_lines(self, columns, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for index, row in enumerate(rows, 1):
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+            if index % self.rows_per_chunk == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def ndjson_lines(self, columns, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(dumps(dict(zip(columns, row))))
+            if len(chunk) >= self.rows_per_chunk:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+
+
+# 其他系统批量获取 用户详情（列表渲染时一次请求取一页用户）
+class UserBatchView(generics.GenericAPIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [CanReadUsers]  # 可读取任意用户的角色与权限，普通登录用户不可调用
+    serializer_class = UserBatchSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        user_entities = BatchGetUsersUseCase().execute(data['uuids'], data['unified_uuids'])
+        return Response({
+            "results": [
+                {
+                    "uuid": user_entity.uuid,
+                    "unified_uuid": user_entity.unified_uuid,
+                    "username": user_entity.username,
+                    "email": user_entity.email,
+                    "phone": user_entity.phone,
+                    "system_code": user_entity.system_code,
+                    "roles": user_entity.roles,
+                    "permissions": user_entity.permissions
+                }
+                for user_entity in user_entities
+            ]
+        }, status=status.HTTP_200_OK)
 
 
 # 其他系统获取 用户详情(获取权限等)
 
-class MeInfoView(generics.RetrieveAPIView):
+class MeInfoView(generics.GenericAPIView):
     """
     获取当前登录用户信息 (A_SYSTEM_ME_API)
     """
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = UserListSerializer  # 复用用户序列化
 
     def get(self, request, *args, **kwargs):
-        # ✅ 从 request.user 中获取当前用户 (DRF 已解码 JWT)
-        user = request.user
-        # ✅ 调用应用层用例
-        user_entity = GetCurrentUserUseCase().execute(user.uuid)
-        # ✅ 序列化返回
-        serializer = self.get_serializer(user_entity)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # ✅ request.user 已由 JWTAuthentication 加载，直接投影，不再重复查询用户与系统
+        serializer = MeReadSerializer()
+        # ✅ 带上 roles / permissions，下游收到权限变更事件后据此刷新；permissions 走缓存
+        data, = serializer.serialize([serializer.row_from_instance(request.user)])
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# 权限位图字典（下游服务据此解码 access token 中的 perms）
+class PermissionDictionaryView(generics.GenericAPIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # ?version= 取指定版本：下游解码旧 token 的 perms 位图时使用
+        dictionary = get_permission_dictionary(request.query_params.get("version") or None)
+        if dictionary is None:
+            return Response({"detail": "权限字典版本不存在或已过期"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(dictionary, status=status.HTTP_200_OK)
+
+
+# JWKS 公钥集合（下游服务本地验签）
+class JWKSView(generics.GenericAPIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        backend = get_token_backend()
+        data = backend.jwks() if isinstance(backend, KeyRingTokenBackend) else {"keys": []}
+        response = Response(data, status=status.HTTP_200_OK)
+        response["Cache-Control"] = "public, max-age=300"
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0002_alter_role_unified_uuid_alter_role_uuid_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-uuid'], name='account_user_created_uuid_idx'),
+        ),
+    ]
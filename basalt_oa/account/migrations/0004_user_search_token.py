@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_user_created_uuid_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(help_text='字段名: username/email/phone', max_length=10)),
+                ('token', models.CharField(help_text='小写 trigram', max_length=3)),
+                ('system', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='account.system')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '用户检索Token',
+                'verbose_name_plural': '用户检索Token',
+                'db_table': 'account_user_search_token',
+                'indexes': [models.Index(fields=['field', 'token', 'system', 'user'], name='account_search_token_idx')],
+                'unique_together': {('user', 'field', 'token')},
+            },
+        ),
+    ]
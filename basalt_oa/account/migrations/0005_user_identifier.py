@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from account.domain.identifiers import identifiers_for
+
+
+def backfill_identifiers(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    UserIdentifier = apps.get_model('account', 'UserIdentifier')
+    users = User.objects.only('uuid', 'system_id', 'username', 'email', 'phone').order_by('created_at')
+    batch = []
+    for user in users.iterator(chunk_size=1000):
+        batch.extend(
+            UserIdentifier(system_id=user.system_id, identifier_type=identifier_type,
+                           normalized_value=value, user_id=user.pk)
+            for identifier_type, value in identifiers_for(user.username, user.email, user.phone)
+        )
+        if len(batch) >= 1000:
+            UserIdentifier.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserIdentifier.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_user_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier_type', models.CharField(choices=[('email', '邮箱'), ('phone', '手机号'), ('username', '用户名')], help_text='标识类型', max_length=10)),
+                ('normalized_value', models.CharField(help_text='归一化后的标识值', max_length=254)),
+                ('system', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='account.system')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identifiers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '登录标识',
+                'verbose_name_plural': '登录标识',
+                'db_table': 'account_user_identifier',
+                'constraints': [models.UniqueConstraint(fields=('system', 'identifier_type', 'normalized_value'), name='account_identifier_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_identifiers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_user_identifier'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='account_user_created_uuid_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_deleted', '-created_at', '-uuid'], name='account_user_alive_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_deleted', 'system', '-created_at', '-uuid'], name='account_user_alive_system_idx'),
+        ),
+    ]
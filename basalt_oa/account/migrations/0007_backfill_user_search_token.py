@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from account.domain.search import SEARCH_FIELDS, trigrams
+
+
+def backfill_search_tokens(apps, schema_editor):
+    # 0004 只建表：已有用户补齐检索 Token，否则 3 个字符以上的子串检索查不到他们
+    User = apps.get_model('account', 'User')
+    UserSearchToken = apps.get_model('account', 'UserSearchToken')
+    users = User.objects.only('uuid', 'system_id', *SEARCH_FIELDS).order_by('created_at')
+    batch = []
+    for user in users.iterator(chunk_size=1000):
+        batch.extend(
+            UserSearchToken(user_id=user.pk, system_id=user.system_id, field=field, token=token)
+            for field in SEARCH_FIELDS
+            for token in trigrams(getattr(user, field))
+        )
+        if len(batch) >= 1000:
+            UserSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserSearchToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0006_user_alive_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:53
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_backfill_user_search_token'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='role',
+            options={'base_manager_name': 'all_objects', 'default_manager_name': 'all_objects', 'verbose_name': '角色', 'verbose_name_plural': '角色'},
+        ),
+        migrations.AlterModelOptions(
+            name='system',
+            options={'base_manager_name': 'all_objects', 'default_manager_name': 'all_objects', 'verbose_name': '系统', 'verbose_name_plural': '系统'},
+        ),
+        migrations.AlterModelOptions(
+            name='user',
+            options={'base_manager_name': 'all_objects', 'default_manager_name': 'all_objects', 'verbose_name': '用户', 'verbose_name_plural': '用户'},
+        ),
+        migrations.AlterModelManagers(
+            name='role',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='system',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
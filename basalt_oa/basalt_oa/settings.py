@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'middlewares.metrics.middleware.MetricsMiddleware',  # ✅ 放在最前，统计完整请求耗时
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -124,6 +126,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# 密码哈希进程池（PBKDF2 等 CPU 密集计算与请求线程隔离）
+PASSWORD_HASH_POOL = {
+    'MAX_WORKERS': 2,  # 并发哈希进程数，0 表示在请求线程内直接计算
+    'MAX_PENDING': 32,  # 最大排队数，超过后返回 503
+    'ACQUIRE_TIMEOUT': 2,  # 等待排队槽位的秒数
+}
+
+# last_login 写后合并：登录时只记录时间戳，后台按批写回（每批一条 UPDATE ... CASE）
+LOGIN_WRITE_BEHIND = {
+    'BACKEND': 'redis',  # redis：多进程共享缓冲 / memory：进程内缓冲 / sync：每次登录直接更新
+    'MAX_STALENESS': 30,  # last_login 最大延迟（秒），即写回间隔
+    'BATCH_SIZE': 500,
+    'PROCESSING_TIMEOUT': 300,  # 已取走未提交的批次超过该秒数视为取走进程已崩溃，放回重新写回
+}
+
+# 用户权限 / 启用状态变更事件（Redis pub/sub），下游服务订阅后精确清理 token 缓存
+ACCOUNT_EVENTS = {
+    'ENABLED': True,
+    'CHANNEL': 'account:user_events',
+}
+
+# 以 ASGI 部署时启用：登录、me、myinfo、用户列表切换为原生异步视图（路径不变）
+ACCOUNT_ASYNC_VIEWS = False
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -158,10 +184,28 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'middlewares.fast_json.renderers.ORJSONRenderer',  # ✅ orjson 序列化响应
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'middlewares.fast_json.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_RATES': {
+        'login_account': '10/min',  # 同一账号
+        'login_ip': '60/min',  # 同一客户端 IP
+    },
 }
 
+# ------------------------------------------------ JWT ---------------------------------------------------------------
+from configs.jwt_config import *
+
+JWT_SIGNING_KEYS = {path.stem: path.read_text() for path in sorted((BASE_DIR / JWT_KEYS_DIR).glob('*.pem'))}
+
 SIMPLE_JWT = {
     "USER_ID_FIELD": "unified_uuid",  # ✅ 指定使用 uuid
     "USER_ID_CLAIM": "unified_uuid",  # ✅ JWT 里存储的字段名（自定义）
@@ -173,7 +217,38 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'AUTH_TOKEN_CLASSES': ('account.infrastructure.tokens.AccessToken',),  # ✅ 按 kid 验签
+}
+
+# refresh token 的 outstanding / blacklist 记录（'redis' 写 Redis 并随 token 过期；'database' 沿用 token_blacklist 表）
+TOKEN_STORE = {
+    'BACKEND': 'redis',
+    'BLOOM_CAPACITY': 0,  # >0 时启用进程内 Bloom 过滤器，未命中直接判定未吊销
+    'BLOOM_ERROR_RATE': 0.001,
+    'BLOOM_SYNC_INTERVAL': 5,  # 从 Redis 增量同步的间隔（秒），即跨进程吊销的最大生效延迟
+    'BLOOM_REBUILD_INTERVAL': 3600,  # 全量重建间隔（秒），剔除已过期 jti
+}
+
+# 运行指标（/metrics，Prometheus 文本格式）
+METRICS = {
+    'ENABLED': True,
+    'NAMESPACE': 'basalt_oa',
+    'BACKEND': 'redis',  # 多 worker 进程的增量汇总到 Redis
+    'FLUSH_INTERVAL': 5,  # 秒，各进程增量写入 Redis 的间隔
+    'TOKEN': '',  # 非空时抓取需携带 Authorization: Bearer <TOKEN>
 }
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# ------------------------------------------------ 测试 ---------------------------------------------------------------
+# python manage.py test 使用 SQLite 内存库与本地缓存，不依赖 MySQL / Redis
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    PASSWORD_HASH_POOL = {**PASSWORD_HASH_POOL, 'MAX_WORKERS': 0}
+    LOGIN_WRITE_BEHIND = {**LOGIN_WRITE_BEHIND, 'BACKEND': 'memory'}
+    ACCOUNT_EVENTS = {**ACCOUNT_EVENTS, 'ENABLED': False}
+    TOKEN_STORE = {**TOKEN_STORE, 'BACKEND': 'database'}
+    METRICS = {**METRICS, 'BACKEND': 'memory'}
@@ -19,6 +19,7 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from account.interfaces.admin_api.urls import urlpatterns as account_urlpatterns
+from middlewares.metrics.views import metrics_view
 
 api_urlpatterns = [
     path('account/', include(account_urlpatterns)),
@@ -26,7 +27,8 @@ api_urlpatterns = [
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include(api_urlpatterns))
+    path('api/', include(api_urlpatterns)),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
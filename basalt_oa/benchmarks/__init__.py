@@ -0,0 +1,5 @@
+"""
+OA 认证热点路径的离线基准：LoginView / MeInfoView / MyUserInfoView / UserListView 压测，
+以及 get_by_account、all_permissions、分页的微基准。
+使用 SQLite 文件库与 fakeredis，不依赖 MySQL / Redis；结果保存为 JSON，可用 compare 对比两次运行。
+"""
@@ -0,0 +1,87 @@
+"""
+用法（在 basalt_oa 目录下）：
+    python -m benchmarks run --output before.json
+    python -m benchmarks run --only LoginView pagination --output after.json
+    python -m benchmarks compare before.json after.json --metric p95_ms
+"""
+import argparse
+import os
+import sys
+
+from benchmarks import harness
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="OA 认证热点路径基准测试")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="运行基准并保存结果")
+    run.add_argument('--output', help="结果 JSON 路径，不指定时只打印")
+    run.add_argument('--only', nargs='*', help="只运行名称以这些前缀开头的用例，如 LoginView pagination")
+    run.add_argument('--iterations', type=int, default=1000, help="微基准每个用例的调用次数")
+    run.add_argument('--warmup', type=int, default=100, help="预热调用次数")
+    run.add_argument('--concurrency', type=int, default=8, help="压测并发线程数")
+    run.add_argument('--requests', type=int, default=2000, help="每个压测用例的总请求数")
+    run.add_argument('--users-per-system', type=int, help="种子数据每个系统的用户数")
+    run.add_argument('--reuse-db', action='store_true', help="复用已有的基准库，跳过迁移与造数")
+
+    diff = commands.add_parser('compare', help="对比两次结果")
+    diff.add_argument('base')
+    diff.add_argument('head')
+    diff.add_argument('--metric', default='p50_ms', choices=['mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput'])
+    diff.add_argument('--threshold', type=float, default=10.0, help="退化阈值（百分比），超过时退出码为 1")
+
+    options = parser.parse_args(argv)
+    if options.command == 'compare':
+        return compare(options)
+    return run_benchmarks(options)
+
+
+def run_benchmarks(options):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from benchmarks import cases, fixtures
+
+    scale = dict(fixtures.DEFAULT_SCALE)
+    if options.users_per_system:
+        scale['users_per_system'] = options.users_per_system
+    db_name = settings.DATABASES['default']['NAME']
+    if not (options.reuse_db and os.path.exists(db_name)):
+        if os.path.exists(db_name):
+            os.remove(db_name)
+        call_command('migrate', verbosity=0)
+        print(f"造数: {scale}")
+        fixtures.seed(**scale)
+    cache.clear()
+
+    ctx = cases.Context()
+    results = cases.run(ctx, options.iterations, options.warmup, options.concurrency, options.requests, options.only)
+    print(harness.format_results(results))
+    if options.output:
+        meta = harness.environment('basalt_oa', scale=scale, iterations=options.iterations, warmup=options.warmup,
+                                   concurrency=options.concurrency, requests=options.requests,
+                                   database=settings.DATABASES['default']['ENGINE'])
+        harness.save_results(options.output, meta, results)
+        print(f"结果已保存: {options.output}")
+    return 0
+
+
+def compare(options):
+    base, head = harness.load_results(options.base), harness.load_results(options.head)
+    if base['meta'].get('params') != head['meta'].get('params'):
+        print("⚠️ 两次运行参数不同，结果仅供参考", file=sys.stderr)
+    rows, regressions = harness.compare(base, head, options.metric, options.threshold)
+    print(harness.format_comparison(rows, options.metric))
+    if regressions:
+        print(f"退化超过 {options.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
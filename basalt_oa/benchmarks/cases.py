@@ -0,0 +1,111 @@
+import itertools
+
+from django.db import connections
+from django.test import Client
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from account.application.use_cases import ListUsersUseCase
+from account.infrastructure.orm_models import User
+from account.infrastructure.permission_cache import load_user_permissions
+from account.infrastructure.tokens import issue_tokens
+from benchmarks.fixtures import PASSWORD, bench_users
+from benchmarks.harness import run_load, run_micro
+from utensil.views import CustomPagination, KeysetPagination
+
+LIST_PATH = '/api/account/list/'
+
+
+class Context:
+    """各用例共享的基准数据：压测用户及其 access token"""
+
+    def __init__(self, token_users=50):
+        self.users = bench_users()
+        self.user = self.users[0]
+        self.system = self.user.system
+        self.tokens = [str(issue_tokens(user)[1]) for user in self.users[:token_users]]
+
+
+def micro_cases(ctx):
+    """[(名称, 无参调用)]：ORM / 缓存 / 分页层面的单次调用开销"""
+    user, system_code = ctx.user, ctx.system.code
+    factory = APIRequestFactory()
+    filters = {"system": ctx.system.pk}
+    users_in_system = sum(1 for u in ctx.users if u.system_id == ctx.system.pk)
+    deep_page = max(1, users_in_system // 20)
+
+    def paginate(paginator, params):
+        request = Request(factory.get(LIST_PATH, params))
+        return lambda: paginator().paginate_queryset(ListUsersUseCase().execute(filters), request)
+
+    first_page = KeysetPagination()
+    first_page.paginate_queryset(ListUsersUseCase().execute(filters),
+                                 Request(factory.get(LIST_PATH, {'cursor': '', 'page_size': 20})))
+
+    cases = [
+        ('get_by_account.phone', lambda: User.objects.get_by_account(user.phone, system_code)),
+        ('get_by_account.email', lambda: User.objects.get_by_account(user.email, system_code)),
+        ('get_by_account.miss', lambda: User.objects.get_by_account('19999999999', system_code)),  # 命中未命中缓存
+        ('all_permissions.cached', lambda: user.all_permissions),
+        ('all_permissions.database', lambda: load_user_permissions(user.pk)),
+        ('pagination.page.first', paginate(CustomPagination, {'page_size': 20})),
+        ('pagination.page.deep', paginate(CustomPagination, {'page_size': 20, 'page': deep_page})),
+        ('pagination.keyset.first', paginate(KeysetPagination, {'cursor': '', 'page_size': 20})),
+    ]
+    if first_page.next_cursor is not None:
+        # 系统内用户不足两页时没有下一页游标，跳过该用例
+        cases.append(('pagination.keyset.next',
+                      paginate(KeysetPagination, {'cursor': first_page.next_cursor, 'page_size': 20})))
+    return cases
+
+
+def load_cases(ctx):
+    """[(名称, method, path, 请求参数生成器工厂)]：经完整中间件 / DRF 链路的接口压测"""
+    system_code = ctx.system.code
+    accounts = [user.phone for user in ctx.users if user.system_id == ctx.system.pk]
+
+    def login():
+        for account in itertools.cycle(accounts):
+            yield {'data': {'account': account, 'password': PASSWORD}, 'content_type': 'application/json',
+                   'HTTP_X_SYSTEM_CODE': system_code}
+
+    def authorized(**params):
+        def requests():
+            for token in itertools.cycle(ctx.tokens):
+                yield {'data': params, 'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        return requests
+
+    return [
+        ('LoginView', 'post', '/api/account/login/', login),
+        ('MeInfoView', 'get', '/api/account/me/', authorized()),
+        ('MyUserInfoView', 'get', '/api/account/myinfo/', authorized()),
+        ('UserListView.page', 'get', LIST_PATH, authorized(page_size=20)),
+        ('UserListView.include', 'get', LIST_PATH, authorized(page_size=20, include='roles,permissions')),
+        ('UserListView.keyset', 'get', LIST_PATH, authorized(page_size=20, cursor='')),
+    ]
+
+
+def run(ctx, iterations, warmup, concurrency, requests, only=None):
+    results = []
+    for name, fn in micro_cases(ctx):
+        if selected(name, only):
+            results.append(run_micro(name, fn, iterations=iterations, warmup=warmup))
+    for name, method, path, make_params in load_cases(ctx):
+        if selected(name, only):
+            results.append(run_load(name, client_setup(method, path, make_params), concurrency=concurrency,
+                                    requests=requests, warmup=min(warmup, 20), teardown=connections.close_all))
+    return results
+
+
+def client_setup(method, path, make_params):
+    def setup():
+        client, params = Client(), make_params()
+
+        def request():
+            return getattr(client, method)(path, **next(params)).status_code == 200
+        return request
+    return setup
+
+
+def selected(name, only):
+    return not only or any(name.startswith(prefix) for prefix in only)
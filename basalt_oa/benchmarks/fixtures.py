@@ -0,0 +1,53 @@
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+from account.infrastructure.orm_models import User, System, Role
+
+PASSWORD = 'Basalt@2025'
+
+# 默认数据形态与 utensil.tests.HotPathDataMixin 一致，用户数放大到接近线上单系统规模
+DEFAULT_SCALE = {
+    'systems': 4,
+    'users_per_system': 250,
+    'roles_per_system': 10,
+    'roles_per_user': 5,
+    'permissions_per_role': 12,
+    'direct_permissions_per_user': 3,
+}
+
+
+@transaction.atomic
+def seed(systems, users_per_system, roles_per_system, roles_per_user, permissions_per_role,
+         direct_permissions_per_user):
+    """写入基准数据：多系统、每用户多角色、每角色多权限；每个系统留一个已软删除用户"""
+    content_type = ContentType.objects.get_for_model(Role)
+    permissions = Permission.objects.bulk_create([
+        Permission(content_type=content_type, codename=f'bench_perm_{i}', name=f'bench perm {i}')
+        for i in range(roles_per_system * permissions_per_role)
+    ])
+    deleted = []
+    for s in range(systems):
+        system = System.objects.create(code=f'bench{s}', name=f'基准系统{s}')
+        roles = [Role.objects.create(system=system, name=f'bench{s}-role{i}') for i in range(roles_per_system)]
+        for i, role in enumerate(roles):
+            role.permissions.add(*permissions[i * permissions_per_role:(i + 1) * permissions_per_role])
+        for i in range(users_per_system):
+            user = User.objects.create_user(
+                phone=f'17{s}{i:08d}', email=f'user{i}@bench{s}.example.com', password=PASSWORD,
+                username=f'bench{s}-user{i}', system=system,
+            )
+            user.roles.add(*[roles[(i + k) % roles_per_system] for k in range(roles_per_user)])
+            user.user_permissions.add(*permissions[i % len(permissions):i % len(permissions) + direct_permissions_per_user])
+        deleted.append(user.pk)
+    User.objects.filter(pk__in=deleted).soft_delete()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def bench_users(limit=None):
+    """压测使用的存活用户（按系统、创建顺序）"""
+    queryset = (User.objects.select_related('system')
+                .filter(system__code__startswith='bench')
+                .order_by('system__code', 'created_at'))
+    return list(queryset[:limit] if limit else queryset)
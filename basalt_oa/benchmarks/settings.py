@@ -0,0 +1,58 @@
+"""
+基准测试专用配置：SQLite 文件库 + fakeredis（进程内 Redis 替身），无需 MySQL / Redis 即可离线运行。
+除存储外沿用 basalt_oa.settings，缓存、令牌存储、last_login 写回等仍走 Redis 实现。
+"""
+import os
+import tempfile
+
+import fakeredis
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from basalt_oa.settings import *  # noqa
+
+DEBUG = False  # DEBUG 下每条 SQL 都会记录到 connection.queries，影响耗时
+ALLOWED_HOSTS = ['testserver']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        # 文件库：压测线程各自建立连接时看到同一份数据
+        'NAME': os.environ.get('BASALT_BENCH_DB') or os.path.join(tempfile.gettempdir(), 'basalt_oa_bench.sqlite3'),
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": 'redis://basalt-bench:6379/0',
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            # ✅ 同一 LOCATION 的连接共享一个进程内 fakeredis 服务端，get_redis_connection 同样可用（含 Lua）
+            "CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection},
+        }
+    },
+}
+
+# 登录基准关注哈希以外的开销（查询、缓存、签发 token）；哈希本身由进程池限流，单独评估
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+PASSWORD_HASH_POOL = {**PASSWORD_HASH_POOL, 'MAX_WORKERS': 0}
+LOGIN_WRITE_BEHIND = {**LOGIN_WRITE_BEHIND, 'MAX_STALENESS': 3600}  # 压测期间不触发写回
+ACCOUNT_EVENTS = {**ACCOUNT_EVENTS, 'ENABLED': False}
+METRICS = {**METRICS, 'BACKEND': 'memory'}
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    # 压测反复登录同一批账号，放开登录限流（限流脚本本身仍会执行）
+    'DEFAULT_THROTTLE_RATES': {scope: '1000000/min' for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']},
+}
+
+# 每次运行生成临时 RS256 密钥，与线上一样签发带 kid 的 token
+_bench_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+JWT_SIGNING_KEYS = {
+    'bench': _bench_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+}
+JWT_ACTIVE_KID = 'bench'
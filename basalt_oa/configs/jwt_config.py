@@ -0,0 +1,10 @@
+# JWT Settings
+
+# RS256 签名密钥：keys 目录下每个 {kid}.pem 为一把私钥（python manage.py generate_jwt_key 生成）
+# JWT_ACTIVE_KID 为当前签名使用的 kid，其余密钥仅用于验签（轮换过渡），未配置时回退 HS256
+# 私钥不入库：部署时生成密钥并填写 kid。回退 HS256 期间，order / vip 等不持有签名密钥的服务经 OA /me/ 校验 token
+JWT_KEYS_DIR = "keys"
+JWT_ACTIVE_KID = ""
+# 首次填写 JWT_ACTIVE_KID 时同时填写上线时间（ISO 8601，带时区，如 "2026-11-01T00:00:00+08:00"）：
+# 此后 REFRESH_TOKEN_LIFETIME 内仍接受该时间之前签发的无 kid HS256 token，用户不必重新登录；留空则上线即全员重新登录
+JWT_RS256_SINCE = ""
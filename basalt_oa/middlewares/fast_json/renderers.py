@@ -0,0 +1,66 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# ✅ 与 DRF JSONRenderer 默认行为一致：紧凑输出、非 ASCII 字符原样输出（orjson 固定 UTF-8）、UTC 时间以 Z 结尾
+# datetime / date / time / UUID / dataclass 由 orjson 原生序列化；datetime 保留微秒（DRF 截断为毫秒）
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+_fallback = JSONEncoder()
+
+
+def default(obj):
+    """orjson 不认识的类型（Decimal、timedelta、QuerySet、惰性翻译字符串等）沿用 DRF 的转换规则"""
+    return _fallback.default(obj)
+
+
+def dumps(data, option=0):
+    """序列化为 UTF-8 bytes"""
+    try:
+        return orjson.dumps(data, default=default, option=ORJSON_OPTIONS | option)
+    except orjson.JSONEncodeError:
+        # 少见的非 str 键（如 int）：带 OPT_NON_STR_KEYS 重试；该选项会拖慢所有 dict 的序列化，默认不开
+        return orjson.dumps(data, default=default, option=ORJSON_OPTIONS | orjson.OPT_NON_STR_KEYS | option)
+
+
+class Envelope(dict):
+    """
+    Basalt 统一响应结构。dict 子类：视图与测试可按普通 dict 读取，渲染时由 orjson 直接序列化，不经过 Python 层的编码回调。
+    """
+
+    @classmethod
+    def msg(cls, code, msg=None, data=None, **extra):
+        """{"code": ..., "msg": ..., "data": ...}；code 非数字时记为 50000，data 为 None 时省略"""
+        envelope = cls(code=int(code) if str(code).isdigit() else 50000, msg=msg)
+        if data is not None:
+            envelope['data'] = data
+        envelope.update(extra)
+        return envelope
+
+    @classmethod
+    def page(cls, results, **meta):
+        """分页响应：{"code": 200, 分页信息..., "results": [...]}"""
+        return cls(code=200, **meta, results=results)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """基于 orjson 的 JSON 渲染器，替换 DRF 默认的 JSONRenderer（标准库 json）"""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None  # JSON 固定 UTF-8，Content-Type 不带 charset（与 DRF 一致）
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # 可浏览 API 或 Accept: application/json; indent=4 请求缩进输出（orjson 只支持 2 空格缩进）
+        option = orjson.OPT_INDENT_2 if self.get_indent(accepted_media_type, renderer_context or {}) else 0
+        return dumps(data, option)
+
+    @staticmethod
+    def get_indent(accepted_media_type, renderer_context):
+        if accepted_media_type:
+            for param in accepted_media_type.split(';')[1:]:
+                key, _, value = param.strip().partition('=')
+                if key == 'indent' and value.isdigit():
+                    return int(value) > 0
+        return bool(renderer_context.get('indent'))
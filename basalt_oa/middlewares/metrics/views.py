@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.http import HttpResponse
+
+from middlewares.metrics.registry import metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_view(request):
+    """Prometheus 抓取入口；配置了 METRICS['TOKEN'] 时需携带 Authorization: Bearer <token>"""
+    token = getattr(settings, "METRICS", {}).get("TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,15 +1,12 @@
 from rest_framework import generics
 
+from middlewares.fast_json.renderers import Envelope
+
 
 class MyBaseAPIView:
     @classmethod
     def msg(cls, code, msg=None, data=None, **kwargs):
-        result = dict()
-        result['code'] = int(code) if str(code).isdigit() else 50000
-        result['msg'] = kwargs.get('remsg', None) or msg
-        if data is not None:
-            result['data'] = data
-        return result
+        return Envelope.msg(code, kwargs.get('remsg', None) or msg, data)
 
 
 class RetrieveAPIView(generics.RetrieveAPIView, MyBaseAPIView): pass
@@ -0,0 +1,94 @@
+import time
+
+import shortuuid
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections, models, transaction
+
+from utensil.models import create_uuid
+
+SCHEMES = {
+    'shortuuid': shortuuid.uuid,  # 历史方案：随机 22 位
+    'time_ordered': create_uuid,  # 时间有序 24 位
+}
+
+
+class Command(BaseCommand):
+    help = "对比随机 shortuuid 与时间有序 create_uuid 作主键时的批量写入吞吐与表 / 索引大小（会建临时表，请在测试库执行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help="每种方案写入的行数")
+        parser.add_argument('--batch-size', type=int, default=1000, help="每个事务写入的行数")
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--keep', action='store_true', help="保留临时表，便于手工查看")
+
+    def handle(self, *args, **options):
+        self.connection = connections[options['database']]
+        self.stdout.write(f"数据库: {self.connection.vendor}，每种方案 {options['rows']} 行，每批 {options['batch_size']} 行")
+        self.stdout.write(f"{'方案':<14}{'总吞吐(行/s)':>14}{'末10%吞吐(行/s)':>18}{'数据(KB)':>12}{'索引(KB)':>12}")
+        for name, generator in SCHEMES.items():
+            model = self.bench_model(name)
+            with self.connection.schema_editor() as editor:
+                editor.create_model(model)
+            try:
+                total_rate, tail_rate = self.insert(model, generator, options['rows'], options['batch_size'])
+                data_size, index_size = self.table_size(model._meta.db_table)
+                self.stdout.write(f"{name:<14}{total_rate:>14.0f}{tail_rate:>18.0f}"
+                                  f"{self.kb(data_size):>12}{self.kb(index_size):>12}")
+            finally:
+                if not options['keep']:
+                    with self.connection.schema_editor() as editor:
+                        editor.delete_model(model)
+                apps.all_models['utensil'].pop(model._meta.model_name, None)
+
+    @staticmethod
+    def bench_model(name):
+        """与 Base 相同的主键 / unified_uuid 结构，外加一个负载列"""
+        meta = type('Meta', (), {'app_label': 'utensil', 'db_table': f'bench_uuid_{name}', 'managed': False})
+        return type(f'BenchUuid_{name}', (models.Model,), {
+            '__module__': __name__,
+            'Meta': meta,
+            'uuid': models.CharField(primary_key=True, max_length=25),
+            'unified_uuid': models.CharField(max_length=25, unique=True),
+            'created_at': models.DateTimeField(auto_now_add=True),
+            'payload': models.CharField(max_length=100),
+        })
+
+    def insert(self, model, generator, rows, batch_size):
+        durations = []
+        for start in range(0, rows, batch_size):
+            objs = [model(uuid=generator(), unified_uuid=generator(), payload=f'user-{start + i}')
+                    for i in range(min(batch_size, rows - start))]
+            begin = time.perf_counter()
+            with transaction.atomic(using=self.connection.alias):
+                model.objects.using(self.connection.alias).bulk_create(objs)
+            durations.append((len(objs), time.perf_counter() - begin))
+        tail = durations[-max(1, len(durations) // 10):]
+        return (sum(n for n, _ in durations) / sum(t for _, t in durations),
+                sum(n for n, _ in tail) / sum(t for _, t in tail))
+
+    def table_size(self, table):
+        """返回 (数据 / 聚簇索引字节数, 二级索引字节数)，不支持的数据库返回 (None, None)"""
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE {table}')
+                cursor.fetchall()
+                cursor.execute("SELECT data_length, index_length FROM information_schema.TABLES "
+                               "WHERE table_schema = DATABASE() AND table_name = %s", [table])
+                return cursor.fetchone()
+            if self.connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_relation_size(%s), pg_indexes_size(%s)', [table, table])
+                return cursor.fetchone()
+            if self.connection.vendor == 'sqlite':
+                try:
+                    cursor.execute("SELECT name, SUM(pgsize) FROM dbstat WHERE name = %s OR name LIKE %s GROUP BY name",
+                                   [table, f'sqlite_autoindex_{table}_%'])
+                except Exception:
+                    return None, None  # 未编译 dbstat 扩展
+                sizes = dict(cursor.fetchall())
+                return sizes.pop(table, 0), sum(sizes.values())
+        return None, None
+
+    @staticmethod
+    def kb(size):
+        return '-' if size is None else f'{size // 1024}'
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from account.infrastructure.login_recorder import get_login_recorder
+
+
+class Command(BaseCommand):
+    help = "立即写回缓冲中的 last_login（发布、停机前或定时任务执行）"
+
+    def handle(self, *args, **options):
+        total = get_login_recorder().flush()
+        self.stdout.write(self.style.SUCCESS(f"已写回 {total} 个用户的 last_login"))
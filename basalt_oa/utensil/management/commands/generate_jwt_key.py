@@ -0,0 +1,30 @@
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "生成 RS256 签名私钥到 JWT_KEYS_DIR，输出的 kid 配置到 configs/jwt_config.py 的 JWT_ACTIVE_KID"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kid', default=None, help="密钥 ID，默认按时间生成")
+        parser.add_argument('--bits', type=int, default=2048)
+
+    def handle(self, *args, **options):
+        kid = options['kid'] or time.strftime('%Y%m%d%H%M%S')
+        keys_dir = settings.BASE_DIR / settings.JWT_KEYS_DIR
+        keys_dir.mkdir(parents=True, exist_ok=True)
+        path = keys_dir / f'{kid}.pem'
+        if path.exists():
+            self.stderr.write(self.style.ERROR(f"密钥已存在: {path}"))
+            return
+
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=options['bits'])
+        path.write_bytes(private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+        path.chmod(0o600)
+        self.stdout.write(self.style.SUCCESS(f"已生成 {path}，kid={kid}"))
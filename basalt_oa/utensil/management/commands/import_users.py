@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from account.domain.identifiers import identifiers_for, normalize, EMAIL
+from account.infrastructure.hashing import make_passwords, new_hash_pool
+from account.infrastructure.identifiers import login_miss_key
+from account.infrastructure.orm_models import User, System, Role, UserIdentifier, UserSearchToken
+from account.infrastructure.search import build_tokens
+
+
+class Command(BaseCommand):
+    help = "批量导入用户（CSV / NDJSON 流式读取，进程池哈希密码，分批写入，可断点续传）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV（表头含 username,email,phone,password,roles）或 NDJSON 文件")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="默认按扩展名判断")
+        parser.add_argument('--system', default='default', help="导入到的系统编码")
+        parser.add_argument('--batch-size', type=int, default=1000, help="每批（每个事务）处理的行数")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="哈希密码的进程数")
+        parser.add_argument('--checkpoint', help="断点文件，默认 <path>.checkpoint")
+        parser.add_argument('--restart', action='store_true', help="忽略已有断点，从头导入")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"文件不存在: {path}")
+        fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        try:
+            self.system = System.objects.get(code=options['system'])
+        except System.DoesNotExist:
+            raise CommandError(f"系统不存在: {options['system']}")
+        self.roles = {role.name: role.pk for role in Role.objects.filter(system=self.system).only('uuid', 'name')}
+
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        state = {"rows": 0, "created": 0, "skipped": 0}
+        if not options['restart'] and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                state.update(json.load(f))
+            self.stdout.write(f"从第 {state['rows']} 行继续导入")
+
+        self.verbosity = options['verbosity']
+        self.workers = max(1, options['workers'])
+        with open(path, newline='', encoding='utf-8') as f, new_hash_pool(self.workers) as pool:
+            rows = self.read_rows(f, fmt)
+            for _ in range(state['rows']):
+                next(rows, None)
+
+            # ✅ 流水线：当前批在数据库写入时，下一批的密码已在进程池中哈希
+            pending = None
+            for batch in self.read_batches(rows, options['batch_size']):
+                prepared = self.prepare(batch, pool, exclude=pending[1] if pending else None)
+                if pending:
+                    self.commit(pending, state)
+                pending = prepared
+            if pending:
+                self.commit(pending, state)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"导入完成：新增 {state['created']} 个用户，跳过 {state['skipped']} 行，共处理 {state['rows']} 行"
+        ))
+
+    @staticmethod
+    def read_rows(f, fmt):
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                roles = row.get('roles') or ''
+                yield {**row, 'roles': [name for name in roles.split('|') if name]}
+        else:
+            for line in f:
+                if not line.strip():
+                    continue  # 空行不计入行数（与 csv.DictReader 一致），断点续传按同样的规则跳过
+                row = json.loads(line)
+                roles = row.get('roles') or []
+                yield {**row, 'roles': roles.split('|') if isinstance(roles, str) else roles}
+
+    @staticmethod
+    def read_batches(rows, batch_size):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def prepare(self, batch, pool, exclude=None):
+        """校验、去重并提交密码哈希，返回 (行数, 已占用的 email/phone, 待写入用户, 哈希 futures)"""
+        raw_emails = {str(row['email']).strip() for row in batch if row.get('email')}
+        emails = {normalize(EMAIL, value) for value in raw_emails}
+        phones = {str(row['phone']).strip() for row in batch if row.get('phone')}
+        # 每批两条查询：email / phone 均为全局唯一（包括已软删除的用户）
+        # 已有用户的 email 可能保留了大小写：原值与归一化值一并查询，命中后按归一化值比较
+        existing = User.all_objects
+        taken = {('email', normalize(EMAIL, value))
+                 for value in existing.filter(email__in=emails | raw_emails).values_list('email', flat=True)}
+        taken.update(('phone', value) for value in existing.filter(phone__in=phones).values_list('phone', flat=True))
+        if exclude:
+            taken |= exclude
+
+        users, passwords, claimed = [], [], set()
+        for row in batch:
+            email = normalize(EMAIL, row.get('email')) or None
+            phone = str(row.get('phone') or '').strip() or None
+            keys = {key for key in (('email', email), ('phone', phone)) if key[1]}
+            if not keys or keys & (taken | claimed):
+                continue
+            claimed |= keys
+            user = User(
+                system=self.system, username=(row.get('username') or '').strip() or (email or phone),
+                email=email, phone=phone, is_active=str(row.get('is_active', True)).lower() not in ('false', '0', 'no'),
+            )
+            user.import_roles = [self.roles[name] for name in row.get('roles', []) if name in self.roles]
+            users.append(user)
+            passwords.append(row.get('password') or None)
+
+        size = max(1, -(-len(passwords) // self.workers))
+        futures = [pool.submit(make_passwords, passwords[i:i + size]) for i in range(0, len(passwords), size)]
+        return len(batch), claimed, users, futures
+
+    def commit(self, prepared, state):
+        row_count, _, users, futures = prepared
+        hashed = [encoded for future in futures for encoded in future.result()]
+        for user, encoded in zip(users, hashed):
+            user.password = encoded
+
+        # bulk_create 不触发 post_save，登录标识、检索 Token 与角色关系在同一事务内一并写入
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            UserIdentifier.objects.bulk_create([
+                UserIdentifier(system_id=user.system_id, identifier_type=identifier_type, normalized_value=value,
+                               user_id=user.pk)
+                for user in users
+                for identifier_type, value in identifiers_for(user.username, user.email, user.phone)
+            ], ignore_conflicts=True)
+            UserSearchToken.objects.bulk_create([token for user in users for token in build_tokens(user)])
+            User.roles.through.objects.bulk_create([
+                User.roles.through(user_id=user.pk, role_id=role_id) for user in users for role_id in user.import_roles
+            ], ignore_conflicts=True)
+        cache.delete_many([
+            login_miss_key(self.system.code, identifier_type, value)
+            for user in users for identifier_type, value in identifiers_for(user.username, user.email, user.phone)
+        ])
+
+        state['rows'] += row_count
+        state['created'] += len(users)
+        state['skipped'] += row_count - len(users)
+        self.save_checkpoint(state)
+        if self.verbosity >= 1:
+            self.stdout.write(f"已处理 {state['rows']} 行，新增 {state['created']} 个用户")
+
+    def save_checkpoint(self, state):
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from account.infrastructure.orm_models import User, UserSearchToken
+from account.infrastructure.search import build_tokens
+
+
+class Command(BaseCommand):
+    help = "重建用户 trigram 检索表（上线或数据修复时执行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="每批处理的用户数")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # 包括已软删除的用户，恢复后无需再重建
+        users = User.all_objects.only('uuid', 'system_id', 'username', 'email', 'phone').order_by('pk')
+        batch, total = [], 0
+        for user in users.iterator(chunk_size=batch_size):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                total += self._rebuild(batch)
+                batch = []
+        if batch:
+            total += self._rebuild(batch)
+        self.stdout.write(self.style.SUCCESS(f"已重建 {total} 个用户的检索 Token"))
+
+    @staticmethod
+    def _rebuild(users):
+        with transaction.atomic():
+            UserSearchToken.objects.filter(user_id__in=[user.pk for user in users]).delete()
+            UserSearchToken.objects.bulk_create([token for user in users for token in build_tokens(user)])
+        return len(users)
@@ -0,0 +1,52 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from utensil.models import Base
+
+
+class Command(BaseCommand):
+    """
+    主键切换为时间有序 ID 后的存量表整理。
+    已有行的 uuid / unified_uuid 被外键、JWT 与下游服务引用，保持不变；新行写入索引尾部，
+    这里只做一次在线重建，回收随机主键插入留下的页分裂与碎片（建议低峰期执行）。
+    """
+    help = "重建继承 Base 的表，整理随机主键造成的索引碎片（MySQL: ALTER TABLE ... FORCE / SQLite: VACUUM）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help="只处理指定模型，如 account.User；默认全部 Base 子类")
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--dry-run', action='store_true', help="只打印将执行的语句")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        tables = [model._meta.db_table for model in self.get_models(options['models'])]
+        if connection.vendor == 'mysql':
+            # InnoDB 在线重建（ALGORITHM=INPLACE），期间允许并发读写
+            statements = [f'ALTER TABLE `{table}` FORCE, ALGORITHM=INPLACE, LOCK=NONE' for table in tables]
+        elif connection.vendor == 'postgresql':
+            statements = [f'REINDEX TABLE "{table}"' for table in tables]
+        elif connection.vendor == 'sqlite':
+            statements = ['VACUUM']
+        else:
+            raise CommandError(f"不支持的数据库: {connection.vendor}")
+
+        for statement in statements:
+            self.stdout.write(statement)
+            if options['dry_run']:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(statement)
+        self.stdout.write(self.style.SUCCESS(f"已处理 {len(tables)} 张表"))
+
+    @staticmethod
+    def get_models(labels):
+        if labels:
+            try:
+                models = [apps.get_model(label) for label in labels]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+        else:
+            models = apps.get_models()
+        return [model for model in models
+                if issubclass(model, Base) and model._meta.managed and not model._meta.proxy]
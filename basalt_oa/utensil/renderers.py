@@ -0,0 +1,26 @@
+from rest_framework.renderers import BaseRenderer
+
+from middlewares.fast_json.renderers import dumps
+
+
+class StreamingExportRenderer(BaseRenderer):
+    """
+    导出接口的内容协商（?format=csv / ?format=ndjson 或 Accept 头）。
+    正常响应是 StreamingHttpResponse，不经过 render；只有错误响应（401、400 等）会以 JSON 文本渲染。
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
+
+
+class CSVRenderer(StreamingExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(StreamingExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
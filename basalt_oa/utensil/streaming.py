@@ -0,0 +1,24 @@
+from django.db import connections
+
+
+def stream_queryset(queryset, chunk_size=2000):
+    """
+    单条查询、恒定内存地遍历 queryset。
+    PostgreSQL / SQLite 的 .iterator() 本身就是服务端游标；mysqlclient 默认把整个结果集读入内存，
+    这里临时切换为 SSCursor（流式读取），遍历期间同一连接上不能执行其他查询。
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql':
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    from MySQLdb.cursors import SSCursor
+
+    connection.ensure_connection()
+    raw = connection.connection
+    previous = raw.cursorclass
+    raw.cursorclass = SSCursor
+    try:
+        yield from queryset.iterator(chunk_size=chunk_size)
+    finally:
+        raw.cursorclass = previous
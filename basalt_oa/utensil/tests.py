@@ -1,3 +1,1156 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from importlib import import_module
+from dataclasses import asdict
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+from uuid import UUID
 
-# Create your tests here.
+import fakeredis
+import jwt
+import orjson
+import shortuuid
+from asgiref.sync import async_to_sync, sync_to_async
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from redis.exceptions import ResponseError
+
+from django.apps import apps
+from django.contrib.admin import ModelAdmin, site
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+
+from account.infrastructure.hashing import PasswordHashExecutor
+from account.infrastructure.jwks import KeyRingTokenBackend
+from account.infrastructure.login_recorder import LOGIN_PENDING_KEY, LOGIN_PROCESSING_INDEX, LoginRecorder
+from account.infrastructure.orm_models import User, System, Role, UserIdentifier, UserSearchToken
+from account.infrastructure.permission_cache import (
+    PERMS_VERSION_KEY, PERMS_VERSION_TIMEOUT, _user_permissions_queryset, get_user_permission_version,
+    get_user_permissions, invalidate_user_permissions
+)
+from account.infrastructure.permission_dictionary import get_permission_dictionary
+from account.infrastructure.repositories import DjangoUserRepository
+from account.infrastructure.token_store import RedisTokenStore
+from account.infrastructure.user_cache import get_cached_user_infos, set_cached_user_infos
+from account.infrastructure.tokens import RefreshToken, issue_tokens, rotate_tokens
+from account.interfaces.admin_api.async_views import (
+    AsyncLoginView, AsyncMeInfoView, AsyncMyUserInfoView, AsyncUserListView
+)
+from account.interfaces.admin_api.read_serializers import MeReadSerializer
+from account.interfaces.admin_api.views import InitSuperAdminView, UserExportView
+from account.interfaces.admin_api.throttles import LoginThrottle
+from middlewares.fast_json.parsers import ORJSONParser
+from middlewares.fast_json.renderers import Envelope, ORJSONRenderer
+from middlewares.metrics.middleware import MetricsMiddleware
+from utensil.models import UUID_RANDOM_LENGTH, UUID_TIME_LENGTH, create_uuid, uuid_created_at
+from utensil.renderers import CSVRenderer
+from utensil.throttling import SlidingWindowThrottle
+
+# 接近线上形态的数据量：多系统、每用户多角色、每角色多权限
+SYSTEM_COUNT = 4
+USERS_PER_SYSTEM = 30
+ROLES_PER_SYSTEM = 10
+ROLES_PER_USER = 5
+PERMISSIONS_PER_ROLE = 12
+DIRECT_PERMISSIONS_PER_USER = 3
+PASSWORD = 'Basalt@2025'
+
+# ACCOUNT_ASYNC_VIEWS 在导入 account 的 urls 时生效，异步视图测试直接挂载到本模块的 URLConf
+urlpatterns = [
+    path('api/account/login/', AsyncLoginView.as_view()),
+    path('api/account/myinfo/', AsyncMyUserInfoView.as_view()),
+    path('api/account/list/', AsyncUserListView.as_view()),
+    path('api/account/me/', AsyncMeInfoView.as_view()),
+]
+
+# 热点查询不允许全表扫描的表（小字典表如 account_system、django_content_type 不在此列）
+LARGE_TABLES = (
+    'account_user', 'account_user_identifier', 'account_user_search_token', 'account_user_roles',
+    'account_user_user_permissions', 'account_role_permissions', 'auth_permission',
+)
+
+
+def query_plan(sql, params=()):
+    """SQLite EXPLAIN QUERY PLAN 的 detail 列，每个节点一行"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def queryset_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return query_plan(sql, params)
+
+
+def full_scans(plan):
+    """返回计划中对大表的全表扫描（SCAN 且未走覆盖索引）"""
+    pattern = re.compile(r'^SCAN (?:TABLE )?(\w+)(?! USING (?:COVERING )?INDEX)')
+    return [line for line in plan if (match := pattern.match(line)) and match.group(1) in LARGE_TABLES]
+
+
+class HotPathDataMixin:
+    """热点接口测试的共享数据，整个 TestCase 只创建一次"""
+
+    @classmethod
+    def setUpTestData(cls):
+        content_type = ContentType.objects.get_for_model(Role)
+        permissions = Permission.objects.bulk_create([
+            Permission(content_type=content_type, codename=f'perm_{i}', name=f'perm {i}')
+            for i in range(ROLES_PER_SYSTEM * PERMISSIONS_PER_ROLE)
+        ])
+        cls.systems = [System.objects.create(code=f'sys{i}', name=f'系统{i}') for i in range(SYSTEM_COUNT)]
+        cls.users = {}
+        for s, system in enumerate(cls.systems):
+            roles = [Role.objects.create(system=system, name=f'sys{s}-role{i}') for i in range(ROLES_PER_SYSTEM)]
+            for i, role in enumerate(roles):
+                role.permissions.add(*permissions[i * PERMISSIONS_PER_ROLE:(i + 1) * PERMISSIONS_PER_ROLE])
+            cls.users[system.code] = []
+            for i in range(USERS_PER_SYSTEM):
+                user = User.objects.create_user(
+                    phone=f'13{s}{i:08d}', email=f'user{i}@sys{s}.example.com', password=PASSWORD,
+                    username=f'sys{s}-user{i}', system=system,
+                )
+                user.roles.add(*[roles[(i + k) % ROLES_PER_SYSTEM] for k in range(ROLES_PER_USER)])
+                user.user_permissions.add(*permissions[i:i + DIRECT_PERMISSIONS_PER_USER])
+                cls.users[system.code].append(user)
+        cls.system = cls.systems[0]
+        cls.user = cls.users[cls.system.code][0]
+        # 每个系统留一个已软删除用户，列表与登录均不应返回
+        User.objects.filter(pk__in=[users[-1].pk for users in cls.users.values()]).soft_delete()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')  # 与线上一样让优化器基于统计信息选择索引
+
+
+class HotEndpointQueryCountTests(HotPathDataMixin, TestCase):
+    """
+    高频接口的 SQL 条数。条数变化说明引入了 N+1 或多余查询：确认是有意为之再调整期望值。
+    同时对接口执行的每条 SELECT 做 EXPLAIN，禁止对大表全表扫描。
+    """
+
+    def setUp(self):
+        _, access = issue_tokens(self.user)
+        cache.clear()  # 冷缓存：权限、权限字典、用户信息均需回源
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def request(self, method, path, num_queries, client=None, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(client or self.client, method)(path, **kwargs)
+        self.assertEqual(response.status_code, 200, response.content)
+        executed = [query['sql'] for query in ctx.captured_queries]
+        self.assertEqual(len(executed), num_queries, '\n'.join(executed))
+        for sql in executed:
+            # 无 WHERE 的查询（如权限字典）本身就是全量读取，结果有缓存
+            if sql.startswith('SELECT') and ' WHERE ' in sql:
+                self.assertEqual(full_scans(query_plan(sql)), [], sql)
+        return response
+
+    def login(self, num_queries):
+        return self.request('post', '/api/account/login/', num_queries, client=APIClient(),
+                            data={'account': self.user.phone, 'password': PASSWORD},
+                            HTTP_X_SYSTEM_CODE=self.system.code)
+
+    def test_login_cold_cache(self):
+        # 登录标识、权限字典、有效权限、角色、outstanding token（TOKEN_STORE=database）
+        self.login(5)
+
+    def test_login_warm_cache(self):
+        self.login(5)
+        # 权限字典与有效权限已缓存
+        self.login(3)
+
+    def test_login_rejects_soft_deleted_user(self):
+        deleted = self.users[self.system.code][-1]
+        response = APIClient().post('/api/account/login/', {'account': deleted.phone, 'password': PASSWORD},
+                                    HTTP_X_SYSTEM_CODE=self.system.code)
+        self.assertEqual(response.status_code, 401)
+
+    def test_me(self):
+        # 认证、角色、权限（冷缓存）；当前用户直接复用认证时加载的行
+        response = self.request('get', '/api/account/me/', 3)
+        self.assertEqual(len(response.json()['roles']), ROLES_PER_USER)
+
+    def test_permission_version(self):
+        # 下游用 perms_ver 与权限变更事件的版本号比较：access token 与 /me/ 返回同一个 OA 版本号
+        self.assertEqual(self.client.get('/api/account/me/').json()['perms_ver'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_user_permissions([self.user.pk])
+        version = cache.get(PERMS_VERSION_KEY.format(self.user.pk))
+        self.assertTrue(version)
+        self.assertEqual(issue_tokens(self.user)[1]['perms_ver'], version)
+        self.assertEqual(self.client.get('/api/account/me/').json()['perms_ver'], version)
+
+    def test_myinfo(self):
+        response = self.request('get', '/api/account/myinfo/', 5)
+        self.assertEqual(len(response.json()['roles']), ROLES_PER_USER)
+
+    def test_user_list_is_constant_in_page_size(self):
+        # 认证、COUNT、用户+系统、角色、角色权限、直授权限：与每页条数无关
+        path = f'/api/account/list/?include=roles,permissions&system_code={self.system.pk}'
+        small = self.request('get', f'{path}&page_size=2', 6)
+        large = self.request('get', f'{path}&page_size={USERS_PER_SYSTEM}', 6)
+        self.assertEqual(len(small.json()['results']), 2)
+        self.assertEqual(len(large.json()['results']), USERS_PER_SYSTEM - 1)
+
+    def test_user_list_without_include(self):
+        self.request('get', f'/api/account/list/?system_code={self.system.pk}', 3)
+
+    def test_user_list_keyset(self):
+        first = self.request('get', '/api/account/list/?cursor=&page_size=10', 3)
+        # 总数已缓存，下一页只有认证与 seek 查询
+        self.request('get', f"/api/account/list/?cursor={first.json()['next_cursor']}&page_size=10", 2)
+
+    def test_user_list_search(self):
+        response = self.request('get', f'/api/account/list/?system_code={self.system.pk}&username=user1', 3)
+        self.assertTrue(all('user1' in user['username'] for user in response.json()['results']))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(HotPathDataMixin, TestCase):
+    """ASGI 异步视图：与同步视图的请求参数、响应结构、状态码保持一致"""
+
+    def setUp(self):
+        _, access = issue_tokens(self.user)
+        cache.clear()
+        self.headers = {'Authorization': f'Bearer {access}'}
+
+    async def login(self, client=None, **data):
+        client = client or AsyncClient()
+        return await client.post('/api/account/login/', {'account': self.user.phone, 'password': PASSWORD, **data},
+                                 content_type='application/json', headers={'X-System-Code': self.system.code})
+
+    async def test_login_is_csrf_exempt(self):
+        # 与 APIView 一致：无 CSRF cookie 的非浏览器客户端可以登录
+        response = await self.login(AsyncClient(enforce_csrf_checks=True))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['user']['uuid'], self.user.uuid)
+        self.assertIn('access', response.json())
+
+    async def test_login_malformed_body(self):
+        response = await self.async_client.post('/api/account/login/', '{"account": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertTrue(response.json()['detail'].startswith('JSON parse error'))
+        response = await self.async_client.post('/api/account/login/', 'account=1', content_type='text/plain')
+        self.assertEqual(response.status_code, 415, response.content)
+
+    async def test_login_wrong_password(self):
+        response = await self.login(password='wrong')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_login_throttled(self):
+        with mock.patch.object(LoginThrottle, 'allow_request', return_value=False), \
+                mock.patch.object(LoginThrottle, 'wait', return_value=1.2):
+            response = await self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+
+    async def test_me(self):
+        response = await self.async_client.get('/api/account/me/', headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(data['uuid'], self.user.uuid)
+        self.assertEqual(len(data['roles']), ROLES_PER_USER)
+        self.assertTrue(data['permissions'])
+        # async ORM / async cache 的结果与同步序列化一致
+        serializer = MeReadSerializer()
+        expected, = await sync_to_async(serializer.serialize)([serializer.row_from_instance(self.user)])
+        self.assertEqual(data, expected)
+
+    async def test_me_requires_token(self):
+        response = await self.async_client.get('/api/account/me/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+    async def test_metrics_count_queries(self):
+        # ORM 在 sync_to_async 的线程里执行，SQL 统计需安装在该线程的连接上
+        with mock.patch.object(MetricsMiddleware, 'record') as record:
+            await self.async_client.get('/api/account/me/', headers=self.headers)
+        stats = record.call_args.args[3]
+        self.assertEqual(stats.count, 3)  # 认证、角色、权限（冷缓存）
+        self.assertGreater(stats.duration, 0)
+
+    async def test_user_list(self):
+        response = await self.async_client.get(f'/api/account/list/?include=roles&system_code={self.system.pk}&page_size=5',
+                                         headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(data['total'], USERS_PER_SYSTEM - 1)
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(len(data['results'][0]['roles']), ROLES_PER_USER)
+
+    async def test_user_list_keyset(self):
+        first = (await self.async_client.get('/api/account/list/?cursor=&page_size=10', headers=self.headers)).json()
+        second = (await self.async_client.get(f"/api/account/list/?cursor={first['next_cursor']}&page_size=10",
+                                        headers=self.headers)).json()
+        self.assertEqual(second['page'], 2)
+        seen = {user['uuid'] for user in first['results']}
+        self.assertFalse(seen & {user['uuid'] for user in second['results']})
+
+
+class PermissionDictionaryTests(TestCase):
+    """权限位图字典：权限增删后旧版本仍可按 version 取回，已签发 token 的位图可继续解码"""
+
+    def setUp(self):
+        cache.clear()
+        self.content_type = ContentType.objects.get_for_model(Role)
+
+    def add_permission(self, codename):
+        return Permission.objects.create(content_type=self.content_type, codename=codename, name=codename)
+
+    def test_previous_version_is_kept(self):
+        old = get_permission_dictionary()
+        self.add_permission('dict_added')
+        current = get_permission_dictionary()
+        self.assertNotEqual(current['version'], old['version'])
+        self.assertEqual(get_permission_dictionary(old['version']), old)
+        self.assertEqual(get_permission_dictionary(current['version']), current)
+        self.assertIsNone(get_permission_dictionary('00000000'))
+
+    def test_view_serves_requested_version(self):
+        user = User.objects.create_user(username='dict', phone='13900000000', email='dict@example.com',
+                                        password=PASSWORD, system=System.objects.create(code='dict', name='dict'))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_tokens(user)[1]}')
+        old = get_permission_dictionary()
+        self.add_permission('dict_added')
+
+        response = client.get(f"/api/account/permissions/dictionary/?version={old['version']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['codenames'], old['codenames'])
+        self.assertIn('dict_added', client.get('/api/account/permissions/dictionary/').json()['codenames'])
+        self.assertEqual(client.get('/api/account/permissions/dictionary/?version=00000000').status_code, 404)
+
+    def test_post_migrate_invalidates(self):
+        # bulk_create 不触发 post_save，migrate 结束时的 post_migrate 负责让字典失效
+        old = get_permission_dictionary()
+        Permission.objects.bulk_create([Permission(content_type=self.content_type, codename='dict_bulk', name='bulk')])
+        self.assertEqual(get_permission_dictionary(), old)
+        emit_post_migrate_signal(0, False, 'default')
+        self.assertIn('dict_bulk', get_permission_dictionary()['codenames'])
+
+
+class RefreshTokenReuseTests(TestCase):
+    """refresh token 轮换：同一 token 只能成功刷新一次，包括并发请求都已通过吊销检查的情况"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='rotate', phone='13900000001', email='rotate@example.com',
+                                            password=PASSWORD)
+
+    def redis_store(self, **kwargs):
+        store = RedisTokenStore(**kwargs)
+        store.redis_client = fakeredis.FakeRedis()
+        return store
+
+    def assertSingleUse(self):
+        raw = str(issue_tokens(self.user)[0])
+        # 模拟两个并发刷新都在对方吊销之前通过了 check_blacklist
+        with mock.patch.object(RefreshToken, 'check_blacklist'):
+            rotate_tokens(raw)
+            with self.assertRaises(TokenError):
+                rotate_tokens(raw)
+        with self.assertRaises(TokenError):
+            rotate_tokens(raw)
+
+    def test_database_store(self):
+        self.assertSingleUse()
+
+    def test_redis_store(self):
+        with mock.patch('account.infrastructure.tokens.get_token_store', return_value=self.redis_store()):
+            self.assertSingleUse()
+
+    def test_redis_blacklist_is_atomic(self):
+        store = self.redis_store()
+        self.assertTrue(store.blacklist('jti-1', time.time() + 60))
+        self.assertFalse(store.blacklist('jti-1', time.time() + 60))
+
+    def test_bloom_right_after_startup(self):
+        # 进程刚启动（monotonic 小于同步间隔）时也要完成首次同步
+        store = self.redis_store(bloom_capacity=1000, bloom_sync_interval=5)
+        # 其他进程吊销的 jti-2
+        store.redis_client.zadd('jwt_blacklist_log', {'jti-2': int(time.time() * 1000)})
+        store.redis_client.set('jwt_blacklist:jti-2', 1)
+        with mock.patch('account.infrastructure.token_store.time.monotonic', return_value=1.0):
+            self.assertFalse(store.is_blacklisted('jti-3'))
+            self.assertTrue(store.is_blacklisted('jti-2'))
+
+
+class PasswordHashExecutorTests(SimpleTestCase):
+    """哈希子进程被杀后进程池自动重建，登录 / 注册不会一直失败"""
+
+    def setUp(self):
+        self.executor = PasswordHashExecutor(max_workers=1)
+        self.addCleanup(lambda: self.executor._pool and self.executor._pool.shutdown(cancel_futures=True))
+
+    def kill_worker(self):
+        # 子进程直接退出，模拟 OOM kill
+        pool = self.executor._get_pool()
+        with self.assertRaises(BrokenProcessPool):
+            self.executor.submit(os._exit, 1).result()
+        return pool
+
+    def test_rebuild_after_worker_killed(self):
+        pool = self.kill_worker()
+        encoded = self.executor.make_password(PASSWORD)
+        self.assertIsNot(self.executor._get_pool(), pool)
+        self.assertEqual(self.executor.check_password(PASSWORD, encoded), (True, False))
+
+    def test_async_rebuild_after_worker_killed(self):
+        self.kill_worker()
+        encoded = async_to_sync(self.executor.amake_password)(PASSWORD)
+        self.assertEqual(async_to_sync(self.executor.acheck_password)(PASSWORD, encoded), (True, False))
+
+    def test_retry_when_worker_killed_while_running(self):
+        pool = self.executor._get_pool()
+        broken = Future()
+        broken.set_exception(BrokenProcessPool())
+        with mock.patch.object(PasswordHashExecutor, '_submit', side_effect=[broken, pool.submit(abs, -1)]):
+            self.assertEqual(self.executor.run(abs, -1), 1)
+
+
+class UserInfoCacheTests(TestCase):
+    """批量用户信息缓存：失效之前读到旧行的请求晚于失效回填，也不能让旧角色 / 权限重新命中"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.system = System.objects.create(code='info', name='信息')
+        cls.user = User.objects.create_user(username='info', phone='13900000003', email='info@example.com',
+                                            password=PASSWORD, system=cls.system)
+        cls.role = Role.objects.create(system=cls.system, name='info-role')
+
+    def setUp(self):
+        cache.clear()
+        self.repository = DjangoUserRepository()
+
+    def roles(self):
+        info, = self.repository.get_many_by_ids([self.user.pk])
+        return info.roles
+
+    def test_hit(self):
+        self.assertEqual(self.roles(), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.roles(), [])
+
+    def test_late_refill_after_invalidation(self):
+        # 读请求：查库前取版本号，读到变更前的行
+        _, versions, _ = get_cached_user_infos([self.user.pk], [])
+        stale = asdict(self.repository.get_many_by_ids([self.user.pk])[0])
+        stale.pop('django_user')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.roles.add(self.role)
+        # 失效之后才回填旧行
+        set_cached_user_infos([stale], versions)
+        self.assertEqual(self.roles(), [self.role.name])
+
+    def test_soft_delete_and_delete(self):
+        self.assertEqual(self.roles(), [])  # 写入缓存
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.soft_delete()
+        self.assertEqual(self.repository.get_many_by_ids([self.user.pk]), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.all_objects.filter(pk=self.user.pk).restore()
+        self.assertEqual(self.roles(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).soft_delete()
+        self.assertEqual(self.repository.get_many_by_ids([self.user.pk]), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.all_objects.filter(pk=self.user.pk).restore()
+        self.assertEqual(self.roles(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.all_objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.repository.get_many_by_ids([self.user.pk]), [])
+
+
+class UserBatchViewTests(TestCase):
+    """批量用户信息只对后台管理员与持有 view_user 的服务账号开放，单次数量与列表分页上限一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.system = System.objects.create(code='batch', name='批量')
+        cls.user = User.objects.create_user(username='batch', phone='13900000010', email='batch@example.com',
+                                            password=PASSWORD, system=cls.system)
+        cls.service = User.objects.create_user(username='service', phone='13900000011', password=PASSWORD,
+                                               system=cls.system)
+        cls.service.user_permissions.add(Permission.objects.get(codename='view_user'))
+        cls.staff = User.objects.create_user(username='staff', phone='13900000012', password=PASSWORD,
+                                             system=cls.system, is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, user, uuids):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_tokens(user)[1]}')
+        return client.post('/api/account/users/batch/', {'uuids': uuids}, format='json')
+
+    def test_requires_service_or_admin(self):
+        self.assertEqual(self.post(self.user, [self.user.pk]).status_code, 403)
+        for caller in (self.service, self.staff):
+            response = self.post(caller, [self.user.pk])
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual([row['uuid'] for row in response.json()['results']], [self.user.pk])
+
+    def test_batch_limit(self):
+        self.assertEqual(self.post(self.staff, [self.user.pk] * 100).status_code, 200)
+        self.assertEqual(self.post(self.staff, [self.user.pk] * 101).status_code, 400)
+
+
+class AccountThrottle(SlidingWindowThrottle):
+    """只按一个维度计数（login_account：10/min）"""
+
+    def get_rules(self, request, view):
+        return [('throttle:test:account', 'login_account')]
+
+
+class SlidingWindowThrottleTests(TestCase):
+    """Lua 滑动窗口在 Redis 替身上的行为：超限拒绝、窗口滑过后放行、Retry-After"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.now = 1700000000.0
+        # fakeredis 的 TIME 与过期时间都取 time.time()
+        clock = mock.patch('time.time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def throttle(self, cls=AccountThrottle):
+        throttle = cls()
+        throttle.redis_client = self.redis
+        return throttle
+
+    def test_limit(self):
+        for _ in range(10):
+            self.assertTrue(self.throttle().allow_request(None, None))
+        throttle = self.throttle()
+        self.assertFalse(throttle.allow_request(None, None))
+        self.assertEqual(throttle.wait(), 60)
+        # 被拒绝的请求不计数
+        self.assertEqual(self.redis.zcard('throttle:test:account'), 10)
+
+    def test_window_rollover(self):
+        for i in range(10):
+            self.now += 1
+            self.assertTrue(self.throttle().allow_request(None, None))
+        # 最早一次请求在 41 秒后滑出窗口
+        self.now += 10
+        throttle = self.throttle()
+        self.assertFalse(throttle.allow_request(None, None))
+        self.assertEqual(throttle.wait(), 41)
+        self.now += 41
+        self.assertTrue(self.throttle().allow_request(None, None))
+        self.assertFalse(self.throttle().allow_request(None, None))
+
+    def test_login_retry_after(self):
+        data = {'account': '13900000009', 'password': 'wrong'}
+        with mock.patch.object(LoginThrottle, 'redis_client', self.redis):
+            for _ in range(10):
+                self.assertEqual(APIClient().post('/api/account/login/', data).status_code, 401)
+            self.now += 20.5
+            response = APIClient().post('/api/account/login/', data)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '40')
+
+    def test_redis_unavailable_fails_open(self):
+        server = fakeredis.FakeServer()
+        server.connected = False
+        throttle = self.throttle()
+        throttle.redis_client = fakeredis.FakeRedis(server=server)
+        self.assertTrue(throttle.allow_request(None, None))
+
+    def test_script_error_raises(self):
+        self.redis.set('throttle:test:account', 'not a zset')
+        with self.assertRaises(ResponseError):
+            self.throttle().allow_request(None, None)
+
+
+class PermissionVersionSignalTests(TestCase):
+    """影响有效权限 / 启用状态的写入都要在事务提交后写入新的 user_perms_ver，否则缓存与下游 token 不会失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        content_type = ContentType.objects.get_for_model(Role)
+        cls.permission = Permission.objects.create(content_type=content_type, codename='signal_perm', name='signal')
+        cls.system = System.objects.create(code='signal', name='信号')
+        cls.user = User.objects.create_user(username='signal', phone='13900000004', email='signal@example.com',
+                                            password=PASSWORD, system=cls.system)
+        cls.other = User.objects.create_user(username='signal2', phone='13900000005', email='signal2@example.com',
+                                             password=PASSWORD, system=cls.system)
+        cls.role = Role.objects.create(system=cls.system, name='signal-role')
+
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def assertBumps(self, *users):
+        before = {user.pk: get_user_permission_version(user.pk) for user in users}
+        with self.captureOnCommitCallbacks(execute=True):
+            yield
+        for user in users:
+            self.assertGreater(get_user_permission_version(user.pk), before[user.pk], user.username)
+
+    def test_user_roles(self):
+        with self.assertBumps(self.user):
+            self.user.roles.add(self.role)
+        with self.assertBumps(self.user):
+            self.user.roles.remove(self.role)
+        with self.assertBumps(self.user, self.other):
+            self.role.users.add(self.user, self.other)
+        with self.assertBumps(self.user, self.other):
+            self.role.users.clear()
+
+    def test_user_permissions(self):
+        with self.assertBumps(self.user):
+            self.user.user_permissions.add(self.permission)
+        with self.assertBumps(self.user):
+            self.user.user_permissions.clear()
+        with self.assertBumps(self.user):
+            self.permission.user_set.add(self.user)
+        with self.assertBumps(self.user):
+            self.permission.user_set.remove(self.user)
+
+    def test_role_permissions(self):
+        self.role.users.add(self.user, self.other)
+        self.assertNotIn('signal_perm', get_user_permissions(self.user.pk))
+        with self.assertBumps(self.user, self.other):
+            self.role.permissions.add(self.permission)
+        self.assertIn('signal_perm', get_user_permissions(self.user.pk))
+        with self.assertBumps(self.user, self.other):
+            self.permission.custom_roles.clear()
+        self.assertNotIn('signal_perm', get_user_permissions(self.user.pk))
+
+    def test_role_deleted(self):
+        self.role.users.add(self.user)
+        with self.assertBumps(self.user):
+            self.role.soft_delete()
+        with self.assertBumps(self.user):
+            self.role.restore()
+        with self.assertBumps(self.user):
+            Role.objects.filter(pk=self.role.pk).soft_delete()
+        with self.assertBumps(self.user):
+            self.role.delete()
+
+    def test_is_active(self):
+        with self.assertBumps(self.user):
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+        with self.assertBumps(self.other):
+            User.objects.filter(pk=self.other.pk).soft_delete()
+        # 与权限无关的字段不写版本号
+        version = get_user_permission_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+        self.assertEqual(get_user_permission_version(self.user.pk), version)
+
+    def test_version_key_expires(self):
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            with self.assertBumps(self.user):
+                self.user.roles.add(self.role)
+        self.assertIn(mock.call({PERMS_VERSION_KEY.format(self.user.pk): mock.ANY}, timeout=PERMS_VERSION_TIMEOUT),
+                      set_many.call_args_list)
+
+
+class SearchTokenBackfillTests(TestCase):
+    """0004 之前已存在的用户由 0007 补齐检索 Token，子串检索不会漏掉他们"""
+
+    def test_backfill_existing_users(self):
+        system = System.objects.create(code='search', name='检索')
+        user = User.objects.create_user(username='backfill-user', phone='13900000006', email='backfill@example.com',
+                                        password=PASSWORD, system=system)
+        UserSearchToken.objects.all().delete()  # 迁移前的用户没有 Token
+        repository = DjangoUserRepository()
+        self.assertFalse(repository.filter_user(system=system.pk, username='fill').exists())
+
+        backfill = import_module('account.migrations.0007_backfill_user_search_token').backfill_search_tokens
+        backfill(apps, None)
+        backfill(apps, None)  # 重复执行不冲突
+        self.assertEqual(list(repository.filter_user(system=system.pk, username='fill').values_list('uuid', flat=True)),
+                         [user.pk])
+
+
+class KeyRingLegacyTokenTests(SimpleTestCase):
+    """从 HS256 切换到 RS256 的过渡期：切换前签发的无 kid token 在 refresh token 有效期内仍可用"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_pem = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+
+    def setUp(self):
+        self.since = time.time()
+        self.legacy = TokenBackend('HS256', signing_key='legacy-secret')
+
+    def backend(self, legacy=True):
+        options = {'legacy_backend': self.legacy, 'legacy_issued_before': self.since,
+                   'legacy_until': self.since + 3600} if legacy else {}
+        return KeyRingTokenBackend({'k1': self.private_pem}, 'k1', **options)
+
+    def legacy_token(self, iat):
+        return self.legacy.encode({'iat': int(iat), 'exp': int(iat) + 7200, 'unified_uuid': 'legacy'})
+
+    def test_new_tokens_carry_kid(self):
+        token = self.backend().encode({'exp': int(self.since) + 60, 'unified_uuid': 'new'})
+        self.assertEqual(jwt.get_unverified_header(token)['kid'], 'k1')
+        self.assertEqual(self.backend().decode(token)['unified_uuid'], 'new')
+
+    def test_legacy_token_issued_before_switch(self):
+        self.assertEqual(self.backend().decode(self.legacy_token(self.since - 10))['unified_uuid'], 'legacy')
+
+    def test_legacy_token_issued_after_switch(self):
+        with self.assertRaises(TokenBackendError):
+            self.backend().decode(self.legacy_token(self.since + 10))
+
+    def test_legacy_window_closed(self):
+        token = self.legacy_token(self.since - 10)
+        with mock.patch('account.infrastructure.jwks.time.time', return_value=self.since + 3601):
+            with self.assertRaises(TokenBackendError):
+                self.backend().decode(token)
+
+    def test_legacy_not_configured(self):
+        with self.assertRaises(TokenBackendError):
+            self.backend(legacy=False).decode(self.legacy_token(self.since - 10))
+
+
+class SoftDeleteManagerTests(TestCase):
+    """objects 只返回未删除数据；默认 / 基础管理器、反向关联与 M2M 仍返回全部数据"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.system = System.objects.create(code='soft', name='软删除')
+        cls.user = User.objects.create_user(username='soft', phone='13900000007', email='soft@example.com',
+                                            password=PASSWORD, system=cls.system)
+        cls.alive_role = Role.objects.create(system=cls.system, name='soft-alive')
+        cls.deleted_role = Role.objects.create(system=cls.system, name='soft-deleted')
+        cls.user.roles.add(cls.alive_role, cls.deleted_role)
+        cls.deleted_role.soft_delete()
+
+    def test_managers(self):
+        self.assertEqual(list(Role.objects.filter(system=self.system)), [self.alive_role])
+        self.assertEqual(Role.all_objects.filter(system=self.system).count(), 2)
+        for model in (User, System, Role):
+            self.assertEqual(model._default_manager.name, 'all_objects')
+            self.assertEqual(model._base_manager.name, 'all_objects')
+
+    def test_related_managers_include_deleted(self):
+        self.assertCountEqual(self.system.roles.all(), [self.alive_role, self.deleted_role])
+        self.assertCountEqual(self.user.roles.all(), [self.alive_role, self.deleted_role])
+        self.assertEqual(list(self.user.roles.alive()), [self.alive_role])
+        self.assertEqual(list(self.deleted_role.users.all()), [self.user])
+
+    def test_admin_changelist_includes_deleted(self):
+        request = APIRequestFactory().get('/admin/account/role/')
+        queryset = ModelAdmin(Role, site).get_queryset(request).filter(system=self.system)
+        self.assertCountEqual(queryset, [self.alive_role, self.deleted_role])
+
+    def test_deleted_roles_hidden_from_user_info(self):
+        repository = DjangoUserRepository()
+        self.assertEqual(repository.get_by_id(self.user.pk).roles, ['soft-alive'])
+        self.assertEqual(repository.get_many_by_ids([self.user.pk])[0].roles, ['soft-alive'])
+        self.assertEqual(issue_tokens(self.user)[1]['roles'], [self.alive_role.pk])
+
+
+class InitSuperAdminTests(TestCase):
+    """已软删除的超级管理员 / 用户仍占用唯一约束：初始化返回 400，而不是 IntegrityError"""
+
+    def post(self, **data):
+        request = APIRequestFactory().post('/api/account/init/', data, format='json')
+        return InitSuperAdminView.as_view()(request)
+
+    def test_create(self):
+        response = self.post(email='admin@example.com', phone='13900000008')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(phone='13900000008').is_superuser)
+        self.assertEqual(self.post(email='admin2@example.com', phone='13900000009').status_code, 400)
+
+    def test_soft_deleted_superuser(self):
+        self.post(email='admin@example.com', phone='13900000008')
+        User.objects.filter(phone='13900000008').soft_delete()
+        System.objects.filter(code='default').soft_delete()
+        response = self.post(email='admin@example.com', phone='13900000008')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], '超级管理员已存在')
+
+    def test_soft_deleted_user_with_same_phone(self):
+        User.objects.create_user(username='taken', phone='13900000008', password=PASSWORD)
+        User.objects.filter(phone='13900000008').soft_delete()
+        response = self.post(email='admin@example.com', phone='13900000008')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.all_objects.filter(is_superuser=True).count(), 0)
+
+    def test_soft_deleted_default_system_is_reused(self):
+        system = System.objects.create(code='default', name='默认系统')
+        system.soft_delete()
+        self.assertEqual(self.post(email='admin@example.com', phone='13900000008').status_code, 201)
+        self.assertEqual(User.objects.get(phone='13900000008').system_id, system.pk)
+
+
+class ImportUsersCommandTests(TestCase):
+    """import_users：email 大小写不敏感去重、无 email 且无手机号的行、跨批次去重与断点续传"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.system = System.objects.create(code='import', name='导入')
+        cls.role = Role.objects.create(system=cls.system, name='import-role')
+        User.objects.create_user(username='taken', phone='13900000020', email='Taken@Example.com',
+                                 password=PASSWORD, system=cls.system)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        # 进程池换成线程池：测试库为 SQLite 内存库，哈希结果与进程池一致
+        patcher = mock.patch('utensil.management.commands.import_users.new_hash_pool', ThreadPoolExecutor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_import(self, name, content, **options):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        call_command('import_users', path, system='import', workers=1, stdout=StringIO(), **options)
+        with open(f'{path}.checkpoint') as f:
+            return json.load(f)
+
+    def imported(self):
+        return User.objects.filter(system=self.system).exclude(username='taken')
+
+    def test_email_dedup_is_case_insensitive(self):
+        state = self.run_import('users.csv', (
+            'username,email,phone,password,roles\n'
+            'a,Taken@Example.com,,pw,\n'  # 与已有用户重复（保留大小写存储）
+            'b,taken@example.com,,pw,\n'
+            'c,New@Example.com,,pw,import-role\n'
+            'd,new@EXAMPLE.com,,pw,\n'  # 与上一行仅大小写不同
+        ), batch_size=10)
+        self.assertEqual(state, {'rows': 4, 'created': 1, 'skipped': 3})
+        user = self.imported().get()
+        self.assertEqual((user.username, user.email), ('c', 'new@example.com'))
+        self.assertEqual(list(user.roles.all()), [self.role])
+        self.assertTrue(user.check_password('pw'))
+
+    def test_rows_without_email_and_phone_are_skipped(self):
+        state = self.run_import('users.csv', (
+            'username,email,phone,password,roles\n'
+            'nobody,,,pw,\n'
+            'phone-only,,13900000021,pw,\n'
+        ))
+        self.assertEqual(state, {'rows': 2, 'created': 1, 'skipped': 1})
+        self.assertEqual(list(self.imported().values_list('username', flat=True)), ['phone-only'])
+
+    def test_batch_boundaries(self):
+        rows = [{'username': f'u{i}', 'phone': f'1390000010{i}', 'password': 'pw'} for i in range(5)]
+        rows.insert(2, {'username': 'dup', 'email': 'U1@example.com', 'phone': rows[1]['phone']})  # 与上一批重复
+        rows.append({'username': 'dup-email', 'email': 'u@example.com'})
+        rows.append({'username': 'dup-email-2', 'email': 'U@example.com'})  # 同批内仅大小写不同
+        content = '\n'.join(json.dumps(row) for row in rows) + '\n\n'  # 末尾空行不计入
+        state = self.run_import('users.ndjson', content, batch_size=2)
+        self.assertEqual(state, {'rows': 8, 'created': 6, 'skipped': 2})
+        self.assertCountEqual(self.imported().values_list('username', flat=True),
+                              ['u0', 'u1', 'u2', 'u3', 'u4', 'dup-email'])
+
+        # 断点续传：已处理的行不再读取
+        with open(os.path.join(self.directory, 'users.ndjson'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'username': 'late', 'phone': '13900000109'}) + '\n')
+        path = os.path.join(self.directory, 'users.ndjson')
+        call_command('import_users', path, system='import', workers=1, batch_size=2, stdout=StringIO())
+        with open(f'{path}.checkpoint') as f:
+            self.assertEqual(json.load(f), {'rows': 9, 'created': 7, 'skipped': 2})
+
+    def test_blank_ndjson_lines_are_ignored(self):
+        content = '\n' + json.dumps({'username': 'x', 'phone': '13900000110'}) + '\n  \n\n'
+        state = self.run_import('users.ndjson', content)
+        self.assertEqual(state, {'rows': 1, 'created': 1, 'skipped': 0})
+
+
+class UserExportViewTests(TestCase):
+    """导出：CSV / NDJSON 分块流式输出，?format= 优先于 Accept，错误响应仍以 JSON 文本返回"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.system = System.objects.create(code='export', name='导出')
+        cls.users = [User.objects.create_user(username=f'export{i}', phone=f'1390000030{i}', email=f'e{i}@example.com',
+                                              password=PASSWORD, system=cls.system) for i in range(5)]
+        cls.users[-1].soft_delete()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_tokens(self.users[0])[1]}')
+        patcher = mock.patch.object(UserExportView, 'rows_per_chunk', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def export(self, fmt=None, client=None, **extra):
+        query = f'?system_code={self.system.pk}' + (f'&format={fmt}' if fmt else '')
+        return (client or self.client).get(f'/api/account/users/export/{query}', **extra)
+
+    def test_csv(self):
+        response = self.export('csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)  # 4 行，每块 2 行 + 末尾剩余（表头计入第一块）
+        rows = list(csv.reader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual(rows[0], [column for column, _ in UserExportView.EXPORT_FIELDS])
+        self.assertCountEqual([row[2] for row in rows[1:]], ['export0', 'export1', 'export2', 'export3'])
+        created_at = rows[1][-1]
+        self.assertRegex(created_at, r'^\d{4}-\d{2}-\d{2}T')
+
+    def test_ndjson(self):
+        response = self.export('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 2)
+        lines = b''.join(chunks).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertCountEqual([record['username'] for record in records], ['export0', 'export1', 'export2', 'export3'])
+        self.assertEqual(records[0]['system_code'], 'export')
+        self.assertIs(records[0]['is_active'], True)
+
+    def test_format_override(self):
+        # ?format= 选定渲染器（Accept 需兼容，浏览器的 */* 即可）；未指定时按 Accept 内容协商
+        response = self.export('ndjson', HTTP_ACCEPT='text/html,*/*;q=0.8')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        response = self.export(HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(self.export()['Content-Type'], 'text/csv')  # 默认第一个渲染器
+        self.assertEqual(self.export('xml').status_code, 404)
+        # 与 Accept 冲突：406，错误信息以 JSON 文本返回
+        response = self.export('ndjson', HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 406)
+        self.assertIn('detail', json.loads(response.content))
+
+    def test_error_body(self):
+        response = self.export('csv', client=APIClient())
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(json.loads(response.content), {'detail': '身份认证信息未提供。'})
+        self.assertEqual(CSVRenderer().render(None), b'')
+
+
+class FastJSONTests(SimpleTestCase):
+    """orjson 渲染 / 解析与 DRF JSONRenderer / JSONParser 的兼容性"""
+
+    def parse(self, body, encoding='utf-8'):
+        return ORJSONParser().parse(BytesIO(body), parser_context={'encoding': encoding})
+
+    def test_parser_rejects_nan(self):
+        for body in (b'{"a": NaN}', b'{"a": Infinity}', b'[-Infinity]', b'{"a": '):
+            with self.subTest(body=body), self.assertRaises(ParseError) as ctx:
+                self.parse(body)
+            self.assertTrue(str(ctx.exception.detail).startswith('JSON parse error'))
+        self.assertEqual(self.parse('{"名称": 1.5}'.encode()), {'名称': 1.5})
+        self.assertEqual(self.parse('{"a": "é"}'.encode('latin-1'), encoding='latin-1'), {'a': 'é'})
+        with self.assertRaises(ParseError):
+            self.parse(b'{"a": "\xff"}')
+
+    def test_non_str_keys_retry(self):
+        with self.assertRaises(orjson.JSONEncodeError):
+            orjson.dumps({1: 'a'})
+        self.assertEqual(ORJSONRenderer().render({1: 'a', 'b': {2: None}}), b'{"1":"a","b":{"2":null}}')
+
+    def test_indent(self):
+        renderer = ORJSONRenderer()
+        data = {'a': [1]}
+        self.assertEqual(renderer.render(data, 'application/json'), b'{"a":[1]}')
+        self.assertEqual(renderer.render(data, 'application/json; indent=0'), b'{"a":[1]}')
+        self.assertEqual(renderer.render(data, 'application/json; indent=4'), b'{\n  "a": [\n    1\n  ]\n}')
+        self.assertEqual(renderer.render(data, None, {'indent': 4}), b'{\n  "a": [\n    1\n  ]\n}')
+        self.assertEqual(renderer.render(None), b'')
+
+    def test_envelope_matches_json_renderer(self):
+        # 与改用 Envelope 之前 MyBaseAPIView.msg / 分页返回的 dict 经 DRF JSONRenderer 渲染的字节一致
+        # （datetime 取整秒：orjson 保留微秒，DRF 截断为毫秒）
+        created_at = datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        data = {'uuid': UUID('12345678-1234-5678-1234-567812345678'), '名称': '用户', 'created_at': created_at,
+                'amount': Decimal('1.5'), 'tags': ('a', 'b'), 'empty': None}
+        cases = [
+            (Envelope.msg(200, '成功', data), {'code': 200, 'msg': '成功', 'data': data}),
+            (Envelope.msg('x', '错误'), {'code': 50000, 'msg': '错误'}),
+            (Envelope.msg('404', None, [], extra=1), {'code': 404, 'msg': None, 'data': [], 'extra': 1}),
+            (Envelope.page([data], total=1, page=1, page_size=10, total_pages=1, next_cursor=None),
+             {'code': 200, 'total': 1, 'page': 1, 'page_size': 10, 'total_pages': 1, 'next_cursor': None,
+              'results': [data]}),
+        ]
+        for envelope, legacy in cases:
+            with self.subTest(legacy=legacy):
+                self.assertEqual(ORJSONRenderer().render(envelope), JSONRenderer().render(legacy))
+                self.assertEqual(dict(envelope), legacy)
+
+
+class CreateUUIDTests(SimpleTestCase):
+    """create_uuid：按毫秒时间戳有序（二进制与大小写不敏感排序一致），同一毫秒内不重复"""
+
+    def test_unique_within_one_millisecond(self):
+        with mock.patch('time.time_ns', return_value=1_700_000_000_123_456_789):
+            ids = [create_uuid() for _ in range(10000)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual({len(value) for value in ids}, {UUID_TIME_LENGTH + UUID_RANDOM_LENGTH})
+        self.assertEqual(len({value[:UUID_TIME_LENGTH] for value in ids}), 1)
+        self.assertEqual(len({value.lower() for value in ids}), len(ids))  # 大小写不敏感的排序规则下仍唯一
+
+    def test_time_ordered(self):
+        base = 1_700_000_000_000
+        # 覆盖末位进位（32 进制）与更高位进位
+        offsets = [0, 1, 31, 32, 33, 1023, 1024, 32 ** 3, 86_400_000, 10 * 365 * 86_400_000]
+        ids = []
+        for offset in offsets:
+            with mock.patch('time.time_ns', return_value=(base + offset) * 1_000_000):
+                ids.append(create_uuid())
+        self.assertEqual(sorted(ids), ids)
+        self.assertEqual(sorted(ids, key=str.lower), ids)
+        self.assertEqual([uuid_created_at(value) for value in ids],
+                         [datetime.fromtimestamp((base + offset) / 1000, tz=dt_timezone.utc) for offset in offsets])
+
+    def test_legacy_shortuuid(self):
+        self.assertIsNone(uuid_created_at(shortuuid.uuid()))
+
+
+class WorkerKilled(BaseException):
+    """模拟进程在取走批次之后、UPDATE 提交之前被杀掉（不经过任何 except Exception 分支）"""
+
+
+class LoginRecorderTests(TestCase):
+    """redis 后端的 last_login 写回：批次在 UPDATE 提交前被杀掉也不丢数据"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='login', phone='13900000002', email='login@example.com',
+                                            password=PASSWORD)
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+
+    def recorder(self, **kwargs):
+        recorder = LoginRecorder(backend='redis', **kwargs)
+        recorder.redis_client = self.redis
+        recorder._ensure_worker = lambda: None
+        return recorder
+
+    def test_flush_releases_batch_after_write(self):
+        recorder = self.recorder()
+        recorder.record(self.user.pk, 1700000000)
+        self.assertEqual(recorder.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login.timestamp(), 1700000000)
+        self.assertEqual(self.redis.keys('login_pending*'), [])
+
+    def test_killed_worker_batch_is_recovered(self):
+        recorder = self.recorder()
+        recorder.record(self.user.pk, 1700000000)
+        with mock.patch.object(LoginRecorder, 'write', side_effect=WorkerKilled):
+            with self.assertRaises(WorkerKilled):
+                recorder.flush()
+        self.assertEqual(self.redis.zcard(LOGIN_PROCESSING_INDEX), 1)
+
+        # 租期内批次可能仍在另一进程写回中，不能被取走
+        survivor = self.recorder()
+        self.assertEqual(survivor.flush(), 0)
+
+        # 之后的新登录时间较旧时保留批次中的较新值
+        survivor.record(self.user.pk, 1600000000)
+        survivor.processing_timeout = 0
+        self.assertEqual(survivor.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login.timestamp(), 1700000000)
+        self.assertEqual(self.redis.keys('login_pending*'), [])
+
+    def test_failed_write_restores_pending(self):
+        recorder = self.recorder()
+        recorder.record(self.user.pk, 1700000000)
+        with mock.patch.object(LoginRecorder, 'write', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                recorder.flush()
+        self.assertEqual(self.redis.hgetall(LOGIN_PENDING_KEY), {str(self.user.pk).encode(): b'1700000000.0'})
+        self.assertEqual(self.redis.zcard(LOGIN_PROCESSING_INDEX), 0)
+
+
+class HotQueryPlanTests(HotPathDataMixin, TestCase):
+    """
+    热点查询的执行计划快照（SQLite）。计划变化时先确认没有退化为全表扫描或额外排序，再更新快照。
+    """
+    maxDiff = None
+
+    def assertPlan(self, queryset, expected):
+        plan = queryset_plan(queryset)
+        self.assertEqual(full_scans(plan), [])
+        self.assertEqual(plan, expected)
+
+    def test_login_lookup(self):
+        queryset = (UserIdentifier.objects.select_related('user', 'system')
+                    .filter(system__code=self.system.code, identifier_type='phone', normalized_value=self.user.phone))
+        self.assertPlan(queryset, [
+            'SEARCH account_system USING INDEX sqlite_autoindex_account_system_3 (code=?)',
+            'SEARCH account_user_identifier USING INDEX sqlite_autoindex_account_user_identifier_1 '
+            '(system_id=? AND identifier_type=? AND normalized_value=?)',
+            'SEARCH account_user USING INDEX sqlite_autoindex_account_user_4 (uuid=?)',
+        ])
+
+    def test_token_user_lookup(self):
+        self.assertPlan(User.objects.filter(unified_uuid=self.user.unified_uuid), [
+            'SEARCH account_user USING INDEX sqlite_autoindex_account_user_1 (unified_uuid=?)',
+        ])
+
+    def test_user_list(self):
+        # 未删除用户按创建时间倒序：索引范围扫描，无额外排序
+        self.assertPlan(DjangoUserRepository().filter_user()[:20], [
+            'SEARCH account_user USING INDEX account_user_alive_created_idx (is_deleted=?)',
+        ])
+
+    def test_user_list_by_system(self):
+        self.assertPlan(DjangoUserRepository().filter_user(system=self.system.pk)[:20], [
+            'SEARCH account_user USING INDEX account_user_alive_system_idx (is_deleted=? AND system_id=?)',
+        ])
+
+    def test_user_list_by_role(self):
+        # 优化器按角色覆盖的用户比例选择驱动表，只约束不全表扫描、不额外排序
+        role = self.user.roles.first()
+        plan = queryset_plan(DjangoUserRepository().filter_user(role_id=role.pk)[:20])
+        self.assertEqual(full_scans(plan), [])
+        self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_user_list_search(self):
+        plan = queryset_plan(DjangoUserRepository().filter_user(system=self.system.pk, username='user1')[:20])
+        self.assertEqual(full_scans(plan), [])
+        self.assertIn('SEARCH U0 USING COVERING INDEX account_search_token_idx (field=? AND token=? AND system_id=?)',
+                      plan)
+
+    def test_permission_resolution(self):
+        # 直授 / 角色两路均从用户 ID 出发，不扫描 auth_permission
+        self.assertPlan(_user_permissions_queryset(self.user.pk), [
+            'COMPOUND QUERY',
+            'LEFT-MOST SUBQUERY',
+            'SEARCH account_user_user_permissions USING COVERING INDEX '
+            'account_user_user_permissions_user_id_permission_id_48bdd28b_uniq (user_id=?)',
+            'SEARCH auth_permission USING INTEGER PRIMARY KEY (rowid=?)',
+            'UNION USING TEMP B-TREE',
+            'SEARCH account_user_roles USING COVERING INDEX account_user_roles_user_id_role_id_3e4e22bf_uniq (user_id=?)',
+            'SEARCH account_role USING INDEX sqlite_autoindex_account_role_2 (uuid=?)',
+            'SEARCH account_role_permissions USING COVERING INDEX '
+            'account_role_permissions_role_id_permission_id_fdab369a_uniq (role_id=?)',
+            'SEARCH auth_permission USING INTEGER PRIMARY KEY (rowid=?)',
+        ])
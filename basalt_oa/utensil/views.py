@@ -1,6 +1,18 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+import math
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
 
+from middlewares.fast_json.renderers import Envelope
+
 
 # Create your views here.
 
@@ -12,11 +24,135 @@ class CustomPagination(PageNumberPagination):
     max_page_size = 100
 
     def get_paginated_response(self, data):
-        return Response({
-            "code": 200,
-            "total": self.page.paginator.count,
-            "page": self.page.number,
-            "page_size": self.get_page_size(self.request),
-            "total_pages": self.page.paginator.num_pages,
-            "results": data
-        })
+        return Response(Envelope.page(
+            data,
+            total=self.page.paginator.count,
+            page=self.page.number,
+            page_size=self.get_page_size(self.request),
+            total_pages=self.page.paginator.num_pages,
+        ))
+
+    async def apaginate_queryset(self, queryset, request):
+        """异步分页（ASGI 视图使用），结果与 paginate_queryset 一致，可直接调用 get_paginated_response"""
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = Paginator([], page_size)
+        paginator.count = await queryset.acount()
+        try:
+            number = paginator.validate_number(request.query_params.get(self.page_query_param) or 1)
+        except Exception:
+            raise NotFound('无效的页码')
+        bottom = (number - 1) * page_size
+        object_list = [obj async for obj in queryset[bottom:bottom + page_size]]
+        self.page = Page(object_list, number, paginator)
+        return object_list
+
+
+# 游标分页：按 (created_at, uuid) 倒序做 keyset 定位，第 N 页与第 1 页开销相同
+class KeysetPagination(BasePagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'with_total'  # ?with_total=0 跳过总数统计
+    total_cache_timeout = 60  # 总数按过滤条件缓存，短 TTL
+    ignored_filter_params = ('cursor', 'page', 'page_size', 'with_total', 'include')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.page_number = cursor['p'] if cursor else 1
+        self.total = self.get_total(queryset, request) if self.total_enabled(request) else None
+
+        queryset = self._seek(queryset, cursor)
+        rows = list(queryset[:self.page_size_value + 1])
+        return self._build_page(rows)
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset 的异步版本"""
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        self.page_number = cursor['p'] if cursor else 1
+        self.total = await self.aget_total(queryset, request) if self.total_enabled(request) else None
+
+        queryset = self._seek(queryset, cursor)
+        rows = [obj async for obj in queryset[:self.page_size_value + 1]]
+        return self._build_page(rows)
+
+    def _build_page(self, rows):
+        page, has_next = rows[:self.page_size_value], len(rows) > self.page_size_value
+        self.next_cursor = self.encode_cursor(page[-1], self.page_number + 1) if has_next else None
+        return page
+
+    def get_paginated_response(self, data):
+        total_pages = math.ceil(self.total / self.page_size_value) if self.total is not None else None
+        return Response(Envelope.page(
+            data,
+            total=self.total,
+            page=self.page_number,
+            page_size=self.page_size_value,
+            total_pages=total_pages,
+            next_cursor=self.next_cursor,
+        ))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def total_enabled(self, request):
+        return request.query_params.get(self.total_query_param, '1') not in ('0', 'false')
+
+    @staticmethod
+    def _seek(queryset, cursor):
+        queryset = queryset.order_by('-created_at', '-uuid')
+        if cursor:
+            created_at = parse_datetime(cursor['t'])
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, uuid__lt=cursor['u']))
+        return queryset
+
+    def total_cache_key(self, request):
+        filters = sorted(
+            (key, value) for key, value in request.query_params.items() if key not in self.ignored_filter_params
+        )
+        digest = hashlib.md5(json.dumps([request.path, filters]).encode()).hexdigest()
+        return f'page_total:{digest}'
+
+    def get_total(self, queryset, request):
+        cache_key = self.total_cache_key(request)
+        total = cache.get(cache_key)
+        if total is None:
+            total = queryset.count()
+            cache.set(cache_key, total, timeout=self.total_cache_timeout)
+        return total
+
+    async def aget_total(self, queryset, request):
+        cache_key = self.total_cache_key(request)
+        total = await cache.aget(cache_key)
+        if total is None:
+            total = await queryset.acount()
+            await cache.aset(cache_key, total, timeout=self.total_cache_timeout)
+        return total
+
+    @staticmethod
+    def encode_cursor(obj, page_number):
+        # obj 为模型实例或 .values() 投影行
+        created_at, uuid = (obj['created_at'], obj['uuid']) if isinstance(obj, dict) else (obj.created_at, obj.uuid)
+        payload = json.dumps({"t": created_at.isoformat(), "u": uuid, "p": page_number})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(value):
+        if not value:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(value.encode()).decode())
+            if parse_datetime(cursor['t']) is None:
+                raise ValueError(cursor['t'])
+            return {"t": cursor['t'], "u": str(cursor['u']), "p": int(cursor['p'])}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('无效的 cursor')
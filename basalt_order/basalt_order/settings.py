@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'middlewares.metrics.middleware.MetricsMiddleware',  # ✅ 放在最前，统计完整请求耗时
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -120,3 +121,48 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'middlewares.user_integration.authentication.RemoteJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'middlewares.fast_json.renderers.ORJSONRenderer',  # ✅ orjson 序列化响应
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'middlewares.fast_json.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# ------------------------------------------------ 其他系统路由 ---------------------------------------------------------------
+ACCOUNT_API_HOST = "http://localhost:8000"
+ACCOUNT_JWKS_URL = f"{ACCOUNT_API_HOST}/api/account/jwks/"  # OA 公钥集合，本地验签带 kid 的 RS256 token
+# OA 未配置 JWT_ACTIVE_KID 时签发无 kid 的 HS256 token，本服务不持有其密钥，改由 OA /me/ 校验
+ACCOUNT_API_POOL = {
+    'POOL_SIZE': 10,  # 每个 worker 到 OA 的最大长连接数
+    'TIMEOUT': 5,
+    'POOL_TIMEOUT': 2,  # 连接池已满时等待空闲连接的最长秒数，超时视为 OA 不可用
+}
+# 进程内 token 缓存（已验签的 claims）
+TOKEN_LOCAL_CACHE = {
+    'MAX_ENTRIES': 10000,  # 每个 worker 最多缓存的 token 数
+    'TTL': 60,  # 秒，同时不超过 token exp
+}
+# 订阅 OA 用户权限 / 启用状态变更事件：配置 OA 所用 Redis 的 REDIS_URL 后启用
+ACCOUNT_EVENTS = {
+    'ENABLED': False,
+    'CHANNEL': 'account:user_events',
+    'REDIS_URL': '',
+}
+
+# 运行指标（/metrics，Prometheus 文本格式）
+METRICS = {
+    'ENABLED': True,
+    'NAMESPACE': 'basalt_order',
+    'BACKEND': 'memory',  # 未接入 Redis，仅统计当前进程；多进程部署时配置 CACHES 后改为 'redis'
+    'FLUSH_INTERVAL': 5,  # 秒，各进程增量写入 Redis 的间隔
+    'TOKEN': '',  # 非空时抓取需携带 Authorization: Bearer <TOKEN>
+}
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import jwt
+import requests
+from django.conf import settings
+
+
+class JWKSVerifier:
+    """
+    基于 OA 发布的 JWKS 在本地验签，不共享密钥、不逐请求访问 OA。
+    公钥缓存在进程内，遇到未知 kid 时刷新（两次成功刷新至少间隔 min_refresh_interval 秒，防止伪造 kid 打爆 OA）；
+    拉取失败后只等待 failure_backoff 秒即可重试，OA 短暂故障不会让新 kid 的 token 长时间验签失败。
+    """
+
+    def __init__(self, jwks_url, algorithms=('RS256',), min_refresh_interval=60, failure_backoff=5, timeout=5,
+                 session=None):
+        self.jwks_url = jwks_url
+        self.algorithms = list(algorithms)
+        self.min_refresh_interval = min_refresh_interval
+        self.failure_backoff = failure_backoff
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._keys = {}
+        self._next_refresh = float('-inf')  # monotonic；进程刚启动时首次拉取不能被跳过
+        self._lock = threading.Lock()
+
+    def get_key(self, kid):
+        key = self._keys.get(kid)
+        if key is None:
+            self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+    def refresh(self):
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            try:
+                res = self.session.get(self.jwks_url, timeout=self.timeout)
+                res.raise_for_status()
+                jwks = res.json()
+            except (requests.RequestException, ValueError):
+                self._next_refresh = time.monotonic() + self.failure_backoff
+                raise
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                try:
+                    keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+                except (KeyError, jwt.PyJWKError):
+                    continue
+            self._keys = keys
+            self._next_refresh = time.monotonic() + self.min_refresh_interval
+
+    def verify(self, token, **kwargs):
+        """校验签名与 exp，返回 payload；失败时抛出 jwt.InvalidTokenError 子类"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        try:
+            key = self.get_key(kid)
+        except (requests.RequestException, ValueError) as e:
+            raise jwt.InvalidTokenError(f"无法获取 JWKS: {e}")
+        if key is None:
+            raise jwt.InvalidTokenError(f"未知的 kid: {kid}")
+        return jwt.decode(token, key, algorithms=self.algorithms, **kwargs)
+
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+def get_jwks_verifier():
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = JWKSVerifier(settings.ACCOUNT_JWKS_URL)
+    return _verifier
@@ -0,0 +1,58 @@
+import base64
+import threading
+
+from django.core.cache import cache
+
+from middlewares.user_integration.client import get_account_client
+
+PERMISSION_DICTIONARY_KEY = "perm_dict:{}"  # 按版本缓存，字典内容与版本一一对应，不会过期失效
+PERMISSION_DICTIONARY_TIMEOUT = 86400
+
+_dictionaries = {}  # 进程内 {version: codenames}
+_lock = threading.Lock()
+
+
+def decode_bitmap(value, codenames):
+    """解码 OA access token 中的 perms 位图（与 OA account.domain.permission_bitmap 对应）"""
+    raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+    bits = int.from_bytes(raw, 'little')
+    return [codename for index, codename in enumerate(codenames) if bits >> index & 1]
+
+
+def get_codenames(version, token):
+    """取指定版本的 codename 字典：进程内 -> Redis -> OA（每个版本每个进程最多请求一次）"""
+    codenames = _dictionaries.get(version)
+    if codenames is not None:
+        return codenames
+
+    cache_key = PERMISSION_DICTIONARY_KEY.format(version)
+    codenames = cache.get(cache_key)
+    if codenames is None:
+        # ✅ 按 token 的 pv 取对应版本：OA 增删权限后，此前签发的 token 仍按签发时的字典解码
+        dictionary = get_account_client().single_flight.do(
+            cache_key, lambda: get_account_client().fetch_permission_dictionary(token, version)
+        )
+        if not dictionary or dictionary.get("version") != version:
+            return None
+        codenames = dictionary["codenames"]
+        cache.set(cache_key, codenames, timeout=PERMISSION_DICTIONARY_TIMEOUT)
+
+    with _lock:
+        _dictionaries[version] = codenames
+    return codenames
+
+
+def permissions_from_claims(payload, token):
+    """
+    从 access token 的 perms/pv 解出权限列表；无位图时兼容旧的 permissions 声明。
+    字典版本已不可用或 OA 暂不可用时返回 None，调用方不得缓存该结果。
+    """
+    if "perms" not in payload or "pv" not in payload:
+        return payload.get("permissions", [])
+    try:
+        codenames = get_codenames(payload["pv"], token)
+    except Exception:
+        codenames = None
+    if codenames is None:
+        return None
+    return decode_bitmap(payload["perms"], codenames)
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -38,6 +39,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'middlewares.metrics.middleware.MetricsMiddleware',  # ✅ 放在最前，统计完整请求耗时
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -146,7 +148,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'middlewares.user_integration.authentication.RemoteJWTAuthentication',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'middlewares.fast_json.renderers.ORJSONRenderer',  # ✅ orjson 序列化响应
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'middlewares.fast_json.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -163,3 +174,39 @@ SIMPLE_JWT = {
 }
 # ------------------------------------------------ 其他系统路由 ---------------------------------------------------------------
 ACCOUNT_API_HOST = "http://localhost:8000"
+ACCOUNT_JWKS_URL = f"{ACCOUNT_API_HOST}/api/account/jwks/"
+ACCOUNT_API_POOL = {
+    'POOL_SIZE': 10,  # 每个 worker 到 OA 的最大长连接数
+    'TIMEOUT': 5,
+    'POOL_TIMEOUT': 2,  # 连接池已满时等待空闲连接的最长秒数，超时视为 OA 不可用
+}
+# 进程内 token 缓存（claims 与用户数据），Redis 为第二层
+TOKEN_LOCAL_CACHE = {
+    'MAX_ENTRIES': 10000,  # 每个 worker 最多缓存的 token 数
+    'TTL': 600,  # 秒，同时不超过 token exp 与 Redis 剩余时间（权限变更由 OA 事件精确清理）
+}
+# /me/ 结果在 Redis 中的缓存时长（秒，不超过 token exp）
+USER_JWT_CACHE_TIMEOUT = 3600
+# 订阅 OA 用户权限 / 启用状态变更事件（与 OA 使用同一 Redis）
+ACCOUNT_EVENTS = {
+    'ENABLED': True,
+    'CHANNEL': 'account:user_events',
+    'REDIS_URL': '',  # 为空时使用 CACHES['default'] 的连接
+}
+
+# 运行指标（/metrics，Prometheus 文本格式）
+METRICS = {
+    'ENABLED': True,
+    'NAMESPACE': 'basalt_resource',
+    'BACKEND': 'redis',  # 多 worker 进程的增量汇总到 Redis
+    'FLUSH_INTERVAL': 5,  # 秒，各进程增量写入 Redis 的间隔
+    'TOKEN': '',  # 非空时抓取需携带 Authorization: Bearer <TOKEN>
+}
+
+# ------------------------------------------------ 测试 ---------------------------------------------------------------
+# python manage.py test 使用 SQLite 内存库与本地缓存，不依赖 MySQL / Redis / OA
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    ACCOUNT_EVENTS = {**ACCOUNT_EVENTS, 'ENABLED': False}
+    METRICS = {**METRICS, 'BACKEND': 'memory'}
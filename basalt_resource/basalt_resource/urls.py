@@ -17,9 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from middlewares.metrics.views import metrics_view
+
 from pictures.views import TestAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('test/', TestAPIView.as_view()),
+    path('metrics', metrics_view, name='metrics'),
 ]
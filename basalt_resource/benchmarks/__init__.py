@@ -0,0 +1,4 @@
+"""
+资源服务认证链路的离线基准：RemoteJWTMiddleware / RemoteJWTAuthentication 的微基准与并发压测。
+使用 fakeredis 代替 Redis，OA 的 /me/、JWKS 与权限字典由本地模拟服务提供；结果保存为 JSON，可用 compare 对比两次运行。
+"""
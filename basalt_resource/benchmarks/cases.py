@@ -0,0 +1,108 @@
+import itertools
+
+from django.core.cache import cache
+from django.test import Client, RequestFactory
+from rest_framework.request import Request
+
+from benchmarks.harness import run_load, run_micro
+from middlewares.user_integration.authentication import RemoteJWTAuthentication
+from middlewares.user_integration.middleware import RemoteJWTMiddleware, user_jwt_cache_key
+from middlewares.user_integration.token_cache import token_cache, token_digest
+
+WHOAMI_PATH = '/bench/whoami/'
+
+
+def micro_cases(stub):
+    """[(名称, 无参调用)]：认证链路各缓存层命中 / 未命中时的单次开销"""
+    token = stub.issue_token(0)
+    digest = token_digest(token)
+    http_request = RequestFactory().get(WHOAMI_PATH, HTTP_AUTHORIZATION=f'Bearer {token}')
+    authentication, middleware = RemoteJWTAuthentication(), RemoteJWTMiddleware(lambda request: None)
+
+    def authenticate():
+        return authentication.authenticate(Request(http_request))
+
+    def without_local_cache(fn):
+        def call():
+            token_cache.delete(digest)
+            return fn()
+        return call
+
+    def without_any_cache(fn):
+        def call():
+            token_cache.delete(digest)
+            cache.delete(user_jwt_cache_key(digest))
+            return fn()
+        return call
+
+    def process_request():
+        middleware.process_request(http_request)
+        assert http_request.jwt_user_data, "未取到 /me/ 数据"
+
+    return [
+        # 进程内 LRU 命中：无验签、无网络 I/O
+        ('RemoteJWTAuthentication.authenticate.cached', authenticate),
+        # RS256 验签 + 权限位图解码（JWKS 与权限字典已在进程内）
+        ('RemoteJWTAuthentication.authenticate.verify', without_local_cache(authenticate)),
+        ('RemoteJWTMiddleware.process_request.lru', process_request),
+        ('RemoteJWTMiddleware.process_request.redis', without_local_cache(process_request)),
+        ('RemoteJWTMiddleware.process_request.upstream', without_any_cache(process_request)),
+    ]
+
+
+def load_cases(stub, requests, concurrency, warmup, hot_tokens=50):
+    """
+    [(名称, prepare)]：经完整中间件 / DRF 认证链路压测 WhoAmIView。
+    prepare() 在主线程调用，返回各压测线程获取 token 迭代器的函数。
+    """
+    def warm():
+        hot = [stub.issue_token(i) for i in range(hot_tokens)]
+        return lambda: itertools.cycle(hot)
+
+    def cold():
+        # 每个请求都是未见过的 token：验签、回源 /me/（经连接池与请求合并）
+        # 列表迭代器的 next() 在 CPython 中是原子操作，可在线程间共享
+        shared = iter([stub.issue_token(hot_tokens + i) for i in range(requests + warmup * concurrency)])
+        return lambda: shared
+
+    return [
+        ('RemoteJWTMiddleware.warm', warm),
+        ('RemoteJWTMiddleware.cold', cold),
+    ]
+
+
+def run(stub, iterations, warmup, concurrency, requests, only=None):
+    results = []
+    for name, fn in micro_cases(stub):
+        if selected(name, only):
+            results.append(counting_upstream(stub, lambda: run_micro(name, fn, iterations=iterations, warmup=warmup)))
+    for name, prepare in load_cases(stub, requests, concurrency, min(warmup, 20)):
+        if selected(name, only):
+            make_tokens = prepare()
+            results.append(counting_upstream(stub, lambda: run_load(
+                name, client_setup(make_tokens), concurrency=concurrency, requests=requests, warmup=min(warmup, 20)
+            )))
+    return results
+
+
+def counting_upstream(stub, bench):
+    """在结果中附上本用例对模拟 OA 的请求次数（含预热），用于观察缓存与请求合并效果"""
+    before = dict(stub.calls)
+    result = bench()
+    result["upstream_calls"] = {path: count - before.get(path, 0) for path, count in stub.calls.items()
+                                if count - before.get(path, 0)}
+    return result
+
+
+def client_setup(make_tokens):
+    def setup():
+        client, tokens = Client(), make_tokens()
+
+        def request():
+            return client.get(WHOAMI_PATH, HTTP_AUTHORIZATION=f'Bearer {next(tokens)}').status_code == 200
+        return request
+    return setup
+
+
+def selected(name, only):
+    return not only or any(name.startswith(prefix) for prefix in only)
@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+# 结果文件格式版本，字段变化时递增，compare 拒绝比较不同版本
+RESULT_FORMAT = 1
+
+
+def percentile(sorted_values, q):
+    """线性插值百分位，sorted_values 需已升序"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(name, kind, latencies, elapsed, errors=0, **extra):
+    """latencies 为每次调用耗时（秒），返回毫秒单位的统计结果"""
+    values = sorted(latencies)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 4)
+
+    return {
+        "name": name,
+        "kind": kind,
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else None,
+        "throughput": round(len(values) / elapsed, 2) if elapsed else None,  # 次/秒
+        **extra,
+    }
+
+
+def run_micro(name, fn, iterations=1000, warmup=100):
+    """微基准：单线程顺序调用 fn，逐次计时"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(name, "micro", latencies, time.perf_counter() - started)
+
+
+def run_load(name, setup, concurrency=8, requests=2000, warmup=50, teardown=None):
+    """
+    并发压测：concurrency 个线程共发出 requests 次请求。
+    setup() 在每个线程内调用一次，返回该线程的请求函数（如绑定了 test Client 的闭包），请求函数返回 False 或抛异常计为错误。
+    teardown() 在每个线程结束时调用（如关闭该线程的数据库连接）。
+    注意进程内线程受 GIL 限制，结果反映锁竞争与单请求开销，而非多核吞吐。
+    """
+    remaining = [requests]
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+    barrier = threading.Barrier(concurrency + 1)
+
+    def take():
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker():
+        local_latencies, local_errors = [], 0
+        try:
+            request = setup()
+            for _ in range(warmup):
+                request()
+        finally:
+            barrier.wait()
+        try:
+            while take():
+                begin = time.perf_counter()
+                try:
+                    ok = request() is not False
+                except Exception:
+                    ok = False
+                local_latencies.append(time.perf_counter() - begin)
+                local_errors += not ok
+        finally:
+            with lock:
+                latencies.extend(local_latencies)
+                errors[0] += local_errors
+            if teardown is not None:
+                teardown()
+
+    threads = [threading.Thread(target=worker, name=f"bench-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()  # 所有线程完成预热后同时开始计时
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(name, "load", latencies, time.perf_counter() - started, errors=errors[0],
+                     concurrency=concurrency)
+
+
+def environment(service, **params):
+    """结果文件的元信息：对比时用于确认两次运行的条件一致"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import django
+    return {
+        "format": RESULT_FORMAT,
+        "service": service,
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+
+def save_results(path, meta, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("meta", {}).get("format") != RESULT_FORMAT:
+        raise ValueError(f"{path}: 不支持的结果格式 {data.get('meta', {}).get('format')}")
+    return data
+
+
+def compare(base, head, metric="p50_ms", threshold=10.0):
+    """
+    按 name 对齐两次结果，返回 (表格行, 退化项)。
+    退化：耗时指标增加超过 threshold%，或 throughput 下降超过 threshold%。
+    """
+    base_results = {result["name"]: result for result in base["results"]}
+    rows, regressions = [], []
+    for result in head["results"]:
+        before = base_results.get(result["name"])
+        if before is None or before.get(metric) in (None, 0) or result.get(metric) is None:
+            rows.append((result["name"], before and before.get(metric), result.get(metric), None))
+            continue
+        change = (result[metric] - before[metric]) / before[metric] * 100
+        rows.append((result["name"], before[metric], result[metric], change))
+        worse = -change if metric == "throughput" else change
+        if worse > threshold:
+            regressions.append(result["name"])
+    return rows, regressions
+
+
+def format_results(results):
+    header = f"{'name':<48}{'count':>8}{'err':>6}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'ops/s':>12}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        cells = [result.get(key) for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")]
+        lines.append(f"{result['name']:<48}{result['count']:>8}{result['errors']:>6}"
+                     + "".join(f"{'-' if cell is None else f'{cell:.3f}':>10}" for cell in cells)
+                     + f"{'-' if result.get('throughput') is None else result['throughput']:>12}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows, metric):
+    header = f"{'name':<48}{'base ' + metric:>16}{'head ' + metric:>16}{'change':>10}"
+    lines = [header, "-" * len(header)]
+    for name, before, after, change in rows:
+        lines.append(f"{name:<48}{'-' if before is None else before:>16}{'-' if after is None else after:>16}"
+                     f"{'-' if change is None else f'{change:+.1f}%':>10}")
+    return "\n".join(lines)
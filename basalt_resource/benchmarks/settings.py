@@ -0,0 +1,33 @@
+"""
+基准测试专用配置：SQLite + fakeredis（进程内 Redis 替身），OA 由 benchmarks.upstream.StubAccountServer 模拟。
+BASALT_BENCH_UPSTREAM 为模拟 OA 的地址，由 python -m benchmarks 启动模拟服务后设置。
+"""
+import os
+
+import fakeredis
+
+from basalt_resource.settings import *  # noqa
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver']
+ROOT_URLCONF = 'benchmarks.urls'
+
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": 'redis://basalt-bench:6379/0',
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
+            # ✅ 同一 LOCATION 的连接共享一个进程内 fakeredis 服务端
+            "CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection},
+        }
+    },
+}
+
+ACCOUNT_API_HOST = os.environ.get('BASALT_BENCH_UPSTREAM', ACCOUNT_API_HOST)
+ACCOUNT_JWKS_URL = f"{ACCOUNT_API_HOST}/api/account/jwks/"
+ACCOUNT_EVENTS = {**ACCOUNT_EVENTS, 'ENABLED': False}
+METRICS = {**METRICS, 'BACKEND': 'memory'}
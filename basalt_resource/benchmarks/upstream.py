@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+KID = 'bench'
+ME_PATH = '/api/account/me/'
+JWKS_PATH = '/api/account/jwks/'
+DICTIONARY_PATH = '/api/account/permissions/dictionary/'
+
+
+def encode_bitmap(permissions, codenames):
+    """与 OA account.domain.permission_bitmap.encode_bitmap 一致"""
+    positions = {codename: index for index, codename in enumerate(codenames)}
+    bits = 0
+    for codename in permissions:
+        if codename in positions:
+            bits |= 1 << positions[codename]
+    raw = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+class StubAccountServer:
+    """
+    模拟 OA 的 /me/、JWKS 与权限字典接口，供下游认证链路离线压测。
+    latency 为每次响应前的固定延迟（秒），模拟到 OA 的网络往返；calls 记录各路径的请求次数。
+    """
+
+    def __init__(self, latency=0.001, permission_count=120, permissions_per_user=40, roles_per_user=5):
+        self.latency = latency
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.codenames = [f'bench_perm_{i}' for i in range(permission_count)]
+        self.version = hashlib.sha1(",".join(self.codenames).encode()).hexdigest()[:8]
+        self.permissions_per_user = permissions_per_user
+        self.roles_per_user = roles_per_user
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-account', daemon=True)
+
+    @property
+    def host(self):
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def user(self, index):
+        """第 index 个基准用户的 /me/ 数据（roles / permissions 与 token 一致）"""
+        offset = index % len(self.codenames)
+        return {
+            "uuid": f'bench-user-{index}',
+            "unified_uuid": f'bench-unified-{index}',
+            "username": f'bench-user{index}',
+            "email": f'user{index}@bench.example.com',
+            "phone": f'170{index:08d}',
+            "is_active": True,
+            "perms_ver": 0,
+            "roles": [{"uuid": f'bench-role-{(index + k) % 10}', "name": f'role{(index + k) % 10}'}
+                      for k in range(self.roles_per_user)],
+            "permissions": (self.codenames[offset:] + self.codenames[:offset])[:self.permissions_per_user],
+        }
+
+    def issue_token(self, index, lifetime=1800):
+        """签发与 OA 相同结构的 RS256 access token（带 kid、权限位图 perms 与字典版本 pv）"""
+        user, now = self.user(index), int(time.time())
+        payload = {
+            "token_type": "access",
+            "exp": now + lifetime,
+            "iat": now,
+            "jti": uuid.uuid4().hex,
+            "user_id": user["uuid"],
+            "unified_uuid": user["unified_uuid"],
+            "username": user["username"],
+            "email": user["email"],
+            "pv": self.version,
+            "perms_ver": user["perms_ver"],
+            "perms": encode_bitmap(user["permissions"], self.codenames),
+            "roles": [role["uuid"] for role in user["roles"]],
+        }
+        return jwt.encode(payload, self.private_key, algorithm='RS256', headers={"kid": KID})
+
+    def respond(self, path, token, query=None):
+        if path == JWKS_PATH:
+            jwk = json.loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+            jwk.update({"kid": KID, "alg": "RS256", "use": "sig"})
+            return 200, {"keys": [jwk]}
+        if token is None:
+            return 401, {"detail": "未提供认证信息"}
+        if path == DICTIONARY_PATH:
+            version = (query or {}).get("version", [self.version])[0]
+            if version != self.version:
+                return 404, {"detail": "权限字典版本不存在或已过期"}
+            return 200, {"version": self.version, "codenames": self.codenames}
+        if path == ME_PATH:
+            index = int(jwt.decode(token, options={"verify_signature": False})["user_id"].rsplit('-', 1)[1])
+            return 200, self.user(index)
+        return 404, {"detail": "Not found"}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # 保持长连接，与线上连接池行为一致
+            disable_nagle_algorithm = True  # 响应头与响应体分两次写出，避免 Nagle + 延迟 ACK 带来的 40ms 停顿
+
+            def do_GET(self):  # noqa
+                url = urlsplit(self.path)
+                with stub._lock:
+                    stub.calls[url.path] += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                auth = self.headers.get('Authorization', '')
+                status, body = stub.respond(url.path, auth[7:] if auth.startswith('Bearer ') else None,
+                                            parse_qs(url.query))
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):  # noqa
+                pass
+
+        return Handler
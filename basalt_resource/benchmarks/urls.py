@@ -0,0 +1,16 @@
+from django.urls import path
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+
+
+class WhoAmIView(generics.GenericAPIView):
+    """压测端点：只经过 RemoteJWTMiddleware 与 DRF 认证 / 鉴权，视图本身几乎无开销"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"uuid": request.user.uuid, "permissions": len(request.user.permissions)})
+
+
+urlpatterns = [
+    path('bench/whoami/', WhoAmIView.as_view()),
+]
@@ -0,0 +1,18 @@
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class ORJSONParser(BaseParser):
+    """基于 orjson 的 JSON 解析器，替换 DRF 默认的 JSONParser；与其一样拒绝 NaN / Infinity"""
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            # orjson 只接受 UTF-8，其他编码先解码为 str
+            return orjson.loads(body if encoding.lower() in ('utf-8', 'utf8') else body.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
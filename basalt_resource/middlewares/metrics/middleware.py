@@ -0,0 +1,77 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from middlewares.metrics.registry import db_query_duration, http_request_duration, http_request_queries
+
+
+class QueryStats:
+    """通过 execute_wrapper 统计一次请求内的 SQL 条数与耗时"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    def capture(self):
+        """在当前线程的数据库连接上安装统计（连接按线程隔离，需在执行 ORM 的线程内调用）"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def route_of(request):
+    """路由模板作为标签（如 api/account/login/），避免按实际路径产生无限多的序列"""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.route:
+        return "unmatched"
+    return match.route.replace("^", "").replace("$", "")
+
+
+class MetricsMiddleware:
+    """记录每个请求的耗时、SQL 条数与 SQL 耗时；同时支持 WSGI 与 ASGI（不会迫使异步视图回退为同步）"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, start = QueryStats(), time.perf_counter()
+        with stats.capture():
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats, start = QueryStats(), time.perf_counter()
+        # ✅ ORM 在 thread_sensitive 的同步线程中执行（同一请求内共用一个线程），统计需安装在该线程的连接上
+        capture = await sync_to_async(stats.capture)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(capture.close)()
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    @staticmethod
+    def record(request, response, elapsed, stats):
+        route = route_of(request)
+        http_request_duration.observe(elapsed, method=request.method, route=route, status=response.status_code)
+        http_request_queries.observe(stats.count, route=route)
+        db_query_duration.inc(stats.duration, route=route)
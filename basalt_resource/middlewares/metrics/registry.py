@@ -0,0 +1,219 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger('middlewares')
+
+METRICS_KEY = "metrics:{}"  # hash：样本名（含标签）-> 累计值，各 worker 进程定期累加写入
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name, labels, le=None):
+    """Prometheus 文本格式的样本名：name{k="v",...}，标签按名称排序，histogram 的 le 固定放在最后"""
+    pairs = [f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return f"{name}{{{','.join(pairs)}}}" if pairs else name
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, registry, name, documentation):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+
+    def inc(self, value=1, **labels):
+        self.registry.add({_sample(self.name, labels): value})
+
+
+class Histogram:
+    def __init__(self, registry, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        # ✅ 直接累计各桶（le 语义），多进程合并时逐项相加即可；未命中的桶也写 0，保证每组标签的桶完整
+        deltas = {_sample(f"{self.name}_bucket", labels, le): int(value <= le) for le in self.buckets}
+        deltas[_sample(f"{self.name}_bucket", labels, "+Inf")] = 1
+        deltas[_sample(f"{self.name}_sum", labels)] = value
+        deltas[_sample(f"{self.name}_count", labels)] = 1
+        self.registry.add(deltas)
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文；labels 可在块内补充（如响应状态码）"""
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class MetricsRegistry:
+    """
+    进程内累加，后台线程每 flush_interval 秒把增量 HINCRBYFLOAT 到 Redis，/metrics 读取合并后的总量，
+    多个 worker 进程的数据因此可以安全汇总。
+    backend: 'redis'（多进程汇总）/ 'memory'（仅当前进程，单进程部署或无 Redis 的服务）
+    """
+    redis_alias = "default"
+    redis_client = None  # 可注入本地 Redis 替身（如 fakeredis）
+
+    def __init__(self, namespace, backend="redis", flush_interval=5, enabled=True):
+        self.namespace = namespace
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.families = {}  # 指标名 -> Counter / Histogram
+        self._pending = defaultdict(float)  # 尚未写入 Redis 的增量
+        self._totals = defaultdict(float)  # memory 后端的累计值
+        self._lock = threading.Lock()
+        self._worker = None
+        # fork 出的 worker 进程（如 gunicorn preload）丢弃继承的增量（由父进程写入），写入线程按需重建
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def get_redis(self):
+        if self.redis_client is not None:
+            return self.redis_client
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.redis_alias)
+
+    def counter(self, name, documentation):
+        return self.families.setdefault(name, Counter(self, name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self.families.setdefault(name, Histogram(self, name, documentation, buckets))
+
+    def add(self, deltas):
+        if not self.enabled:
+            return
+        with self._lock:
+            target = self._totals if self.backend == "memory" else self._pending
+            for sample, value in deltas.items():
+                target[sample] += value
+        if self.backend != "memory":
+            self._ensure_worker()
+
+    def flush(self):
+        """把本进程的增量写入 Redis，返回写入的样本数"""
+        if self.backend == "memory":
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+        if not pending:
+            return 0
+        try:
+            pipe = self.get_redis().pipeline(transaction=False)
+            for sample, value in pending.items():
+                pipe.hincrbyfloat(METRICS_KEY.format(self.namespace), sample, value)
+            pipe.execute()
+        except Exception as e:
+            # 写入失败时放回，下次一并写入
+            logger.warning(f"[Metrics] flush failed: {e}")
+            with self._lock:
+                for sample, value in pending.items():
+                    self._pending[sample] += value
+            return 0
+        return len(pending)
+
+    def collect(self):
+        """返回 {样本名: 累计值}"""
+        if self.backend == "memory":
+            with self._lock:
+                return dict(self._totals)
+        self.flush()
+        values = self.get_redis().hgetall(METRICS_KEY.format(self.namespace))
+        return {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in values.items()}
+
+    def render(self):
+        """Prometheus 文本格式（text/plain; version=0.0.4）"""
+        grouped = defaultdict(list)
+        for sample, value in self.collect().items():
+            base = sample.split("{", 1)[0]
+            for suffix in ("_bucket", "_sum", "_count"):
+                if base.endswith(suffix) and base[:-len(suffix)] in self.families:
+                    base = base[:-len(suffix)]
+                    break
+            grouped[base].append((sample, value))
+
+        lines = []
+        for name in sorted(grouped):
+            family = self.families.get(name)
+            if family is not None:
+                kind = "histogram" if isinstance(family, Histogram) else "counter"
+                lines.append(f"# HELP {name} {family.documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+            for sample, value in sorted(grouped[name], key=lambda item: self._sort_key(item[0])):
+                lines.append(f"{sample} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _sort_key(sample):
+        # 同一组标签的 bucket 按 le 数值升序排列
+        if 'le="' not in sample:
+            return sample, 0
+        head, le = sample.rsplit('le="', 1)
+        le = le[:-2]  # 去掉结尾的 "}
+        return head, float("inf") if le == "+Inf" else float(le)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self._totals = defaultdict(float)
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+_config = getattr(settings, "METRICS", {})
+metrics = MetricsRegistry(
+    namespace=_config.get("NAMESPACE", "default"),
+    backend=_config.get("BACKEND", "redis"),
+    flush_interval=_config.get("FLUSH_INTERVAL", 5),
+    enabled=_config.get("ENABLED", True),
+)
+atexit.register(metrics.flush)
+
+# ✅ 各服务共用的指标
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（按路由）")
+http_request_queries = metrics.histogram(
+    "http_request_db_queries", "单个请求执行的 SQL 条数", buckets=COUNT_BUCKETS)
+db_query_duration = metrics.counter(
+    "db_query_duration_seconds_total", "SQL 执行总耗时（按路由）")
+cache_requests = metrics.counter(
+    "cache_requests_total", "缓存查询次数（按缓存与命中结果）")
+upstream_request_duration = metrics.histogram(
+    "upstream_request_duration_seconds", "调用上游 HTTP 服务的耗时")
+
+
+def record_cache(cache_name, hit):
+    cache_requests.inc(cache=cache_name, result="hit" if hit else "miss")
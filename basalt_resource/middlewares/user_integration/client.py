@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import Future
+from functools import partial
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+
+from middlewares.metrics.registry import upstream_request_duration
+
+A_SYSTEM_ME_PATH = "/api/account/me/"
+A_SYSTEM_PERMISSION_DICTIONARY_PATH = "/api/account/permissions/dictionary/"
+
+
+class SingleFlight:
+    """同一个 key 的并发调用只执行一次，其余调用等待并共享结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result()
+
+
+class _BoundedWaitPool:
+    """取连接默认最多等待 pool_timeout 秒（urllib3 默认无限等待，请求的 timeout 不覆盖这段排队）"""
+
+    def __init__(self, *args, pool_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_timeout = pool_timeout
+
+    def urlopen(self, method, url, *args, pool_timeout=None, **kwargs):
+        pool_timeout = self.pool_timeout if pool_timeout is None else pool_timeout
+        return super().urlopen(method, url, *args, pool_timeout=pool_timeout, **kwargs)
+
+
+class _BoundedWaitHTTPConnectionPool(_BoundedWaitPool, HTTPConnectionPool):
+    pass
+
+
+class _BoundedWaitHTTPSConnectionPool(_BoundedWaitPool, HTTPSConnectionPool):
+    pass
+
+
+class BoundedPoolAdapter(HTTPAdapter):
+    """连接数达到上限时排队等待（pool_block），最多等待 pool_timeout 秒，超时抛 requests.ConnectionError"""
+
+    def __init__(self, pool_timeout, **kwargs):
+        self.pool_timeout = pool_timeout
+        super().__init__(pool_block=True, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': partial(_BoundedWaitHTTPConnectionPool, pool_timeout=self.pool_timeout),
+            'https': partial(_BoundedWaitHTTPSConnectionPool, pool_timeout=self.pool_timeout),
+        }
+
+    def send(self, request, *args, **kwargs):
+        try:
+            return super().send(request, *args, **kwargs)
+        except EmptyPoolError as e:
+            raise requests.ConnectionError(e, request=request)
+
+
+class AccountAPIClient:
+    """访问 OA 账户服务的共享 HTTP 客户端：长连接池 + 同 token 请求合并"""
+
+    def __init__(self, host, pool_size=10, timeout=5, pool_timeout=None):
+        self.host = host
+        self.timeout = timeout
+        self.session = requests.Session()
+        # 连接数达到上限时排队等待，而不是额外新建连接；排队最多 pool_timeout 秒（默认同请求超时）
+        adapter = BoundedPoolAdapter(pool_timeout=timeout if pool_timeout is None else pool_timeout,
+                                     pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.single_flight = SingleFlight()
+
+    def fetch_me(self, token):
+        """返回 /api/account/me/ 的用户数据，非 200 时返回 None"""
+        res = self._get(A_SYSTEM_ME_PATH, token)
+        return res.json() if res.status_code == 200 else None
+
+    def fetch_permission_dictionary(self, token, version=None):
+        """返回 OA 发布的权限位图字典 {"version": ..., "codenames": [...]}；version 为空时取当前版本"""
+        res = self._get(A_SYSTEM_PERMISSION_DICTIONARY_PATH, token, params={"version": version})
+        return res.json() if res.status_code == 200 else None
+
+    def _get(self, path, token, params=None):
+        # ✅ 记录 OA 往返耗时（含连接池排队）
+        with upstream_request_duration.time(upstream="account", endpoint=path, status="error") as labels:
+            res = self.session.get(f"{self.host}{path}", headers={"Authorization": f"Bearer {token}"},
+                                   params=params, timeout=self.timeout)
+            labels["status"] = res.status_code
+        return res
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_account_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = getattr(settings, 'ACCOUNT_API_POOL', {})
+                _client = AccountAPIClient(
+                    settings.ACCOUNT_API_HOST,
+                    pool_size=config.get('POOL_SIZE', 10),
+                    timeout=config.get('TIMEOUT', 5),
+                    pool_timeout=config.get('POOL_TIMEOUT'),
+                )
+    return _client
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from middlewares.user_integration.token_cache import token_cache
+
+logger = logging.getLogger('middlewares')
+
+USER_EVENTS_CHANNEL = "account:user_events"  # 与 OA account.infrastructure.user_events 一致
+USER_JWT_GENERATION_KEY = "user_jwt_gen"
+
+
+class RevocationRegistry:
+    """
+    记录每个用户最近一次权限变更的版本号（OA 签发，与 access token / /me/ 中的 perms_ver 同源）。
+    token 或 /me/ 缓存携带的版本号小于该版本时视为过期，需要回 OA 取最新数据；只比较 OA 签发的版本号，不依赖各主机时钟。
+    """
+
+    def __init__(self, max_entries=100000, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl  # 不短于 access token 有效期
+        self._data = OrderedDict()  # 用户标识 -> (版本号, 记录时间)
+        self._lock = threading.Lock()
+
+    def revoke(self, users, version):
+        now = time.time()
+        with self._lock:
+            for user in users:
+                if user:
+                    self._data[user] = (version, now)
+                    self._data.move_to_end(user)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def is_stale(self, user, version):
+        """version：token 或 /me/ 数据中的 perms_ver，缺失按 0 处理"""
+        if not user:
+            return False
+        with self._lock:
+            entry = self._data.get(user)
+            if entry is None:
+                return False
+            revoked, recorded_at = entry
+            if time.time() - recorded_at > self.ttl:
+                del self._data[user]
+                return False
+        return (version or 0) < revoked
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+registry = RevocationRegistry()
+
+
+class CacheGeneration:
+    """
+    Redis 中 /me/ 缓存（user_jwt:*）的代数，拼在缓存 key 中。
+    订阅建立（含断线重连）时递增：断线期间漏掉的变更事件无法按用户清理，直接弃用之前写入的全部条目。
+    各进程每 refresh_interval 秒重读一次；未及时重读的进程一直在线，已按事件版本号判定过期，不受影响。
+    """
+
+    def __init__(self, refresh_interval=5):
+        self.refresh_interval = refresh_interval
+        self._value = 0
+        self._read_at = float('-inf')
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._read_at >= self.refresh_interval:
+            try:
+                self._value = cache.get(USER_JWT_GENERATION_KEY) or 0
+            except Exception as e:
+                logger.warning(f"[UserEvents] read cache generation failed: {e}")
+            self._read_at = now
+        return self._value
+
+    def bump(self):
+        try:
+            cache.add(USER_JWT_GENERATION_KEY, 0, timeout=None)
+            self._value = cache.incr(USER_JWT_GENERATION_KEY)
+            self._read_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"[UserEvents] bump cache generation failed: {e}")
+
+
+generation = CacheGeneration()
+
+
+def handle_event(message):
+    """处理 OA 发布的 {"v": 版本号, "u": [[uuid, unified_uuid], ...]}"""
+    event = json.loads(message)
+    users = [user for pair in event.get("u", []) for user in pair if user]
+    if not users:
+        return
+    # ✅ 进程内缓存直接清理；Redis 中的 /me/ 缓存读取时按 perms_ver 判定过期
+    registry.revoke(users, event.get("v", 0))
+    token_cache.evict_users(users)
+
+
+class UserEventSubscriber(threading.Thread):
+    """后台订阅 OA 用户事件；订阅建立（含断线重连）后清空进程内缓存并弃用 Redis 中的 /me/ 缓存（断线期间可能漏掉事件）"""
+
+    def __init__(self, channel, redis_url=None, retry_interval=1, max_retry_interval=30):
+        super().__init__(name="account-user-events", daemon=True)
+        self.channel = channel
+        self.redis_url = redis_url
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+    def get_redis(self):
+        if self.redis_url:
+            import redis
+            return redis.Redis.from_url(self.redis_url)
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+    def run(self):
+        delay = self.retry_interval
+        while True:
+            try:
+                pubsub = self.get_redis().pubsub(ignore_subscribe_messages=False)
+                pubsub.subscribe(self.channel)
+                for item in pubsub.listen():
+                    if item["type"] == "subscribe":
+                        token_cache.clear()
+                        generation.bump()
+                        delay = self.retry_interval
+                    elif item["type"] == "message":
+                        try:
+                            handle_event(item["data"])
+                        except Exception as e:
+                            logger.warning(f"[UserEvents] handle failed: {e}")
+            except Exception as e:
+                logger.warning(f"[UserEvents] subscription lost, retry in {delay}s: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_retry_interval)
+
+
+_subscriber_pid = None
+_subscriber_lock = threading.Lock()
+
+
+def start_subscriber():
+    """每个进程启动一次订阅线程（fork 之后的 worker 会重新启动）"""
+    global _subscriber_pid
+    if _subscriber_pid == os.getpid():
+        return
+    config = getattr(settings, "ACCOUNT_EVENTS", {})
+    with _subscriber_lock:
+        if _subscriber_pid == os.getpid():
+            return
+        _subscriber_pid = os.getpid()
+        if not config.get("ENABLED"):
+            return
+        UserEventSubscriber(config.get("CHANNEL", USER_EVENTS_CHANNEL), redis_url=config.get("REDIS_URL")).start()
@@ -1,15 +1,37 @@
-import requests
+import time
+
 from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 from django.core.cache import cache
 
-A_SYSTEM_ME_API = f"{settings.ACCOUNT_API_HOST}/api/account/me/"
+from middlewares.metrics.registry import record_cache
+from middlewares.user_integration.client import get_account_client
+from middlewares.user_integration.events import generation, registry, start_subscriber
+from middlewares.user_integration.token_cache import token_cache, token_digest, token_exp
+
+USER_JWT_CACHE_KEY = "user_jwt:{}:{}"  # 代数、token 摘要 -> {"user": OA 用户数据, "expires_at": 过期时间戳}
+# 订阅 OA 权限变更事件后可放宽（仍不超过 token exp）
+USER_JWT_CACHE_TIMEOUT = getattr(settings, 'USER_JWT_CACHE_TIMEOUT', 300)
+
+
+def user_keys(user_data):
+    return user_data.get("uuid"), user_data.get("unified_uuid")
+
+
+def user_jwt_cache_key(digest):
+    return USER_JWT_CACHE_KEY.format(generation.get(), digest)
+
+
+def is_stale(user_data):
+    """OA 在生成该 /me/ 数据之后推送过该用户的权限变更事件"""
+    return any(registry.is_stale(user, user_data.get("perms_ver")) for user in user_keys(user_data))
 
 
 class RemoteJWTMiddleware(MiddlewareMixin):
     """提取 JWT 并缓存用户信息（供 DRF 认证类使用）"""
 
     def process_request(self, request):  # noqa
+        start_subscriber()
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
             request.jwt_token = None
@@ -18,19 +40,40 @@ class RemoteJWTMiddleware(MiddlewareMixin):
 
         token = auth_header.split(" ")[1]
         request.jwt_token = token
+        digest = token_digest(token)
 
-        # 优先从缓存获取用户数据
-        cache_key = f"user_jwt:{token}"
-        user_data = cache.get(cache_key)
+        # ✅ 第一层：进程内 LRU，命中时无网络 I/O
+        user_data = token_cache.get(digest, "user")
         if not user_data:
             try:
-                res = requests.get(A_SYSTEM_ME_API, headers={"Authorization": f"Bearer {token}"}, timeout=5)
-                if res.status_code == 200:
-                    user_data = res.json()
-                    cache.set(cache_key, user_data, timeout=300)
-                else:
-                    user_data = None
+                # ✅ 同一 token 的并发未命中只请求一次 OA，写缓存也在合并的调用内完成
+                user_data = get_account_client().single_flight.do(digest, lambda: self._load_user_data(token, digest))
             except Exception as e:
                 user_data = None
 
         request.jwt_user_data = user_data
+
+    @staticmethod
+    def _load_user_data(token, digest):
+        exp = token_exp(token)
+        cache_key = user_jwt_cache_key(digest)
+
+        # 第二层：Redis
+        cached = cache.get(cache_key)
+        # ✅ OA 发布过该用户更新版本的权限变更事件时视为未命中
+        hit = bool(cached) and not is_stale(cached["user"])
+        record_cache("user_jwt", hit)
+        if hit:
+            token_cache.set(digest, "user", cached["user"], exp=exp, ttl=cached["expires_at"] - time.time(),
+                            users=user_keys(cached["user"]))
+            return cached["user"]
+
+        fetched_at = time.time()
+        user_data = get_account_client().fetch_me(token)
+        # 已收到更新版本的变更事件（OA 返回的是变更前的数据）时不写缓存，避免回填旧数据
+        if user_data and not is_stale(user_data):
+            timeout = USER_JWT_CACHE_TIMEOUT if exp is None else max(0, min(USER_JWT_CACHE_TIMEOUT, int(exp - fetched_at)))
+            if timeout:
+                cache.set(cache_key, {"user": user_data, "expires_at": fetched_at + timeout}, timeout=timeout)
+            token_cache.set(digest, "user", user_data, exp=exp, ttl=timeout, users=user_keys(user_data))
+        return user_data
@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+
+from middlewares.metrics.registry import record_cache
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_exp(token):
+    """读取 token 的 exp（不校验签名，仅用于限制缓存时长）"""
+    try:
+        return jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.InvalidTokenError:
+        return None
+
+
+class TokenLRUCache:
+    """
+    进程内 token 缓存（第一层，Redis 为第二层）。
+    以 token 摘要为 key，分别保存已验签的 claims 与 OA 用户数据，过期时间不超过 token 的 exp。
+    同时按用户 uuid / unified_uuid 建立索引，收到 OA 权限变更事件时按用户精确清理。
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._owners = {}  # digest -> {用户标识}
+        self._users = {}  # 用户标识 -> {digest}
+        self._lock = threading.Lock()
+
+    def get(self, digest, field):
+        value = self._get(digest, field)
+        record_cache(f"token_lru_{field}", value is not None)
+        return value
+
+    def _get(self, digest, field):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(digest)
+            if entry is None:
+                return None
+            value, expires_at = entry.get(field, (None, 0))
+            if expires_at <= now:
+                entry.pop(field, None)
+                if not entry:
+                    self._remove(digest)
+                return None
+            self._data.move_to_end(digest)
+            return value
+
+    def set(self, digest, field, value, exp=None, ttl=None, users=()):
+        """exp: token 过期时间戳；ttl: 上层缓存（Redis）剩余秒数；users: 该 token 所属用户的 uuid / unified_uuid"""
+        now = time.time()
+        expires_at = now + min(self.ttl, ttl) if ttl is not None else now + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        if expires_at <= now or not self.max_entries:
+            return
+        with self._lock:
+            self._data.setdefault(digest, {})[field] = (value, expires_at)
+            self._data.move_to_end(digest)
+            for user in users:
+                if user:
+                    self._owners.setdefault(digest, set()).add(user)
+                    self._users.setdefault(user, set()).add(digest)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+
+    def delete(self, digest):
+        with self._lock:
+            self._remove(digest)
+
+    def evict_users(self, users):
+        """清理指定用户的全部 token 缓存"""
+        with self._lock:
+            for user in users:
+                for digest in list(self._users.get(user, ())):
+                    self._remove(digest)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._owners.clear()
+            self._users.clear()
+
+    def _remove(self, digest):
+        # 调用方持有 self._lock
+        self._data.pop(digest, None)
+        for user in self._owners.pop(digest, ()):
+            digests = self._users.get(user)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self._users[user]
+
+
+_config = getattr(settings, 'TOKEN_LOCAL_CACHE', {})
+token_cache = TokenLRUCache(max_entries=_config.get('MAX_ENTRIES', 10000), ttl=_config.get('TTL', 60))
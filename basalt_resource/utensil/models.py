@@ -1,13 +1,102 @@
 import uuid
 
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+
 import shortuuid
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import Signal
 from django.utils import timezone
 
 
 # Create your models here.
+UUID_ALPHABET = shortuuid.get_alphabet()  # 与历史 shortuuid 相同的 57 个字符，按 ASCII 升序
+UUID_TIME_ALPHABET = UUID_ALPHABET[:32]  # 数字 + 大写字母：二进制与大小写不敏感排序规则下顺序一致
+UUID_TIME_LENGTH = 10  # 毫秒时间戳，50 bit
+UUID_RANDOM_LENGTH = 14  # 随机部分，约 81 bit
+
+
+def _encode(number, alphabet, length):
+    base = len(alphabet)
+    chars = []
+    for _ in range(length):
+        number, digit = divmod(number, base)
+        chars.append(alphabet[digit])
+    return ''.join(reversed(chars))
+
+
 def create_uuid():
-    return shortuuid.uuid()
+    """
+    时间有序 ID（ULID 风格）：10 位毫秒时间戳 + 14 位随机数，共 24 位。
+    新行总是写在聚簇索引的尾部区间，避免随机主键导致的页分裂；历史 22 位 shortuuid 继续有效。
+    """
+    timestamp = time.time_ns() // 1_000_000
+    randomness = int.from_bytes(os.urandom(11), 'big')
+    return (_encode(timestamp, UUID_TIME_ALPHABET, UUID_TIME_LENGTH)
+            + _encode(randomness, UUID_ALPHABET, UUID_RANDOM_LENGTH))
+
+
+def uuid_created_at(value):
+    """从 create_uuid 生成的 ID 中取出生成时间；历史 shortuuid 返回 None"""
+    if len(value) != UUID_TIME_LENGTH + UUID_RANDOM_LENGTH:
+        return None
+    timestamp = 0
+    for char in value[:UUID_TIME_LENGTH]:
+        digit = UUID_TIME_ALPHABET.find(char)
+        if digit < 0:
+            return None
+        timestamp = timestamp * len(UUID_TIME_ALPHABET) + digit
+    return datetime.fromtimestamp(timestamp / 1000, tz=dt_timezone.utc)
+
+
+# 批量软删除 / 恢复走 UPDATE，不触发 post_save；需要感知的模块监听此信号
+# 参数：sender=模型类, pks=受影响的主键列表, is_deleted=True（删除）/ False（恢复）, using=数据库别名
+soft_delete_changed = Signal()
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    # ✅ 显式比较 is_deleted = false：布尔字段直接写 filter(is_deleted=False) 在 SQLite 等库生成 NOT is_deleted，
+    # 无法命中以 is_deleted 开头的联合索引
+    def alive(self):
+        return self.filter(is_deleted=models.Value(False))
+
+    def deleted(self):
+        return self.filter(is_deleted=models.Value(True))
+
+    # ✅ 批量软删除：一条 UPDATE，返回受影响行数
+    def soft_delete(self):
+        return self._mark_deleted(True)
+
+    # ✅ 批量恢复：一条 UPDATE；objects 只返回未删除数据，需通过 all_objects 调用
+    def restore(self):
+        return self._mark_deleted(False)
+
+    def _mark_deleted(self, is_deleted):
+        queryset = self.filter(is_deleted=models.Value(not is_deleted))
+        now = timezone.now()
+        values = {"is_deleted": is_deleted, "deleted_at": now if is_deleted else None, "updated_at": now}
+        if not soft_delete_changed.has_listeners(self.model):
+            return queryset.update(**values)
+        # 有监听者时先锁定并取出主键，保证信号中的 pks 与实际更新的行一致
+        with transaction.atomic(using=self.db):
+            pks = list(queryset.select_for_update().values_list("pk", flat=True))
+            if not pks:
+                return 0
+            count = self.model._base_manager.using(self.db).filter(pk__in=pks).update(**values)
+            soft_delete_changed.send(sender=self.model, pks=pks, is_deleted=is_deleted, using=self.db)
+        return count
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    # ✅ 默认返回全部数据：Django 以默认管理器的类无参构造反向关联 / M2M 管理器，关联访问因此与引入软删除前一致
+    def __init__(self, alive_only=False):
+        super().__init__()
+        self.alive_only = alive_only
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return queryset.alive() if self.alive_only else queryset
 
 
 class Base(models.Model):
@@ -31,8 +120,15 @@ class Base(models.Model):
     is_deleted = models.BooleanField("是否删除", default=False, db_index=True)
     deleted_at = models.DateTimeField('删除时间', null=True, blank=True)
 
+    # ✅ objects 只返回未删除数据；默认 / 基础管理器仍是全部数据，admin、dumpdata、反向关联与 M2M 可见已软删除的行
+    # 子类自定义 Meta 时需继承 Base.Meta
+    objects = SoftDeleteManager(alive_only=True)
+    all_objects = SoftDeleteManager()
+
     class Meta:
         abstract = True
+        default_manager_name = 'all_objects'
+        base_manager_name = 'all_objects'
 
     # ✅ 软删除方法
     def soft_delete(self):
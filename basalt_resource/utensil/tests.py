@@ -1,3 +1,360 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import jwt
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from benchmarks.upstream import encode_bitmap
+from middlewares.user_integration import events, permissions
+from middlewares.user_integration.client import AccountAPIClient, SingleFlight
+from middlewares.user_integration.events import RevocationRegistry, UserEventSubscriber, generation, registry
+from middlewares.user_integration.middleware import RemoteJWTMiddleware, user_jwt_cache_key
+from middlewares.user_integration.token_cache import TokenLRUCache, token_cache, token_digest
+
+NOW = 1700000000.0
+
+
+class SingleFlightTests(SimpleTestCase):
+    """同一个 key 的并发调用只执行一次，结果与异常都由等待者共享"""
+
+    def run_concurrently(self, flight, fn, followers=8):
+        """leader 进入 fn 后再启动 followers，全部就位后放行 fn，返回各线程的结果或异常"""
+        entered, release = threading.Event(), threading.Event()
+        ready = threading.Barrier(followers + 1)
+        outcomes = []
+
+        def leader_fn():
+            entered.set()
+            release.wait(5)
+            return fn()
+
+        def call(wait):
+            if wait:
+                ready.wait(5)
+            try:
+                outcomes.append(flight.do('key', leader_fn))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=call, args=(False,))]
+        threads[0].start()
+        self.assertTrue(entered.wait(5))
+        threads += [threading.Thread(target=call, args=(True,)) for _ in range(followers)]
+        for thread in threads[1:]:
+            thread.start()
+        ready.wait(5)
+        time.sleep(0.05)  # followers 越过 barrier 后进入 do() 等待
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        return outcomes
+
+    def test_collapses_concurrent_calls(self):
+        flight = SingleFlight()
+        calls = []
+        outcomes = self.run_concurrently(flight, lambda: calls.append(1) or {'uuid': 'u1'})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(outcomes, [{'uuid': 'u1'}] * 9)
+        self.assertEqual(flight._calls, {})
+        # 调用结束后同一个 key 重新执行
+        self.assertEqual(flight.do('key', lambda: 'again'), 'again')
+
+    def test_propagates_exception(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fail():
+            calls.append(1)
+            raise requests.ConnectionError('OA unavailable')
+
+        outcomes = self.run_concurrently(flight, fail)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(outcomes), 9)
+        for outcome in outcomes:
+            self.assertIsInstance(outcome, requests.ConnectionError)
+        # 异常结果不会留在 _calls 中，下一次调用重新执行
+        self.assertEqual(flight._calls, {})
+        self.assertEqual(flight.do('key', lambda: 'recovered'), 'recovered')
+
+
+class BoundedPoolAdapterTests(SimpleTestCase):
+    """连接池占满时最多排队 pool_timeout 秒，超时抛 requests.ConnectionError，而不是无限等待"""
+
+    def setUp(self):
+        release = self.release = threading.Event()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):  # noqa
+                release.wait(5)
+                body = json.dumps({'uuid': 'u1'}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(self.release.set)
+
+    def test_pool_timeout(self):
+        client = AccountAPIClient(f'http://127.0.0.1:{self.server.server_port}', pool_size=1, timeout=10,
+                                  pool_timeout=0.2)
+        holder = threading.Thread(target=client.fetch_me, args=('a',))
+        holder.start()
+        time.sleep(0.1)  # 唯一的连接被占用
+
+        started = time.monotonic()
+        with self.assertRaises(requests.ConnectionError):
+            client.fetch_me('b')
+        self.assertLess(time.monotonic() - started, 2)
+
+        self.release.set()
+        holder.join(5)
+        # 连接归还后恢复正常
+        self.assertEqual(client.fetch_me('c'), {'uuid': 'u1'})
+
+
+@mock.patch('time.time', return_value=NOW)
+class TokenLRUCacheTests(SimpleTestCase):
+
+    def test_lru_eviction(self, now):
+        lru = TokenLRUCache(max_entries=2, ttl=60)
+        lru.set('a', 'claims', 1)
+        lru.set('b', 'claims', 2)
+        self.assertEqual(lru.get('a', 'claims'), 1)  # a 成为最近使用
+        lru.set('c', 'claims', 3)
+        self.assertIsNone(lru.get('b', 'claims'))
+        self.assertEqual(lru.get('a', 'claims'), 1)
+        self.assertEqual(lru.get('c', 'claims'), 3)
+
+    def test_eviction_cleans_user_index(self, now):
+        lru = TokenLRUCache(max_entries=1, ttl=60)
+        lru.set('a', 'claims', 1, users=('u1',))
+        lru.set('b', 'claims', 2, users=('u2',))
+        self.assertEqual(lru._users, {'u2': {'b'}})
+
+    def test_ttl_expiry(self, now):
+        lru = TokenLRUCache(max_entries=10, ttl=60)
+        lru.set('a', 'claims', 1)
+        now.return_value = NOW + 59
+        self.assertEqual(lru.get('a', 'claims'), 1)
+        now.return_value = NOW + 60
+        self.assertIsNone(lru.get('a', 'claims'))
+        self.assertNotIn('a', lru._data)
+
+    def test_expiry_bounded_by_exp_and_upper_ttl(self, now):
+        lru = TokenLRUCache(max_entries=10, ttl=60)
+        lru.set('exp', 'claims', 1, exp=NOW + 10)
+        lru.set('ttl', 'user', 2, ttl=20)
+        lru.set('expired', 'claims', 3, exp=NOW)
+        self.assertNotIn('expired', lru._data)
+        now.return_value = NOW + 10
+        self.assertIsNone(lru.get('exp', 'claims'))
+        self.assertEqual(lru.get('ttl', 'user'), 2)
+        now.return_value = NOW + 20
+        self.assertIsNone(lru.get('ttl', 'user'))
+
+    def test_fields_expire_independently(self, now):
+        lru = TokenLRUCache(max_entries=10, ttl=60)
+        lru.set('a', 'claims', 1)
+        lru.set('a', 'user', 2, ttl=5)
+        now.return_value = NOW + 5
+        self.assertIsNone(lru.get('a', 'user'))
+        self.assertEqual(lru.get('a', 'claims'), 1)
+
+    def test_evict_users(self, now):
+        lru = TokenLRUCache(max_entries=10, ttl=60)
+        lru.set('a', 'claims', 1, users=('u1', 'unified-1'))
+        lru.set('b', 'claims', 2, users=('u1',))
+        lru.set('c', 'claims', 3, users=('u2',))
+        lru.evict_users(['unified-1'])
+        self.assertIsNone(lru.get('a', 'claims'))
+        self.assertEqual(lru.get('b', 'claims'), 2)
+        lru.evict_users(['u1'])
+        self.assertIsNone(lru.get('b', 'claims'))
+        self.assertEqual(lru.get('c', 'claims'), 3)
+        self.assertEqual(lru._users, {'u2': {'c'}})
+
+    def test_disabled(self, now):
+        lru = TokenLRUCache(max_entries=0, ttl=60)
+        lru.set('a', 'claims', 1)
+        self.assertIsNone(lru.get('a', 'claims'))
+
+
+@mock.patch('time.time', return_value=NOW)
+class RevocationRegistryTests(SimpleTestCase):
+
+    def test_version_comparison(self, now):
+        revocations = RevocationRegistry()
+        revocations.revoke(['u1', 'unified-1', None], 5)
+        self.assertTrue(revocations.is_stale('u1', 4))
+        self.assertTrue(revocations.is_stale('unified-1', None))  # 缺失按 0 处理
+        self.assertFalse(revocations.is_stale('u1', 5))
+        self.assertFalse(revocations.is_stale('u1', 6))
+        self.assertFalse(revocations.is_stale('u2', 0))
+        self.assertFalse(revocations.is_stale(None, 0))
+
+    def test_ttl(self, now):
+        revocations = RevocationRegistry(ttl=100)
+        revocations.revoke(['u1'], 5)
+        now.return_value = NOW + 100
+        self.assertTrue(revocations.is_stale('u1', 4))
+        now.return_value = NOW + 101
+        self.assertFalse(revocations.is_stale('u1', 4))
+        self.assertNotIn('u1', revocations._data)
+
+    def test_max_entries(self, now):
+        revocations = RevocationRegistry(max_entries=2)
+        revocations.revoke(['u1'], 1)
+        revocations.revoke(['u2'], 1)
+        revocations.revoke(['u1'], 2)  # 再次记录的用户移到末尾
+        revocations.revoke(['u3'], 1)
+        self.assertEqual(list(revocations._data), ['u1', 'u3'])
+
+
+class UserCacheRevocationTests(SimpleTestCase):
+    """/me/ 缓存按 OA 的 perms_ver 与订阅代数失效"""
+
+    token = jwt.encode({'user_id': 'u1', 'exp': int(time.time()) + 3600}, 'secret', algorithm='HS256')
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        registry.clear()
+        self.digest = token_digest(self.token)
+        client = mock.Mock()
+        client.fetch_me.side_effect = lambda token: dict(self.oa_user)
+        patcher = mock.patch('middlewares.user_integration.middleware.get_account_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = client
+        self.oa_user = {'uuid': 'u1', 'unified_uuid': 'unified-1', 'permissions': ['a'], 'perms_ver': 1}
+
+    def load(self):
+        return RemoteJWTMiddleware._load_user_data(self.token, self.digest)
+
+    def test_event_revokes_cached_entry(self):
+        self.assertEqual(self.load()['permissions'], ['a'])
+        self.assertEqual(self.load()['permissions'], ['a'])
+        self.assertEqual(self.client.fetch_me.call_count, 1)  # 第二次命中 Redis
+
+        events.handle_event(json.dumps({'v': 2, 'u': [['u1', 'unified-1']]}))
+        self.assertIsNone(token_cache.get(self.digest, 'user'))
+        self.oa_user = {**self.oa_user, 'permissions': ['a', 'b'], 'perms_ver': 2}
+        self.assertEqual(self.load()['permissions'], ['a', 'b'])
+        self.assertEqual(self.client.fetch_me.call_count, 2)
+        self.assertEqual(cache.get(user_jwt_cache_key(self.digest))['user']['perms_ver'], 2)
+
+    def test_event_before_cache_entry(self):
+        # 事件先于 /me/ 响应到达：OA 返回的仍是变更前的数据，不得回填缓存
+        events.handle_event(json.dumps({'v': 2, 'u': [['u1', 'unified-1']]}))
+        self.assertEqual(self.load()['perms_ver'], 1)
+        self.assertIsNone(cache.get(user_jwt_cache_key(self.digest)))
+        self.assertIsNone(token_cache.get(self.digest, 'user'))
+
+        self.oa_user = {**self.oa_user, 'perms_ver': 2}
+        self.load()
+        self.assertEqual(cache.get(user_jwt_cache_key(self.digest))['user']['perms_ver'], 2)
+        self.assertEqual(self.client.fetch_me.call_count, 2)
+
+    def test_generation_bump_drops_redis_entries(self):
+        self.load()
+        key = user_jwt_cache_key(self.digest)
+        generation.bump()
+        self.assertNotEqual(user_jwt_cache_key(self.digest), key)
+        token_cache.clear()
+        self.load()
+        self.assertEqual(self.client.fetch_me.call_count, 2)
+
+
+class StopSubscriber(BaseException):
+    pass
+
+
+class UserEventSubscriberTests(SimpleTestCase):
+    """订阅建立时清空进程内缓存并递增代数；消息按用户吊销；断线后指数退避重连"""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        registry.clear()
+
+    def test_run(self):
+        token_cache.set('stale', 'claims', {'uuid': 'u0'}, users=('u0',))
+
+        def listen():
+            yield {'type': 'subscribe', 'data': 1}
+            yield {'type': 'message', 'data': 'not json'}  # 单条消息处理失败不影响订阅
+            yield {'type': 'message', 'data': json.dumps({'v': 3, 'u': [['u1', None]]})}
+            raise ConnectionError('lost')
+
+        pubsub = mock.Mock()
+        pubsub.listen.side_effect = [listen(), ConnectionError('lost'), ConnectionError('lost')]
+        redis = mock.Mock()
+        redis.pubsub.return_value = pubsub
+        subscriber = UserEventSubscriber('account:user_events', retry_interval=1, max_retry_interval=4)
+
+        with mock.patch.object(subscriber, 'get_redis', return_value=redis), \
+                mock.patch('middlewares.user_integration.events.time.sleep',
+                           side_effect=[None, None, StopSubscriber]) as sleep:
+            with self.assertRaises(StopSubscriber):
+                subscriber.run()
+
+        pubsub.subscribe.assert_called_with('account:user_events')
+        self.assertIsNone(token_cache.get('stale', 'claims'))
+        self.assertEqual(cache.get(events.USER_JWT_GENERATION_KEY), 1)
+        self.assertTrue(registry.is_stale('u1', 2))
+        self.assertFalse(registry.is_stale('u1', 3))
+        # 第一次断开前已订阅成功（退避重置为 1 秒），随后连续失败：1 -> 2 -> 4
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2, 4])
+
+
+class PermissionBitmapTests(SimpleTestCase):
+
+    codenames = [f'perm_{i}' for i in range(20)]
+
+    def test_decode(self):
+        for granted in ([], ['perm_0'], ['perm_7', 'perm_8'], ['perm_1', 'perm_9', 'perm_19'], self.codenames):
+            with self.subTest(granted=granted):
+                self.assertEqual(permissions.decode_bitmap(encode_bitmap(granted, self.codenames), self.codenames),
+                                 granted)
+
+    def test_decode_ignores_bits_beyond_dictionary(self):
+        value = encode_bitmap(['perm_19'], self.codenames)
+        self.assertEqual(permissions.decode_bitmap(value, self.codenames[:10]), [])
+
+    def test_permissions_from_claims(self):
+        version = 'v1'
+        payload = {'perms': encode_bitmap(['perm_3'], self.codenames), 'pv': version}
+        client = mock.Mock()
+        client.single_flight = SingleFlight()
+        client.fetch_permission_dictionary.return_value = {'version': version, 'codenames': self.codenames}
+        cache.clear()
+        with mock.patch.object(permissions, '_dictionaries', {}), \
+                mock.patch('middlewares.user_integration.permissions.get_account_client', return_value=client):
+            self.assertEqual(permissions.permissions_from_claims(payload, 'token'), ['perm_3'])
+            self.assertEqual(permissions.permissions_from_claims(payload, 'token'), ['perm_3'])
+            self.assertEqual(client.fetch_permission_dictionary.call_count, 1)
+
+            # 字典版本不可用时返回 None，调用方改用 OA /me/
+            client.fetch_permission_dictionary.return_value = {'version': 'v2', 'codenames': []}
+            self.assertIsNone(permissions.permissions_from_claims({**payload, 'pv': 'v0'}, 'token'))
+            client.fetch_permission_dictionary.side_effect = requests.ConnectionError
+            self.assertIsNone(permissions.permissions_from_claims({**payload, 'pv': 'v3'}, 'token'))
+
+        # 旧 token 没有位图，直接读取 permissions 声明
+        self.assertEqual(permissions.permissions_from_claims({'permissions': ['legacy']}, 'token'), ['legacy'])
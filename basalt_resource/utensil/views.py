@@ -1,6 +1,8 @@
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from middlewares.fast_json.renderers import Envelope
+
 
 # Create your views here.
 
@@ -12,11 +14,10 @@ class CustomPagination(PageNumberPagination):
     max_page_size = 100
 
     def get_paginated_response(self, data):
-        return Response({
-            "code": 200,
-            "total": self.page.paginator.count,
-            "page": self.page.number,
-            "page_size": self.get_page_size(self.request),
-            "total_pages": self.page.paginator.num_pages,
-            "results": data
-        })
+        return Response(Envelope.page(
+            data,
+            total=self.page.paginator.count,
+            page=self.page.number,
+            page_size=self.get_page_size(self.request),
+            total_pages=self.page.paginator.num_pages,
+        ))
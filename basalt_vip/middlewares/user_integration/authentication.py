@@ -0,0 +1,144 @@
+# b_system/interfaces/authentication.py
+import jwt
+import requests
+from rest_framework import authentication, exceptions
+from django.conf import settings
+
+from middlewares.user_integration.client import get_account_client
+from middlewares.user_integration.events import registry, start_subscriber
+from middlewares.user_integration.jwks import get_jwks_verifier
+from middlewares.user_integration.permissions import permissions_from_claims
+from middlewares.user_integration.token_cache import token_cache, token_digest
+
+
+class RemoteJWTAuthentication(authentication.BaseAuthentication):
+    """
+    只解析 JWT，不依赖 B 系统 User 模型。
+    """
+    def authenticate(self, request):
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return None  # 无 token 继续其他认证类
+
+        start_subscriber()
+        token = auth_header.split(' ')[1]
+        digest = token_digest(token)
+        # ✅ 已验签并解码的用户信息缓存在进程内（不超过 exp），重复 token 无需再次验签
+        user_info = token_cache.get(digest, "claims")
+        if user_info is None:
+            payload = self.verify_token(token)
+            if payload is None:
+                # OA 尚未启用 RS256（JWT_ACTIVE_KID 未配置）且本服务不持有签名密钥：交给 OA /me/ 校验
+                user_info = self.remote_user_info(request, token, digest)
+            else:
+                user_info = self.local_user_info(request, token, digest, payload)
+
+        # ✅ 签发后 OA 推送过该用户的权限变更事件：token 中的权限位图已过期，改用 OA 最新数据
+        if any(registry.is_stale(user, user_info.get("perms_ver")) for user in (user_info.get("uuid"), user_info.get("unified_uuid"))):
+            user_data = self.fresh_user_data(request, token, digest)
+            if not user_data:
+                raise exceptions.AuthenticationFailed('用户权限已变更，请重新登录')
+            user_info = {**user_info, "permissions": user_data.get("permissions", [])}
+
+        # ✅ 在 B 系统中 request.user 仍需一个对象，可使用 SimpleLazyObject
+        return (SimpleRemoteUser(user_info), None)
+
+    @staticmethod
+    def verify_token(token):
+        """
+        本地验签并返回 payload：带 kid 的 RS256 token 用 JWKS 公钥，无 kid 的 HS256 token 用 SIMPLE_JWT 密钥；
+        无 kid 且未配置 SIMPLE_JWT 时返回 None，由 OA 校验。
+        """
+        try:
+            legacy_key = getattr(settings, 'SIMPLE_JWT', {}).get('SIGNING_KEY')
+            if jwt.get_unverified_header(token).get("kid"):
+                return get_jwks_verifier().verify(token)
+            if legacy_key:
+                return jwt.decode(token, legacy_key, algorithms=["HS256"])
+            return None
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed('Token 已过期')
+        except jwt.InvalidTokenError:
+            raise exceptions.AuthenticationFailed('无效的 Token')
+
+    def local_user_info(self, request, token, digest, payload):
+        """只用 payload，不查 ORM；权限由 perms 位图本地解码"""
+        permissions = permissions_from_claims(payload, token)
+        user_info = {
+            "uuid": payload.get("user_id"),    # A 系统 JWT 中的 user_id 是 uuid
+            "unified_uuid": payload.get("unified_uuid"),
+            "username": payload.get("username"),
+            "email": payload.get("email"),
+            "permissions": permissions,
+            "roles": payload.get("roles", []),
+            "perms_ver": payload.get("perms_ver"),
+        }
+        if permissions is None:
+            # 位图无法解码（字典版本不可用 / OA 异常）：不缓存，改用 OA /me/ 返回的权限
+            user_data = self.fresh_user_data(request, token, digest)
+            if not user_data:
+                raise exceptions.AuthenticationFailed('暂时无法获取用户权限，请稍后重试')
+            user_info["permissions"] = user_data.get("permissions", [])
+        else:
+            # ✅ 已验签的 claims 缓存在进程内（不超过 exp）
+            token_cache.set(digest, "claims", user_info, exp=payload.get("exp"),
+                            users=(user_info["uuid"], user_info["unified_uuid"]))
+        return user_info
+
+    def remote_user_info(self, request, token, digest):
+        """由 OA /me/ 校验 token（OA 拒绝即视为无效）并返回用户信息，缓存不超过 token 的 exp"""
+        try:
+            # 签名由 OA 校验；这里只读取 exp / roles，已过期的 token 不必请求 OA
+            claims = jwt.decode(token, options={"verify_signature": False, "verify_exp": True})
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed('Token 已过期')
+        except jwt.InvalidTokenError:
+            raise exceptions.AuthenticationFailed('无效的 Token')
+        try:
+            user_data = self.fresh_user_data(request, token, digest)
+        except requests.RequestException:
+            raise exceptions.AuthenticationFailed('暂时无法校验 Token，请稍后重试')
+        if not user_data:
+            raise exceptions.AuthenticationFailed('无效的 Token')
+        user_info = {
+            "uuid": user_data.get("uuid"),
+            "unified_uuid": user_data.get("unified_uuid"),
+            "username": user_data.get("username"),
+            "email": user_data.get("email"),
+            "permissions": user_data.get("permissions", []),
+            "roles": claims.get("roles", []),
+            "perms_ver": user_data.get("perms_ver"),
+        }
+        token_cache.set(digest, "claims", user_info, exp=claims.get("exp"),
+                        users=(user_info["uuid"], user_info["unified_uuid"]))
+        return user_info
+
+    @staticmethod
+    def fresh_user_data(request, token, digest):
+        """取 OA /me/ 的最新用户数据：优先使用 RemoteJWTMiddleware 的结果，否则直接请求 OA"""
+        if hasattr(request._request, "jwt_user_data"):
+            return request._request.jwt_user_data
+        user_data = token_cache.get(digest, "user")
+        if user_data is None:
+            client = get_account_client()
+            user_data = client.single_flight.do(digest, lambda: client.fetch_me(token))
+            if user_data:
+                token_cache.set(digest, "user", user_data, users=(user_data.get("uuid"), user_data.get("unified_uuid")))
+        return user_data
+
+
+class SimpleRemoteUser:
+    """ 轻量用户对象，不依赖 ORM """
+    def __init__(self, info):
+        self.uuid = info.get("uuid")
+        self.username = info.get("username")
+        self.email = info.get("email")
+        self.permissions = info.get("permissions", [])
+        self.roles = info.get("roles", [])
+
+    def has_perm(self, perm):
+        return perm in self.permissions
+
+    @property
+    def is_authenticated(self):
+        return True